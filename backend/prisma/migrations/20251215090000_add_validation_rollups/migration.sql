@@ -0,0 +1,32 @@
+-- CreateTable
+CREATE TABLE "ValidationRollup" (
+    "id" SERIAL NOT NULL,
+    "granularity" TEXT NOT NULL,
+    "bucketStart" TIMESTAMP(3) NOT NULL,
+    "sourceType" TEXT NOT NULL,
+    "status" TEXT NOT NULL,
+    "confidenceBucket" INTEGER NOT NULL,
+    "count" INTEGER NOT NULL DEFAULT 0,
+    "confidenceSum" DOUBLE PRECISION NOT NULL DEFAULT 0.0,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "ValidationRollup_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "RollupWatermark" (
+    "name" TEXT NOT NULL,
+    "watermark" TIMESTAMP(3) NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "RollupWatermark_pkey" PRIMARY KEY ("name")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "ValidationRollup_bucket_key" ON "ValidationRollup"("granularity", "bucketStart", "sourceType", "status", "confidenceBucket");
+
+-- CreateIndex
+CREATE INDEX "ValidationRollup_granularity_bucketStart_idx" ON "ValidationRollup"("granularity", "bucketStart");
+
+-- CreateIndex
+CREATE INDEX "ValidationResult_validatedAt_idx" ON "ValidationResult"("validatedAt");
@@ -0,0 +1,99 @@
+"""
+Batch confidence scoring
+Vectorised counterpart of ConfidenceScoringService (confidenceScoring.service.ts):
+scores a whole providers x fields match matrix in one NumPy pass
+"""
+
+import numpy as np
+
+# Same fields, weights and order as FIELD_WEIGHTS in confidenceScoring.service.ts
+FIELDS = ('name', 'specialty', 'license', 'address', 'phone')
+
+FIELD_WEIGHTS = {
+    'name': 0.35,
+    'specialty': 0.25,
+    'license': 0.20,
+    'address': 0.15,
+    'phone': 0.05,
+}
+
+# getValidationStatus: >= 0.85 high, >= 0.70 medium, >= 0.50 low, else critical
+STATUS_THRESHOLDS = (0.50, 0.70, 0.85)
+STATUS_LABELS = ('critical', 'low', 'medium', 'high')
+
+# Above this many fields the 2**n lookup table stops paying off
+MAX_LOOKUP_FIELDS = 16
+
+
+def weight_vector(weights=FIELD_WEIGHTS, fields=FIELDS):
+    return np.array([weights.get(f, 0.0) for f in fields], dtype=np.float64)
+
+
+def matches_from_records(records, fields=FIELDS):
+    """Boolean providers x fields matrix from FieldMatch-style dicts"""
+    matrix = np.zeros((len(records), len(fields)), dtype=bool)
+    for i, record in enumerate(records):
+        matrix[i] = [bool(record.get(f)) for f in fields]
+    return matrix
+
+
+def _score_table(w):
+    """
+    Overall confidence for every possible match pattern.
+
+    Summing field by field in float64 reproduces the TypeScript reduce
+    exactly, so scores sitting on a threshold (e.g. 0.85) bucket the same way.
+    """
+    patterns = np.arange(2 ** len(w), dtype=np.int64)
+    bits = (patterns[:, None] >> np.arange(len(w))) & 1
+    table = np.zeros(len(patterns), dtype=np.float64)
+    for j in range(len(w)):
+        table += bits[:, j] * w[j]
+    return table
+
+
+def classify(confidence):
+    """Status codes (indices into STATUS_LABELS) for an array of confidences"""
+    return np.searchsorted(STATUS_THRESHOLDS, confidence, side='right').astype(np.uint8)
+
+
+def score_batch(matches, weights=FIELD_WEIGHTS, fields=FIELDS, field_scores=True):
+    """
+    Score every provider in a providers x fields boolean match matrix.
+
+    Returns a dict with:
+      overall       float64 (n,) weighted confidence, as calculateWeightedScore
+      field_scores  float32 (n, fields) weight earned per field (omitted
+                    when field_scores=False to save memory on huge batches)
+      status        uint8 (n,) codes into STATUS_LABELS
+      status_counts {label: count}
+    """
+    matches = np.asarray(matches, dtype=bool)
+    if matches.ndim != 2 or matches.shape[1] != len(fields):
+        raise ValueError(f'expected an (n, {len(fields)}) match matrix, got shape {matches.shape}')
+    w = weight_vector(weights, fields)
+
+    if len(fields) <= MAX_LOOKUP_FIELDS:
+        # Pack each row into an integer pattern and look its score up
+        packed = np.packbits(matches, axis=1, bitorder='little')
+        codes = np.zeros(len(matches), dtype=np.int64)
+        for k in range(packed.shape[1]):
+            codes |= packed[:, k].astype(np.int64) << (8 * k)
+        overall = _score_table(w)[codes]
+    else:
+        overall = matches.astype(np.float64) @ w
+
+    status = classify(overall)
+    result = {
+        'overall': overall,
+        'status': status,
+        'status_counts': dict(zip(STATUS_LABELS, np.bincount(status, minlength=len(STATUS_LABELS)).tolist())),
+    }
+    if field_scores:
+        result['field_scores'] = matches * w.astype(np.float32)
+    return result
+
+
+def status_labels(status):
+    """Map status codes back to 'critical' / 'low' / 'medium' / 'high'"""
+    return np.asarray(STATUS_LABELS)[status]
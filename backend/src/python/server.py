@@ -0,0 +1,356 @@
+"""
+LampStack analytics server
+Serves every chart from visualization/professional_analytics.py, plus the
+summary stats behind them, over HTTP. Rendered charts are cached by their
+query parameters and the data they were drawn from, answered with ETags, and
+a burst of identical requests renders only once.
+
+    python server.py [--host 127.0.0.1] [--port 8050] [--database-url URL] [--data-ttl 60]
+                     [--allow-origin https://dashboard.example.com]
+
+Listens on localhost only by default; the responses carry provider names
+and NPIs, so put it behind an authenticating proxy before binding wider.
+
+    GET /api/charts                         chart index
+    GET /api/charts/<name>.<png|svg|webp|jpg|pdf>?dpi=&width=&height=&thumbnail=1
+    GET /api/summary                        summary stats as JSON
+    GET /api/dashboard?since=<hash,...>     chart data for browser rendering (delta
+                                            against the section hashes the client holds)
+    GET /                                   dashboard.html, drawing from /api/dashboard
+    GET /health
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+VISUALIZATION_DIR = os.environ.get('ANALYTICS_VISUALIZATION_DIR') or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..', '..', 'visualization'))
+sys.path.insert(0, VISUALIZATION_DIR)
+
+import professional_analytics as pa  # noqa: E402
+from analytics.cache import fingerprint  # noqa: E402
+from analytics.export import CONTENT_TYPES, render_chart  # noqa: E402
+from analytics.payloads import dashboard_payload, delta_payload, encode_payload  # noqa: E402
+
+DEFAULT_HOST = os.environ.get('ANALYTICS_HOST', '127.0.0.1')
+DEFAULT_PORT = int(os.environ.get('ANALYTICS_PORT', 8050))
+DEFAULT_DATA_TTL = 60.0
+CACHE_BYTES = 64 * 1024 * 1024
+MAX_DPI = 300
+MAX_PIXELS = 4000
+# Below this a gzip header costs more than it saves
+GZIP_MIN_BYTES = 512
+DASHBOARD_HTML = os.path.join(VISUALIZATION_DIR, 'dashboard.html')
+
+# /api/charts/trust_score_matrix_heatmap.png -> create_trust_score_matrix_heatmap
+CHARTS = {func.__name__.removeprefix('create_'): func for func in pa.CHARTS}
+
+
+class DataSource:
+    """Chart data, reloaded from the database at most every `ttl` seconds"""
+
+    def __init__(self, database_url=None, ttl=DEFAULT_DATA_TTL, provider_limit=10):
+        self.database_url = database_url
+        self.ttl = ttl
+        self.provider_limit = provider_limit
+        self._lock = threading.Lock()
+        self._data = None
+        self._version = None
+        self._loaded_at = 0.0
+
+    def get(self):
+        """(data, version) where version changes whenever the data does"""
+        with self._lock:
+            stale = time.monotonic() - self._loaded_at > self.ttl
+            if self._data is None or (self.database_url is not None and stale):
+                if self.database_url is None:
+                    data = pa.REAL_VALIDATION_DATA
+                else:
+                    data = pa.load_data(self.database_url or None, provider_limit=self.provider_limit)
+                self._data, self._version = data, fingerprint(data)[:16]
+                self._loaded_at = time.monotonic()
+            return self._data, self._version
+
+
+class RenderCache:
+    """
+    LRU of rendered responses bounded by total bytes, with single-flight
+    rendering: concurrent misses on one key share the first caller's result.
+    """
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(('hits', 'misses', 'coalesced', 'evictions'), 0)
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return body
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            body = render()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, old = self._entries.popitem(last=False)
+                self._size -= len(old)
+                self.stats['evictions'] += 1
+        future.set_result(body)
+        return body
+
+    def info(self):
+        with self._lock:
+            return {**self.stats, 'entries': len(self._entries), 'bytes': self._size}
+
+
+# pyplot keeps global state, so charts render one at a time
+_render_lock = threading.Lock()
+
+
+def render(func, data, format, dpi, size, thumbnail):
+    with _render_lock, contextlib.redirect_stdout(io.StringIO()):
+        # Chart functions print a "Generated:" line per render; keep it out of the server log
+        return render_chart(func, data, format=format, dpi=dpi, size=size, thumbnail=thumbnail)
+
+
+def _mean(values, digits):
+    values = list(values)
+    return round(sum(values) / len(values), digits) if values else None
+
+
+def summary_stats(data):
+    """
+    The numbers the charts are drawn from, for dashboards that render their
+    own. Averages are None when there are no sources.
+    """
+    summary = pa.provider_summary(data)
+    trust = pa.trust_matrix(data)
+    weighted = trust.weighted_scores(data['field_weights'])
+    sources = data['sources']
+    return {
+        'providers': {k: summary[k] for k in ('total', 'status_counts', 'avg_score') if k in summary},
+        'score_histogram': dict(zip(('bins', 'counts'), pa.score_histogram(data))),
+        'sources': sources,
+        'source_weighted_trust': dict(zip(trust.sources, (round(float(w), 4) for w in weighted))),
+        'avg_trust_score': _mean((s['trust_score'] for s in sources.values()), 4),
+        'avg_response_ms': _mean((s['avg_response_ms'] for s in sources.values()), 1),
+        'field_weights': data['field_weights'],
+    }
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class NotFound(LookupError):
+    pass
+
+
+def _int_param(params, name, low, high):
+    if name not in params:
+        return None
+    try:
+        value = int(params[name][0])
+    except ValueError:
+        raise BadRequest(f'{name} must be an integer') from None
+    if not low <= value <= high:
+        raise BadRequest(f'{name} must be between {low} and {high}')
+    return value
+
+
+class AnalyticsHandler(BaseHTTPRequestHandler):
+    server_version = 'LampStackAnalytics/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.rstrip('/')
+        try:
+            if path == '/health':
+                self.send_json({'status': 'ok', 'cache': self.server.cache.info()})
+            elif path == '/api/charts':
+                self.send_json([{'name': name, 'output': func.output_name, 'url': f'/api/charts/{name}.png'}
+                                for name, func in CHARTS.items()])
+            elif path == '/api/summary':
+                self.send_summary()
+            elif path in ('/api/dashboard', '/api/dashboard.json'):
+                self.send_dashboard(parse_qs(url.query))
+            elif path in ('', '/dashboard.html'):
+                self.send_page(DASHBOARD_HTML)
+            elif path.startswith('/api/charts/'):
+                self.send_chart(path[len('/api/charts/'):], parse_qs(url.query))
+            else:
+                raise NotFound('not found')
+        except BadRequest as e:
+            self.send_json({'error': str(e)}, status=400)
+        except NotFound as e:
+            self.send_json({'error': str(e)}, status=404)
+        except Exception as e:
+            self.log_error('render failed for %s: %s', self.path, e)
+            self.send_json({'error': 'internal error'}, status=500)
+
+    def send_chart(self, filename, params):
+        name, _, format = filename.rpartition('.')
+        func = CHARTS.get(name)
+        if func is None:
+            raise NotFound(f'unknown chart {name!r}')
+        format = format.lower()
+        if format not in CONTENT_TYPES:
+            raise BadRequest(f'unsupported format {format!r}')
+        dpi = _int_param(params, 'dpi', 10, MAX_DPI)
+        width = _int_param(params, 'width', 16, MAX_PIXELS)
+        height = _int_param(params, 'height', 16, MAX_PIXELS)
+        size = (width or MAX_PIXELS, height or MAX_PIXELS) if width or height else None
+        thumbnail = params.get('thumbnail', ['0'])[0] not in ('0', 'false', '')
+
+        data, version = self.server.data.get()
+        # The output is a pure function of the key, so the ETag can be answered before rendering
+        key = (name, format, dpi, size, thumbnail, version)
+        etag = f'"{fingerprint(key)[:20]}"'
+        if self.not_modified(etag):
+            return
+        body = self.server.cache.get_or_render(key, lambda: render(func, data, format, dpi, size, thumbnail))
+        self.send_body(body, CONTENT_TYPES[format], etag)
+
+    def send_summary(self):
+        data, version = self.server.data.get()
+        etag = f'"summary-{version}"'
+        if self.not_modified(etag):
+            return
+        body = self.server.cache.get_or_render(('summary', version),
+                                               lambda: json.dumps(summary_stats(data)).encode('utf-8'))
+        self.send_body(body, 'application/json', etag)
+
+    def send_dashboard(self, params):
+        data, version = self.server.data.get()
+        payload = dashboard_payload(data)
+        since = [h for value in params.get('since', []) for h in value.split(',') if h]
+        delta = delta_payload(payload, since)
+        sent = tuple(delta['sections'])
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+        etag = f'"{fingerprint("dashboard", payload["version"], sent, gzipped)[:20]}"'
+        headers = {'Vary': 'Accept-Encoding'}
+        if self.not_modified(etag):
+            return
+        # Keyed by the sections sent rather than the raw `since`, so the
+        # number of cached bodies per data version stays bounded
+        body = self.server.cache.get_or_render(('dashboard', version, sent), lambda: encode_payload(delta))
+        if gzipped and len(body) >= GZIP_MIN_BYTES:
+            body = self.server.cache.get_or_render(('dashboard', version, sent, 'gzip'),
+                                                   lambda: encode_payload(delta, compress=True))
+            headers['Content-Encoding'] = 'gzip'
+        self.send_body(body, 'application/json', etag, headers=headers)
+
+    def send_page(self, path):
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            raise NotFound('not found') from None
+        etag = f'"{fingerprint(body.decode("utf-8"))[:20]}"'
+        if self.not_modified(etag):
+            return
+        self.send_body(body, 'text/html; charset=utf-8', etag)
+
+    def not_modified(self, etag):
+        candidates = [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]
+        if etag in candidates or '*' in candidates:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return True
+        return False
+
+    def send_body(self, body, content_type, etag=None, status=200, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if self.server.allow_origin:
+            self.send_header('Access-Control-Allow-Origin', self.server.allow_origin)
+            self.send_header('Vary', 'Origin')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if etag:
+            self.send_header('ETag', etag)
+            # Clients may keep the response but must revalidate; a 304 is cheap
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, payload, status=200):
+        self.send_body(json.dumps(payload).encode('utf-8'), 'application/json', status=status)
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, data=None, cache=None, allow_origin=None):
+    """`allow_origin` is sent as Access-Control-Allow-Origin; no CORS header without it"""
+    server = ThreadingHTTPServer((host, port), AnalyticsHandler)
+    server.daemon_threads = True
+    server.allow_origin = allow_origin
+    server.data = data or DataSource()
+    server.cache = cache or RenderCache()
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Serve LampStack analytics charts over HTTP')
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help='interface to listen on (localhost by default; there is no authentication)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--database-url', nargs='?', const='', default=None,
+                        help='chart live data from this database (defaults to $DATABASE_URL)')
+    parser.add_argument('--data-ttl', type=float, default=DEFAULT_DATA_TTL,
+                        help='seconds between database reloads')
+    parser.add_argument('--providers', type=int, default=10,
+                        help='number of recently validated providers to show individually')
+    parser.add_argument('--allow-origin', default=os.environ.get('ANALYTICS_ALLOW_ORIGIN'),
+                        help='origin allowed to read responses cross-site (Access-Control-Allow-Origin); '
+                             'none by default')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    server = make_server(args.host, args.port, DataSource(args.database_url, args.data_ttl, args.providers),
+                         allow_origin=args.allow_origin)
+    print(f'[analytics] Listening on http://{args.host}:{args.port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,61 @@
+import json
+import threading
+import urllib.request
+
+import pytest
+
+import server
+from analytics.data_loader import FIXTURE_SCHEMA, connect
+
+
+@pytest.fixture
+def empty_db(tmp_path):
+    path = str(tmp_path / 'empty.db')
+    conn = connect(path)
+    conn.executescript(FIXTURE_SCHEMA)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(**kwargs):
+        httpd = server.make_server(port=0, **kwargs)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return f'http://127.0.0.1:{httpd.server_address[1]}'
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_summary_stats_without_sources():
+    data = {**server.pa.REAL_VALIDATION_DATA, 'sources': {}}
+    stats = server.summary_stats(data)
+    assert stats['avg_trust_score'] is None
+    assert stats['avg_response_ms'] is None
+
+
+def test_summary_from_empty_database(empty_db, serve):
+    url = serve(data=server.DataSource(empty_db))
+    with urllib.request.urlopen(f'{url}/api/summary') as response:
+        assert response.status == 200
+        summary = json.load(response)
+    assert summary['providers']['total'] == 0
+
+
+def test_listens_on_localhost_without_cors_by_default(serve):
+    url = serve()
+    assert server.parse_args([]).host == '127.0.0.1'
+    with urllib.request.urlopen(f'{url}/health') as response:
+        assert response.headers.get('Access-Control-Allow-Origin') is None
+
+
+def test_allow_origin_is_opt_in(serve):
+    url = serve(allow_origin='https://dashboard.example.com')
+    with urllib.request.urlopen(f'{url}/health') as response:
+        assert response.headers['Access-Control-Allow-Origin'] == 'https://dashboard.example.com'
@@ -0,0 +1,496 @@
+"""
+Large-scale synthetic validation data
+Streams millions of Provider, ValidationResult and TrustScore rows to disk,
+chunk by chunk, for load-testing ingestion, scoring and the analytics
+charts locally:
+
+- providers: a roster in the columns ingestion.py reads, with invalid and
+  placeholder NPIs and near-duplicate clusters (typos, ALL CAPS names,
+  reformatted phones, spelled-out streets). clusterId is the row number of
+  each cluster's original, so dedup recall can be scored.
+- validation_results: one row per provider, source and run. Success and
+  latency are correlated: a provider's record quality moves every source
+  together, and slow responses fail more often. Rates and mean latencies
+  come from REAL_VALIDATION_DATA.
+- trust_scores: one row per (sourceType, dataField), learned from the
+  results with trust_learning's EMA.
+
+    python benchmarks/generate.py --providers 1000000 --out /tmp/lampstack
+    python benchmarks/generate.py --providers 5000000 --format snapshot --out /tmp/lampstack
+    python visualization/professional_analytics.py --results-file /tmp/lampstack/validation_results.snapshot
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from statistics import NormalDist
+
+import numpy as np
+
+import synthetic
+from mock_sources import DEFAULT_JITTER
+from synthetic import CITIES, FIRST_NAMES, LAST_NAMES, REAL_VALIDATION_DATA, SPECIALTIES, STREETS
+
+from analytics.snapshot import SnapshotWriter
+
+FORMATS = ('csv', 'jsonl', 'snapshot')
+CHUNK_ROWS = 100_000
+
+CREDENTIALS = np.array(['MD', 'DO', 'NP', 'PA'])
+CREDENTIAL_WEIGHTS = (0.7, 0.15, 0.1, 0.05)
+PHONE_LAYOUTS = ('###-###-####', '(###) ###-####', '##########', '+1 ### ### ####')
+STREET_SPELLINGS = {'St': 'Street', 'Ave': 'Avenue', 'Rd': 'Road', 'Dr': 'Drive', 'Ln': 'Lane', 'Blvd': 'Boulevard'}
+
+# How a provider's record quality and a call's latency move its success
+PROVIDER_CORRELATION = 0.6
+LATENCY_CORRELATION = 0.3
+# Calls that hang until the orchestrator's timeout, on top of slow ones
+HANG_RATE = 0.005
+TIMEOUT_MS = 10_000
+# Providers with an invalid NPI have much worse records elsewhere too
+INVALID_NPI_QUALITY = -2.0
+# Near-duplicates that were keyed in under another NPI
+DUPLICATE_NEW_NPI_RATE = 0.3
+# Mirrors trust_learning: what counts as a success, and the EMA rate
+SUCCESS_CONFIDENCE = 0.7
+LEARNING_RATE = 0.1
+# Outcomes older than this many steps weigh less than 0.9^512 in the EMA
+TRUST_WINDOW = 512
+
+AGENTS = {'npi_registry': ('validator', 'npi_check'), 'google_maps': ('enrichment', 'contact_validation'),
+          'state_medical_board': ('cross_reference', 'license_verification')}
+DEFAULT_AGENT = ('cross_reference', 'network_verification')
+# foundIssues per outcome, by code; ';'-joined in CSV like the roster's list fields
+ISSUES = {
+    'success': [],
+    'failed': ['No matching record'],
+    'timeout': [f'No response within {TIMEOUT_MS // 1000}s'],
+    'invalid_npi': ['Invalid NPI check digit', 'No matching record'],
+}
+ISSUE_CODES = {kind: code for code, kind in enumerate(ISSUES)}
+
+PROVIDER_FIELDS = ('id', 'npiNumber', 'firstName', 'lastName', 'credentials', 'primaryPhone', 'practiceAddress',
+                   'city', 'state', 'zipCode', 'specialties', 'licenseNumbers', 'clusterId')
+RESULT_FIELDS = ('id', 'providerId', 'npi', 'agentName', 'validationType', 'status', 'confidence', 'score',
+                 'sourceType', 'responseMs', 'foundIssues', 'validatedAt')
+TRUST_FIELDS = ('sourceType', 'dataField', 'score', 'successCount', 'failureCount', 'totalValidations',
+                'learningRate', 'lastUpdated')
+# Columns written as JSON numbers rather than strings
+NUMERIC_FIELDS = {'confidence', 'score', 'responseMs', 'clusterId', 'successCount', 'failureCount',
+                  'totalValidations', 'learningRate'}
+LIST_FIELDS = {'specialties', 'licenseNumbers', 'foundIssues'}
+
+HOUSE_NUMBERS = np.arange(10_000).astype('S')
+ISO_LAYOUT = '####-##-##T##:##:##.###Z'
+ISO_WIDTHS = (4, 2, 2, 2, 2, 2, 3)
+
+_HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+_UUID_SLOTS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+
+
+def source_types():
+    """{sourceType: (label, success rate, mean latency ms)} for every REAL_VALIDATION_DATA source"""
+    return {'_'.join(label.lower().split()): (label, s['success_rate'], s['avg_response_ms'])
+            for label, s in REAL_VALIDATION_DATA['sources'].items()}
+
+
+def uuids(n, rng):
+    """n random version-4 style UUIDs, as byte strings"""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = raw[:, 6] & 0x0F | 0x40
+    raw[:, 8] = raw[:, 8] & 0x3F | 0x80
+    out = np.full((n, 36), ord('-'), dtype=np.uint8)
+    out[:, _UUID_SLOTS] = np.stack([_HEX[raw >> 4], _HEX[raw & 0x0F]], axis=2).reshape(n, 32)
+    return out.view('S36').ravel()
+
+
+def render_digits(digits, layout):
+    """Rows of digits rendered into `layout` as byte strings, where '#' takes the next digit"""
+    slots = [i for i, c in enumerate(layout) if c == '#']
+    out = np.tile(np.frombuffer(layout.encode(), dtype=np.uint8), (len(digits), 1))
+    out[:, slots] = digits[:, :len(slots)] + 48
+    return out.view(f'S{len(layout)}').ravel()
+
+
+def typos(values, rng):
+    """Each byte string with one letter swapped for a random lowercase one"""
+    chars = np.array(values, dtype='S').view(np.uint8).reshape(len(values), -1)
+    pos = (rng.random(len(values)) * (chars != 0).sum(axis=1)).astype(np.int64)
+    chars[np.arange(len(values)), pos] = rng.integers(97, 123, size=len(values), dtype=np.uint8)
+    return chars.view(f'S{chars.shape[1]}').ravel()
+
+
+def spell_out_streets(addresses):
+    for short, long in STREET_SPELLINGS.items():
+        addresses = np.char.replace(addresses, f' {short}'.encode(), f' {long}'.encode())
+    return addresses
+
+
+def provider_chunk(n, start, rng, invalid_rate, duplicate_rate):
+    """
+    Columns (byte strings) for roster rows start..start+n, plus each row's
+    record quality (a standard normal) and whether its NPI is valid.
+    """
+    city = rng.integers(0, len(CITIES), n)
+    cities = CITIES.astype('S')
+    phone_digits = rng.integers(0, 10, size=(n, 10), dtype=np.uint8)
+    phone_digits[:, [0, 3]] = rng.integers(2, 10, size=(n, 2), dtype=np.uint8)
+    specialties = SPECIALTIES.astype('S')[rng.integers(0, len(SPECIALTIES), (n, 2))]
+    columns = {
+        'id': uuids(n, rng),
+        'npiNumber': synthetic.npi_numbers(n, rng, invalid_rate).astype('S10'),
+        'firstName': FIRST_NAMES.astype('S')[rng.integers(0, len(FIRST_NAMES), n)],
+        'lastName': LAST_NAMES.astype('S')[rng.integers(0, len(LAST_NAMES), n)],
+        'credentials': rng.choice(CREDENTIALS.astype('S'), n, p=CREDENTIAL_WEIGHTS),
+        # Wide enough for the other phone layouts and spelled-out street names
+        'primaryPhone': render_digits(phone_digits, PHONE_LAYOUTS[0]).astype('S16'),
+        'practiceAddress': np.char.add(HOUSE_NUMBERS[rng.integers(1, len(HOUSE_NUMBERS), n)],
+                                       np.char.add(b' ', STREETS.astype('S'))[rng.integers(0, len(STREETS), n)]
+                                       ).astype('S32'),
+        'city': cities[city, 0],
+        'state': cities[city, 1],
+        'zipCode': cities[city, 2],
+        'specialties': np.where(specialties[:, 0] == specialties[:, 1], specialties[:, 0],
+                                np.char.add(np.char.add(specialties[:, 0], b';'), specialties[:, 1])),
+        'licenseNumbers': np.char.add(cities[city, 1],
+                                      render_digits(rng.integers(0, 10, size=(n, 6), dtype=np.uint8), '######')),
+        'clusterId': np.arange(start, start + n),
+    }
+    quality = rng.standard_normal(n)
+
+    # Near-duplicates copy another row of the chunk and garble it
+    is_dup = rng.random(n) < duplicate_rate
+    dup = np.flatnonzero(is_dup)
+    original = rng.choice(np.flatnonzero(~is_dup), len(dup))
+    for name, values in columns.items():
+        if name != 'id':
+            values[dup] = values[original]
+    quality[dup] = quality[original]
+    phone_digits[dup] = phone_digits[original]
+    mask = rng.random((4, len(dup)))
+    typo = dup[mask[0] < 0.5]
+    columns['lastName'][typo] = typos(columns['lastName'][typo], rng)
+    caps = dup[mask[1] < 0.3]
+    columns['firstName'][caps] = np.char.upper(columns['firstName'][caps])
+    columns['lastName'][caps] = np.char.upper(columns['lastName'][caps])
+    layout = rng.integers(1, len(PHONE_LAYOUTS), len(dup))
+    for i, fmt in enumerate(PHONE_LAYOUTS[1:], start=1):
+        rows = dup[layout == i]
+        columns['primaryPhone'][rows] = render_digits(phone_digits[rows], fmt)
+    spelled = dup[mask[2] < 0.4]
+    columns['practiceAddress'][spelled] = spell_out_streets(columns['practiceAddress'][spelled])
+    renumbered = dup[mask[3] < DUPLICATE_NEW_NPI_RATE]
+    columns['npiNumber'][renumbered] = synthetic.npi_numbers(len(renumbered), rng, invalid_rate).astype('S10')
+
+    valid = np.isin(columns['npiNumber'], synthetic.PLACEHOLDER_NPIS.astype('S'), invert=True)
+    digits = columns['npiNumber'].view(np.uint8).reshape(n, 10).astype(np.int64) - 48
+    valid &= synthetic.npi_check_digits(digits[:, :9]) == digits[:, 9]
+    quality[~valid] += INVALID_NPI_QUALITY
+    return columns, quality, valid
+
+
+def result_chunk(providers, quality, valid, rng, sources, runs, start_ms, span_ms):
+    """
+    ValidationResult columns for every provider x source x run, plus the
+    (sourceType, success) outcomes trust learning would see, in row order.
+    """
+    n = len(quality)
+    names = list(sources)
+    k = len(names) * runs
+    rows = n * k
+    provider = np.repeat(np.arange(n), k)
+    source = np.tile(np.repeat(np.arange(len(names)), runs), n)
+    rates = np.array([sources[s][1] for s in names])
+    means = np.array([sources[s][2] for s in names], dtype=np.float64)
+
+    latency_z = rng.standard_normal(rows)
+    latency = means[source] * np.exp(DEFAULT_JITTER * latency_z - DEFAULT_JITTER ** 2 / 2)
+    noise = np.sqrt(1 - PROVIDER_CORRELATION ** 2 - LATENCY_CORRELATION ** 2) * rng.standard_normal(rows)
+    propensity = PROVIDER_CORRELATION * quality[provider] - LATENCY_CORRELATION * latency_z + noise
+    # Hung calls come out of the successes, so answered calls succeed a little more often
+    threshold = np.array([NormalDist().inv_cdf(1 - r / (1 - HANG_RATE)) for r in rates])[source]
+    success = propensity > threshold
+    hung = (rng.random(rows) < HANG_RATE) | (latency >= TIMEOUT_MS)
+    invalid = ~valid[provider] & (np.array(names)[source] == 'npi_registry')
+    success &= ~hung & ~invalid
+    latency[hung] = TIMEOUT_MS
+
+    status = np.where(success, b'success', np.where(hung, b'timeout', b'failed'))
+    confidence = np.where(success, np.clip(0.6 + 0.15 * (propensity - threshold), 0.5, 1.0),
+                          np.where(hung, 0.0, np.clip(0.3 + 0.1 * (propensity - threshold), 0.0, 0.49)))
+    confidence = confidence.round(3)
+    issue = np.where(invalid & ~hung, ISSUE_CODES['invalid_npi'],
+                     np.where(success, ISSUE_CODES['success'], np.where(hung, ISSUE_CODES['timeout'],
+                                                                       ISSUE_CODES['failed'])))
+
+    # Each run validates a provider at one moment; sources answer after their latency
+    run_ms = start_ms + (rng.random(n * runs) * span_ms).astype(np.int64)
+    validated_at = run_ms[np.tile(np.arange(runs), n * len(names)) + provider * runs] + latency.astype(np.int64)
+    agents = [AGENTS.get(s, DEFAULT_AGENT) for s in names]
+    columns = {
+        'id': uuids(rows, rng),
+        'providerId': providers['id'][provider],
+        'npi': providers['npiNumber'][provider],
+        'agentName': np.array([a for a, _ in agents], dtype='S')[source],
+        'validationType': np.array([t for _, t in agents], dtype='S')[source],
+        'status': status,
+        'confidence': confidence,
+        'score': (confidence * 100).round(1),
+        'sourceType': np.array(names, dtype='S')[source],
+        'responseMs': latency.astype(np.int64),
+        'foundIssues': issue,
+        'validatedAt': validated_at,
+    }
+    scored = ~hung
+    return columns, source[scored], (success & (confidence > SUCCESS_CONFIDENCE))[scored]
+
+
+class TrustLearner:
+    """
+    TrustScore rows per (sourceType, dataField), folded chunk by chunk. A
+    field agrees with a successful source with that source's confidence for
+    the field in REAL_VALIDATION_DATA, so License is never confirmed by
+    Google Maps.
+    """
+
+    def __init__(self, sources, rng):
+        self.names = list(sources)
+        confidence = REAL_VALIDATION_DATA['field_confidence_by_source']
+        self.fields = [f.lower() for f in REAL_VALIDATION_DATA['field_weights']]
+        self.field_confidence = np.array([[confidence.get(sources[s][0], {}).get(f, 0.5)
+                                           for f in REAL_VALIDATION_DATA['field_weights']] for s in self.names])
+        self.rng = rng
+        shape = self.field_confidence.shape
+        self.score = np.full(shape, np.nan)
+        self.successes = np.zeros(shape, dtype=np.int64)
+        self.total = np.zeros(shape, dtype=np.int64)
+        decay = 1 - LEARNING_RATE
+        self.weights = LEARNING_RATE * decay ** np.arange(TRUST_WINDOW)[::-1]
+
+    def update(self, source, success):
+        for i in range(len(self.names)):
+            outcomes = success[source == i]
+            if not len(outcomes):
+                continue
+            agree = outcomes[:, None] & (self.rng.random((len(outcomes), len(self.fields)))
+                                         < self.field_confidence[i])
+            first = np.isnan(self.score[i])
+            self.score[i, first] = np.where(agree[0, first], 0.8, 0.3)
+            steps = len(outcomes) - first
+            terms = agree[-TRUST_WINDOW:].astype(np.float64)
+            if len(outcomes) <= TRUST_WINDOW:
+                terms[0, first] = 0.0  # a new row's first outcome sets its score rather than updating it
+            recent = (self.weights[-len(terms):, None] * terms).sum(axis=0)
+            self.score[i] = self.score[i] * (1 - LEARNING_RATE) ** steps + recent
+            self.successes[i] += agree.sum(axis=0)
+            self.total[i] += len(outcomes)
+
+    def columns(self, updated):
+        pairs = [(s, f) for s in self.names for f in self.fields]
+        total = self.total.ravel()
+        return {
+            'sourceType': np.array([s for s, _ in pairs]),
+            'dataField': np.array([f for _, f in pairs]),
+            'score': np.nan_to_num(self.score.ravel(), nan=0.5).round(4),
+            'successCount': self.successes.ravel(),
+            'failureCount': total - self.successes.ravel(),
+            'totalValidations': total,
+            'learningRate': np.full(len(pairs), LEARNING_RATE),
+            'lastUpdated': np.full(len(pairs), updated),
+        }
+
+
+def iso_times(ms):
+    """Epoch milliseconds as ISO 8601 UTC byte strings"""
+    ms = np.asarray(ms, dtype=np.int64)
+    days = ms.astype('datetime64[ms]').astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    day_ms = ms - days.astype('datetime64[ms]').astype(np.int64)
+    parts = (years.astype(np.int64) + 1970, (months - years).astype(np.int64) + 1,
+             (days - months).astype(np.int64) + 1, day_ms // 3_600_000, day_ms // 60_000 % 60,
+             day_ms // 1000 % 60, day_ms % 1000)
+    digits = np.concatenate([part[:, None] // 10 ** np.arange(width - 1, -1, -1) % 10
+                             for part, width in zip(parts, ISO_WIDTHS)], axis=1)
+    return render_digits(digits.astype(np.uint8), ISO_LAYOUT)
+
+
+def as_bytes(values):
+    """A column as byte strings; numbers are formatted once per distinct value"""
+    values = np.asarray(values)
+    if values.dtype.kind == 'S':
+        return values
+    if values.dtype.kind == 'U':
+        return values.astype('S')  # every generated string is ASCII
+    labels, inverse = np.unique(values, return_inverse=True)
+    return np.array([str(label).encode() for label in labels.tolist()], dtype='S')[inverse]
+
+
+def render_column(name, values, fmt):
+    if name == 'foundIssues':
+        labels = [';'.join(issues) if fmt == 'csv' else '[' + ','.join(f'"{i}"' for i in issues) + ']'
+                  for issues in ISSUES.values()]
+        return np.array(labels, dtype='S')[values]
+    if name in ('validatedAt', 'lastUpdated'):
+        return iso_times(values)
+    values = as_bytes(values)
+    if name in LIST_FIELDS and fmt == 'jsonl':
+        values = np.char.add(np.char.add(b'["', np.char.replace(values, b';', b'","')), b'"]')
+    return values
+
+
+def join_rows(columns, pieces):
+    """
+    Rows of byte-string columns with pieces[i] before column i and
+    pieces[-1] after the last, as one bytes object. Each column is viewed
+    as its NUL-padded byte matrix, the matrices are laid side by side and
+    dropping every NUL leaves the rows joined, with no per-row Python.
+    """
+    n = len(columns[0])
+    blocks = []
+    for piece, values in zip(pieces, columns + [None]):
+        if piece:
+            blocks.append(np.broadcast_to(np.frombuffer(piece, dtype=np.uint8), (n, len(piece))))
+        if values is not None:
+            values = np.ascontiguousarray(values)
+            blocks.append(values.view(np.uint8).reshape(n, values.itemsize))
+    matrix = np.concatenate(blocks, axis=1)
+    return matrix[matrix != 0].tobytes()
+
+
+class TableSink:
+    """
+    One output table as CSV or JSONL. No generated value contains a comma,
+    quote, backslash or NUL, so fields are written as-is, without the csv
+    or json modules.
+    """
+
+    def __init__(self, path, fields, fmt):
+        self.path = path
+        self.fields = fields
+        self.fmt = fmt
+        self.rows = 0
+        self.file = open(path, 'wb')
+        if fmt == 'csv':
+            self.file.write(','.join(fields).encode() + b'\n')
+            self.pieces = [b''] + [b','] * (len(fields) - 1) + [b'\n']
+        else:
+            self.pieces = [b'']
+            for i, field in enumerate(fields):
+                quote = '' if field in NUMERIC_FIELDS | LIST_FIELDS else '"'
+                self.pieces[i] += f'{"," if i else "{"}"{field}":{quote}'.encode()
+                self.pieces.append(quote.encode())
+            self.pieces[-1] += b'}\n'
+
+    def write(self, columns):
+        self.file.write(join_rows([render_column(f, columns[f], self.fmt) for f in self.fields], self.pieces))
+        self.rows += len(columns[self.fields[0]])
+
+    def close(self):
+        self.file.close()
+
+
+class SnapshotSink:
+    """Validation results as an analytics snapshot (the repo's columnar format)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.writer = SnapshotWriter(path)
+
+    @property
+    def rows(self):
+        return self.writer.rows
+
+    def write(self, columns):
+        self.writer.append(columns['npi'], columns['score'], columns['status'].astype(str),
+                           columns['sourceType'].astype(str), columns['validatedAt'])
+
+    def close(self):
+        self.writer.close()
+
+
+def disk_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def generate(out_dir, n_providers, fmt='csv', runs=1, seed=0, invalid_rate=0.02, duplicate_rate=0.05, days=30,
+             end=None, chunk_rows=CHUNK_ROWS, log=print):
+    """
+    Write providers, validation_results and trust_scores into `out_dir`.
+    Returns {table: {rows, bytes, path}}. Snapshot output keeps providers
+    and trust scores as CSV, the roster format ingestion reads.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    end = end or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    end_ms = int(end.timestamp() * 1000)
+    span_ms = days * 86_400_000
+    sources = source_types()
+    table_fmt = 'csv' if fmt == 'snapshot' else fmt
+    sinks = {
+        'providers': TableSink(os.path.join(out_dir, f'providers.{table_fmt}'), PROVIDER_FIELDS, table_fmt),
+        'validation_results': (SnapshotSink(os.path.join(out_dir, 'validation_results.snapshot'))
+                               if fmt == 'snapshot' else
+                               TableSink(os.path.join(out_dir, f'validation_results.{fmt}'), RESULT_FIELDS, fmt)),
+    }
+    learner = TrustLearner(sources, synthetic.rng_for(seed))
+    started = time.perf_counter()
+    try:
+        for chunk, start in enumerate(range(0, n_providers, chunk_rows)):
+            rng = synthetic.rng_for([seed, chunk])
+            n = min(chunk_rows, n_providers - start)
+            providers, quality, valid = provider_chunk(n, start, rng, invalid_rate, duplicate_rate)
+            results, source, success = result_chunk(providers, quality, valid, rng, sources, runs,
+                                                    end_ms - span_ms, span_ms)
+            learner.update(source, success)
+            sinks['providers'].write(providers)
+            sinks['validation_results'].write(results)
+            done = start + n
+            elapsed = time.perf_counter() - started
+            log(f'{done:,}/{n_providers:,} providers, {sinks["validation_results"].rows:,} results '
+                f'({done / elapsed:,.0f} providers/s)')
+        sinks['trust_scores'] = TableSink(os.path.join(out_dir, f'trust_scores.{table_fmt}'), TRUST_FIELDS,
+                                          table_fmt)
+        sinks['trust_scores'].write(learner.columns(end_ms))
+    finally:
+        for sink in sinks.values():
+            sink.close()
+    return {name: {'rows': sink.rows, 'bytes': disk_size(sink.path), 'path': sink.path}
+            for name, sink in sinks.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write synthetic providers, validation results and trust scores')
+    parser.add_argument('--providers', type=int, default=1_000_000, help='roster rows to generate')
+    parser.add_argument('--out', required=True, help='output directory')
+    parser.add_argument('--format', choices=FORMATS, default='csv',
+                        help='snapshot writes validation results as an analytics snapshot, the rest as CSV')
+    parser.add_argument('--runs', type=int, default=1, help='validation runs per provider')
+    parser.add_argument('--invalid-rate', type=float, default=0.02, help='share of invalid or placeholder NPIs')
+    parser.add_argument('--duplicate-rate', type=float, default=0.05, help='share of near-duplicate roster rows')
+    parser.add_argument('--days', type=int, default=30, help='validatedAt spread, ending at --end')
+    parser.add_argument('--end', default=None, help='ISO date the results end at (default: today, UTC)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='providers generated per step')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    end = None
+    if args.end:
+        end = datetime.fromisoformat(args.end)
+        end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+    started = time.perf_counter()
+    tables = generate(args.out, args.providers, args.format, args.runs, args.seed, args.invalid_rate,
+                      args.duplicate_rate, args.days, end, args.chunk_rows,
+                      log=lambda line: print(line, file=sys.stderr))
+    elapsed = time.perf_counter() - started
+    total = sum(t['bytes'] for t in tables.values())
+    for name, table in tables.items():
+        print(f"{name:<20} {table['rows']:>13,} rows {table['bytes'] / 2 ** 20:>10,.1f} MiB  {table['path']}")
+    print(f'{total / 2 ** 20:,.1f} MiB in {elapsed:.1f}s ({total / 2 ** 20 / elapsed:,.1f} MiB/s)')
+
+
+if __name__ == '__main__':
+    main()
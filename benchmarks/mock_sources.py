@@ -0,0 +1,107 @@
+"""
+Mock NPI Registry and Google Maps servers
+A minimal keep-alive HTTP/1.1 server on localhost answering the requests
+graph.py makes, after a configurable random delay, so the orchestrator's
+fan-out can be benchmarked without touching the real APIs.
+
+    async with MockSources(latency_ms={'npi_registry': 450, 'google_maps': 320}) as mock:
+        mock.patch_graph(graph)
+        ...
+"""
+
+import asyncio
+import json
+import math
+import random
+import zlib
+from urllib.parse import parse_qs, urlparse
+
+# Mean response time per source, from REAL_VALIDATION_DATA
+DEFAULT_LATENCY_MS = {'npi_registry': 450, 'google_maps': 320}
+# Lognormal sigma: how heavy the tail is
+DEFAULT_JITTER = 0.5
+
+
+def npi_payload(npi):
+    return {'result_count': 1, 'results': [{
+        'number': npi,
+        'basic': {'first_name': 'JOHN', 'last_name': 'SMITH'},
+        'addresses': [{'address_purpose': 'LOCATION', 'city': 'BOSTON', 'state': 'MA', 'postal_code': '021080000',
+                       'telephone_number': '617-555-0100'}],
+        'taxonomies': [{'desc': 'Cardiology', 'primary': True, 'license': 'MA123'}],
+    }]}
+
+
+def place_payload(query):
+    return {'status': 'OK', 'candidates': [{'place_id': f'mock-{zlib.crc32(query.encode())}', 'name': query,
+                                            'formatted_address': '1 Main St, Boston, MA 02108'}]}
+
+
+class MockSources:
+    """
+    Serves /npi/ like the NPI Registry and /maps/... like Google Places and
+    Geocoding. Each response waits a lognormal delay with the source's mean
+    from `latency_ms` (0 for none).
+    """
+
+    def __init__(self, latency_ms=None, jitter=DEFAULT_JITTER, seed=0):
+        self.latency_ms = {**DEFAULT_LATENCY_MS, **(latency_ms or {})}
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.requests = dict.fromkeys(self.latency_ms, 0)
+        self.server = None
+        self.port = None
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._serve, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def patch_graph(self, graph):
+        """Point graph.py's source URLs at this server"""
+        graph.NPI_REGISTRY_URL = f'{self.base_url}/npi/'
+        graph.GOOGLE_PLACES_URL = f'{self.base_url}/maps/place'
+        graph.GOOGLE_GEOCODING_URL = f'{self.base_url}/maps/geocode/json'
+        graph.GOOGLE_MAPS_API_KEY = 'mock'
+
+    def _delay(self, source):
+        mean = self.latency_ms.get(source, 0) / 1000
+        if mean <= 0:
+            return 0.0
+        # Lognormal with the requested mean
+        return self.random.lognormvariate(0, self.jitter) * mean / math.exp(self.jitter ** 2 / 2)
+
+    def _respond(self, target):
+        url = urlparse(target)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path.startswith('/npi'):
+            return 'npi_registry', npi_payload(params.get('number', ''))
+        return 'google_maps', place_payload(params.get('input') or params.get('address', ''))
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                source, payload = self._respond(request_line.split()[1].decode())
+                self.requests[source] = self.requests.get(source, 0) + 1
+                await asyncio.sleep(self._delay(source))
+                body = json.dumps(payload).encode()
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             b'Content-Length: %d\r\n\r\n%s' % (len(body), body))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,354 @@
+"""
+LampStack benchmark harness
+Times the scoring, matching, trust-matrix, chart rendering and source
+fan-out hot paths on seeded synthetic data and writes the results to
+benchmarks/results/<timestamp>.json, comparing each case with the previous
+run so regressions show up.
+
+    python benchmarks/run.py                      # everything, full sizes
+    python benchmarks/run.py --quick scoring      # small sizes, one benchmark
+    python benchmarks/run.py --baseline results/before.json --fail-on-regression 0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+import synthetic
+from synthetic import REPO_DIR, VISUALIZATION_DIR
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+# (full, --quick) sizes per benchmark
+SIZES = {
+    'scoring': ((1_000, 100_000, 1_000_000), (1_000, 10_000)),
+    'matching': ((10_000, 100_000), (2_000,)),
+    'trust_matrix': ((5, 50, 500), (5, 50)),
+    'fanout': ((200, 1_000), (100,)),
+    'templates': ((50, 500), (20,)),
+}
+SCORING_CHUNK = 100_000
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register fn(args) -> iterable of result dicts under `name`"""
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return round(resource.getrusage(who).ru_maxrss * scale / 2 ** 20, 1)
+
+
+def measure(fn, repeat):
+    """(best, median) wall seconds of fn() over `repeat` runs"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def result(case, seconds, median=None, items=None, **extra):
+    row = {'case': case, 'seconds': round(seconds, 6), 'median_seconds': round(median or seconds, 6)}
+    if items:
+        row['items'] = items
+        row['items_per_second'] = round(items / seconds, 1) if seconds else None
+    return {**row, **extra}
+
+
+def sizes(args, name):
+    return args.sizes or SIZES[name][args.quick]
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+@benchmark('scoring')
+def bench_scoring(args):
+    """Per-provider ValidationOrchestrator.score, and confidence_scoring.score_batch over a match matrix"""
+    import confidence_scoring
+    import graph
+    orchestrator = graph.ValidationOrchestrator(sources={})
+    rng = synthetic.rng_for(args.seed)
+    for n in sizes(args, 'scoring'):
+        # Chunked so a million providers' source dicts never sit in memory at once
+        best = median = 0.0
+        for start in range(0, n, SCORING_CHUNK):
+            count = min(SCORING_CHUNK, n - start)
+            providers = [{'npiNumber': str(i)} for i in range(count)]
+            results = synthetic.source_results(count, rng)
+            chunk_best, chunk_median = measure(
+                lambda: [orchestrator.score(provider, sources) for provider, sources in zip(providers, results)],
+                args.repeat)
+            best += chunk_best
+            median += chunk_median
+        yield result(f'{n}_providers', best, median, items=n)
+
+        matches = synthetic.field_matches(n, rng)
+        best, median = measure(lambda: confidence_scoring.score_batch(matches), args.repeat)
+        yield result(f'score_batch_{n}', best, median, items=n)
+
+
+@benchmark('matching')
+def bench_matching(args):
+    """Roster-wide fuzzy name duplicate search and raw pair similarity throughput"""
+    import matching
+    rng = synthetic.rng_for(args.seed)
+    for n in sizes(args, 'matching'):
+        names = synthetic.full_names(n, rng)
+        pairs = []
+        best, median = measure(lambda: pairs.append(matching.find_duplicate_pairs(names)), args.repeat)
+        yield result(f'find_duplicate_pairs_{n}', best, median, items=n, pairs=len(pairs[-1]))
+
+    names = [matching.normalize_name(name) for name in synthetic.full_names(20_000, rng)]
+    pairs = list(zip(names[::2], names[1::2]))
+    best, median = measure(lambda: [matching.similarity(a, b) for a, b in pairs], args.repeat)
+    yield result('similarity_pairs', best, median, items=len(pairs))
+
+
+@benchmark('trust_matrix')
+def bench_trust_matrix(args):
+    """TrustMatrix build + weighted scores, and the heatmap chart render"""
+    import professional_analytics as pa
+    from analytics.trust_matrix import TrustMatrix
+    rng = synthetic.rng_for(args.seed)
+    for n in sizes(args, 'trust_matrix'):
+        data = synthetic.validation_data(10, rng, n_sources=n, n_fields=max(5, n // 5))
+
+        def build():
+            matrix = TrustMatrix.from_nested(data['field_confidence_by_source'], fields=list(data['field_weights']))
+            matrix.weighted_scores(data['field_weights'])
+
+        best, median = measure(build, args.repeat * 10)
+        yield result(f'build_{n}_sources', best, median, items=n)
+
+    data = synthetic.validation_data(10, rng)
+    with tempfile.TemporaryDirectory() as out, _output_dir(pa, out):
+        with contextlib.redirect_stdout(None):
+            best, median = measure(lambda: pa.create_trust_score_matrix_heatmap(data), args.repeat)
+    yield result('heatmap_render', best, median)
+
+
+@benchmark('templates')
+def bench_templates(args):
+    """Per-tenant variants of the source trust chart: a new figure each vs the pooled ChartTemplate"""
+    import professional_analytics as pa
+    rng = synthetic.rng_for(args.seed)
+    for n in sizes(args, 'templates'):
+        variants = synthetic.source_variants(n, rng)
+
+        def rebuild(out):
+            for name, overrides in variants.items():
+                with _output_dir(pa, os.path.join(out, name)):
+                    os.makedirs(pa.output_dir, exist_ok=True)
+                    pa.create_source_trust_scores_bar({**pa.REAL_VALIDATION_DATA, **overrides})
+
+        def templated(out):
+            # Each run pays for building the pooled figure once
+            pa.SOURCE_TRUST_TEMPLATE.clear()
+            pa.render_variants(variants, directory=out)
+
+        for case, render in (('rebuild', rebuild), ('template', templated)):
+            with tempfile.TemporaryDirectory() as out, contextlib.redirect_stdout(None):
+                best, median = measure(lambda: render(out), args.repeat)
+            yield result(f'{case}_{n}_variants', best, median, items=n)
+
+
+@contextlib.contextmanager
+def _output_dir(pa, path):
+    previous, pa.output_dir = pa.output_dir, path
+    try:
+        yield
+    finally:
+        pa.output_dir = previous
+
+
+ANALYTICS_CHILD = '''
+import contextlib, json, os, resource, sys, time
+sys.path.insert(0, {visualization!r})
+start = time.perf_counter()
+import professional_analytics as pa
+pa.output_dir = {output!r}
+with contextlib.redirect_stdout(None):
+    pa.main(workers={workers!r}, force=True)
+print(json.dumps({{'seconds': time.perf_counter() - start,
+                  'maxrss': max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)}}))
+'''
+
+
+@benchmark('analytics_main')
+def bench_analytics_main(args):
+    """professional_analytics.main() end to end in a fresh process: wall time and peak RSS (largest process)"""
+    for workers in (None, 0):
+        runs = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as out:
+                code = ANALYTICS_CHILD.format(visualization=VISUALIZATION_DIR, output=out, workers=workers)
+                completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                           cwd=VISUALIZATION_DIR, check=True)
+                runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        seconds = [r['seconds'] for r in runs]
+        scale = 1 if sys.platform == 'darwin' else 1024
+        yield result('serial' if workers is None else 'process_pool', min(seconds), statistics.median(seconds),
+                     peak_rss_mb=round(max(r['maxrss'] for r in runs) * scale / 2 ** 20, 1))
+
+
+@benchmark('fanout')
+def bench_fanout(args):
+    """ValidationOrchestrator fan-out against local mock NPI/Google servers"""
+    import httpx
+
+    import graph
+    from mock_sources import MockSources
+
+    async def run(n):
+        providers = synthetic.providers(n, synthetic.rng_for(args.seed), invalid_rate=0)
+        async with MockSources(latency_ms=args.latency_ms, seed=args.seed) as mock:
+            mock.patch_graph(graph)
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(limits=limits, timeout=None) as client, \
+                    graph.ValidationOrchestrator(client=client, max_concurrency=args.concurrency) as orchestrator:
+                start = time.perf_counter()
+                await orchestrator.validate_providers(providers)
+                elapsed = time.perf_counter() - start
+                latency = orchestrator.telemetry.snapshot()
+        validation = latency['validation']['provider']
+        return result(f'{n}_providers', elapsed, items=n, concurrency=args.concurrency,
+                      latency_ms=mock.latency_ms, requests=mock.requests,
+                      p50_ms=validation['p50_ms'], p95_ms=validation['p95_ms'], p99_ms=validation['p99_ms'],
+                      stages={name: s['p99_ms'] for name, s in latency['stage'].items()})
+
+    saved = {name: getattr(graph, name) for name in ('NPI_REGISTRY_URL', 'GOOGLE_PLACES_URL',
+                                                     'GOOGLE_GEOCODING_URL', 'GOOGLE_MAPS_API_KEY')}
+    try:
+        for n in sizes(args, 'fanout'):
+            yield asyncio.run(run(n))
+    finally:
+        for name, value in saved.items():
+            setattr(graph, name, value)
+
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=REPO_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_results(exclude=None):
+    paths = sorted(p for p in glob.glob(os.path.join(RESULTS_DIR, '*.json')) if p != exclude)
+    return paths[-1] if paths else None
+
+
+def compare(previous, current, threshold):
+    """Print each case's change against `previous`; returns the cases slower by more than `threshold`"""
+    before = {(r['benchmark'], r['case']): r for r in previous['results']}
+    regressions = []
+    for row in current['results']:
+        old = before.get((row['benchmark'], row['case']))
+        if not old or not old['seconds']:
+            continue
+        change = row['seconds'] / old['seconds'] - 1
+        marker = ''
+        if change > threshold:
+            marker = '  REGRESSION'
+            regressions.append(row)
+        print(f"  {row['benchmark']:>15} {row['case']:<32} {old['seconds']:>10.4f}s -> {row['seconds']:>10.4f}s "
+              f"({change:+.1%}){marker}")
+    return regressions
+
+
+def parse_latency(value):
+    """'npi_registry=450,google_maps=320' -> dict"""
+    pairs = (item.split('=', 1) for item in value.split(',') if item)
+    return {name.strip(): float(ms) for name, ms in pairs}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run the LampStack benchmarks')
+    parser.add_argument('benchmarks', nargs='*', help=f"which to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--quick', action='store_true', help='small sizes, for a smoke run')
+    parser.add_argument('--sizes', type=lambda v: [int(n) for n in v.split(',')],
+                        help='comma-separated sizes overriding every benchmark\'s defaults')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case; the best is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency-ms', type=parse_latency, default=None,
+                        help='mock source mean latencies for fanout, e.g. npi_registry=450,google_maps=320')
+    parser.add_argument('--concurrency', type=int, default=64, help='in-flight source calls for fanout')
+    parser.add_argument('--output', help='results file (default: results/<timestamp>.json)')
+    parser.add_argument('--baseline', help='results file to compare against (default: the previous run)')
+    parser.add_argument('--fail-on-regression', type=float, metavar='FRACTION', default=None,
+                        help='exit non-zero if any case is this much slower than the baseline (e.g. 0.2)')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.benchmarks or list(BENCHMARKS)
+    report = {
+        'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'args': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')},
+        'results': [],
+    }
+    for name in names:
+        print(f'{name}: {BENCHMARKS[name].__doc__}')
+        for row in BENCHMARKS[name](args):
+            row = {'benchmark': name, **row, 'process_peak_rss_mb': peak_rss_mb()}
+            report['results'].append(row)
+            rate = f" {row['items_per_second']:>14,.0f}/s" if row.get('items_per_second') else ''
+            print(f"  {row['case']:<32} {row['seconds']:>10.4f}s{rate}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    baseline = args.baseline or latest_results(exclude=output)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Results written to {output}')
+
+    if baseline:
+        with open(baseline) as f:
+            previous = json.load(f)
+        print(f"Compared with {baseline} ({previous.get('commit')}):")
+        regressions = compare(previous, report, args.fail_on_regression or 0.1)
+        if args.fail_on_regression is not None and regressions:
+            raise SystemExit(f'{len(regressions)} case(s) regressed by more than {args.fail_on_regression:.0%}')
+
+
+if __name__ == '__main__':
+    main()
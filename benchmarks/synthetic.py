@@ -0,0 +1,189 @@
+"""
+Synthetic benchmark data
+Seeded, vectorised generators shaped like REAL_VALIDATION_DATA and the
+validation service's inputs, so every benchmark run sees the same data at
+any size.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SERVICE_DIR = os.path.join(REPO_DIR, 'langgraph-service')
+VISUALIZATION_DIR = os.path.join(REPO_DIR, 'visualization')
+BACKEND_PYTHON_DIR = os.path.join(REPO_DIR, 'backend', 'src', 'python')
+for path in (SERVICE_DIR, VISUALIZATION_DIR, BACKEND_PYTHON_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from professional_analytics import REAL_VALIDATION_DATA  # noqa: E402
+
+FIRST_NAMES = np.array(['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David',
+                        'Elizabeth', 'William', 'Barbara', 'Ahmed', 'Priya', 'Wei', 'Carlos', 'Fatima', 'Olga',
+                        'Kwame', 'Hana', 'Raj', 'Elena', 'Sean', 'Aisha'])
+LAST_NAMES = np.array(['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Martinez',
+                       'Wilson', 'Anderson', 'Patel', 'Nguyen', 'Kim', 'Chen', 'Okafor', 'Ivanova', 'Singh',
+                       'Mueller', 'Rossi', 'Haddad', "O'Neil", 'Lopez', 'Cohen'])
+SPECIALTIES = np.array(['Cardiology', 'Internal Medicine', 'Pediatrics', 'Dermatology', 'Oncology',
+                        'Family Medicine', 'Neurology', 'Psychiatry', 'Orthopedic Surgery', 'Radiology'])
+CITIES = np.array([('Boston', 'MA', '02108'), ('Austin', 'TX', '73301'), ('Denver', 'CO', '80202'),
+                   ('Miami', 'FL', '33101'), ('Seattle', 'WA', '98101'), ('Chicago', 'IL', '60601'),
+                   ('Phoenix', 'AZ', '85001'), ('Atlanta', 'GA', '30301')])
+STREETS = np.array(['Main St', 'Oak Ave', 'Pine Rd', 'Maple Dr', 'Cedar Ln', 'Elm St', 'Washington Blvd',
+                    'Lake Shore Dr', 'Hill Rd', 'Park Ave'])
+# Placeholder NPIs that turn up in real rosters
+PLACEHOLDER_NPIS = np.array(['1234567890', '0000000000', '9999999999', '1111111111'])
+
+# Same cut-offs as data_loader._status_for
+HIGH_CONFIDENCE = 85.0
+MEDIUM_CONFIDENCE = 50.0
+# Sources the Python orchestrator scores, with their ValidationOrchestrator weights
+SCORED_SOURCES = {'npi_registry': 'NPI Registry', 'google_maps': 'Google Maps'}
+
+
+def rng_for(seed):
+    return np.random.default_rng(seed)
+
+
+def npi_check_digits(bodies):
+    """Luhn check digit (with the 80840 prefix) for an (n, 9) array of NPI digits"""
+    doubled = bodies[:, 0::2] * 2
+    doubled -= 9 * (doubled > 9)
+    total = 24 + doubled.sum(axis=1) + bodies[:, 1::2].sum(axis=1)
+    return (10 - total % 10) % 10
+
+
+def npi_numbers(n, rng, invalid_rate=0.02):
+    """n NPI strings; about `invalid_rate` of them fail the check digit or are placeholders"""
+    bodies = rng.integers(0, 10, size=(n, 9))
+    bodies[:, 0] = rng.integers(1, 3, size=n)
+    check = npi_check_digits(bodies)
+    invalid = rng.random(n) < invalid_rate
+    check[invalid] = (check[invalid] + rng.integers(1, 10, size=int(invalid.sum()))) % 10
+    digits = np.concatenate([bodies, check[:, None]], axis=1).astype(np.uint8) + ord('0')
+    npis = digits.view('S10').ravel().astype(str)
+    placeholder = invalid & (rng.random(n) < 0.25)
+    npis[placeholder] = rng.choice(PLACEHOLDER_NPIS, size=int(placeholder.sum()))
+    return npis
+
+
+def status_for(scores):
+    """Validation status per 0-100 score"""
+    return np.where(scores >= HIGH_CONFIDENCE, 'HIGH_CONFIDENCE',
+                    np.where(scores >= MEDIUM_CONFIDENCE, 'MEDIUM_CONFIDENCE', 'FLAGGED'))
+
+
+def provider_scores(n, rng):
+    """0-100 scores: most providers verify well, a long tail of flagged ones"""
+    good = rng.random(n) < 0.85
+    return np.clip(np.where(good, rng.normal(82, 8, n), rng.normal(35, 12, n)), 0, 100).round(1)
+
+
+def providers(n, rng, invalid_rate=0.02):
+    """Provider dicts as the validation service takes them"""
+    city = rng.integers(0, len(CITIES), n)
+    specialties = rng.integers(0, len(SPECIALTIES), (n, 2))
+    columns = {
+        'npiNumber': npi_numbers(n, rng, invalid_rate).tolist(),
+        'firstName': rng.choice(FIRST_NAMES, n).tolist(),
+        'lastName': rng.choice(LAST_NAMES, n).tolist(),
+        'practiceAddress': [f'{number} {street}' for number, street in
+                            zip(rng.integers(1, 9999, n).tolist(), rng.choice(STREETS, n).tolist())],
+        'city': CITIES[city, 0].tolist(),
+        'state': CITIES[city, 1].tolist(),
+        'zipCode': CITIES[city, 2].tolist(),
+    }
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    for row, (a, b) in zip(rows, SPECIALTIES[specialties].tolist()):
+        row['specialties'] = [a] if a == b else [a, b]
+    return rows
+
+
+def full_names(n, rng, duplicate_rate=0.05):
+    """'First Last' names with about `duplicate_rate` near-duplicates (one-letter typos) mixed in"""
+    names = np.char.add(np.char.add(rng.choice(FIRST_NAMES, n), ' '), rng.choice(LAST_NAMES, n)).tolist()
+    for i in np.flatnonzero(rng.random(n) < duplicate_rate).tolist():
+        source = names[int(rng.integers(0, n))]
+        pos = int(rng.integers(0, len(source)))
+        names[i] = source[:pos] + chr(int(rng.integers(97, 123))) + source[pos + 1:]
+    return names
+
+
+def source_results(n, rng):
+    """
+    Per-provider orchestrator source results (for ValidationOrchestrator.score)
+    with each source's success rate from REAL_VALIDATION_DATA, plus the odd
+    timeout.
+    """
+    rates = {name: REAL_VALIDATION_DATA['sources'][label]['success_rate'] for name, label in SCORED_SOURCES.items()}
+    columns = []
+    for name, rate in rates.items():
+        draw = rng.random(n)
+        status = np.where(draw < rate, 'success', np.where(draw < 0.97, 'failed', 'timeout'))
+        confidence = np.where(status == 'success', rng.uniform(0.7, 1.0, n), rng.uniform(0.0, 0.5, n))
+        columns.append([{'source': name, 'status': s, 'confidence': c, 'data': None, 'discrepancies': []}
+                        for s, c in zip(status.tolist(), confidence.round(3).tolist())])
+    return [list(results) for results in zip(*columns)]
+
+
+def field_matches(n, rng):
+    """
+    Providers x fields boolean match matrix (confidence_scoring field order)
+    at each field's average match rate across the sources; the flagged tail
+    matches about half as often.
+    """
+    fields = ('Name', 'Specialty', 'License', 'Address', 'Phone')
+    by_source = REAL_VALIDATION_DATA['field_confidence_by_source'].values()
+    rates = np.array([np.mean([row[field] for row in by_source]) for field in fields])
+    good = rng.random(n) < 0.85
+    return rng.random((n, len(fields))) < np.where(good[:, None], rates, rates / 2)
+
+
+def source_variants(n, rng):
+    """n per-tenant {'sources': ...} overrides: REAL_VALIDATION_DATA's sources with jittered trust scores"""
+    sources = REAL_VALIDATION_DATA['sources']
+    jitter = rng.uniform(-0.15, 0.15, (n, len(sources)))
+    return {f'tenant_{i:04d}': {'sources': {name: {**values, 'trust_score': float(np.clip(values['trust_score'] + d, 0, 1))}
+                                            for (name, values), d in zip(sources.items(), row)}}
+            for i, row in enumerate(jitter.tolist())}
+
+
+def validation_data(n_results=10, rng=None, n_sources=None, n_fields=None):
+    """
+    A REAL_VALIDATION_DATA-shaped dict with `n_results` validation results
+    and, optionally, more sources and fields than the real five by five.
+    """
+    rng = rng if rng is not None else rng_for(0)
+    sources = dict(REAL_VALIDATION_DATA['sources'])
+    fields = dict(REAL_VALIDATION_DATA['field_weights'])
+    for i in range(len(sources), n_sources or len(sources)):
+        sources[f'Source {i + 1}'] = {'trust_score': round(float(rng.uniform(0.5, 1.0)), 2),
+                                      'success_rate': round(float(rng.uniform(0.4, 0.95)), 2),
+                                      'avg_response_ms': int(rng.integers(200, 1200))}
+    for i in range(len(fields), n_fields or len(fields)):
+        fields[f'Field {i + 1}'] = 0.05
+    total = sum(fields.values())
+    fields = {f: w / total for f, w in fields.items()}
+    confidence = {
+        source: {f: round(float(v), 2) for f, v in zip(fields, rng.uniform(0.3, 1.0, len(fields)))}
+        for source in sources
+    }
+    for source, row in REAL_VALIDATION_DATA['field_confidence_by_source'].items():
+        confidence[source].update(row)
+
+    scores = provider_scores(n_results, rng)
+    names = full_names(n_results, rng, duplicate_rate=0)
+    npis = npi_numbers(n_results, rng)
+    successes = np.clip(np.round(scores / 100 * len(sources) + rng.normal(0, 0.5, n_results)), 0,
+                        len(sources)).astype(int)
+    results = [{'npi': npi, 'name': name, 'score': score, 'status': status, 'sources_success': ok}
+               for npi, name, score, status, ok in zip(npis.tolist(), names, scores.tolist(),
+                                                       status_for(scores).tolist(), successes.tolist())]
+    return {
+        'sources': sources,
+        'field_weights': fields,
+        'field_confidence_by_source': confidence,
+        'validation_results': results,
+    }
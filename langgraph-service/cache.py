@@ -0,0 +1,203 @@
+"""
+Lookup cache for external validation sources
+An in-memory LRU tier in front of a SQLite tier, with a TTL per source and a
+shorter TTL for negative answers (e.g. an NPI the registry doesn't know), so
+re-validation runs don't spend API quota on lookups we made recently.
+SQLite writes are batched so the event loop doesn't block on a commit per
+lookup.
+"""
+
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+# NPPES refreshes the registry weekly; place data goes stale faster
+DEFAULT_TTLS = {
+    'npi_registry': 7 * 24 * 3600,
+    'google_maps': 24 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+NEGATIVE_TTL = 6 * 3600
+MAX_MEMORY_ENTRIES = 10000
+# One SQLite transaction per this many new entries, or this many seconds
+WRITE_BATCH = 500
+WRITE_INTERVAL = 1.0
+
+_MISSING = object()
+
+
+class LookupCache:
+    """
+    Two-tier TTL cache keyed by (source, key).
+
+    Values must be JSON-serialisable. A value of None is stored as a negative
+    entry and expires after `negative_ttl` instead of the source's TTL. With
+    path=None only the memory tier is used. New entries reach the SQLite
+    tier in batches of `write_batch`, or on the first set() or get() once the
+    oldest has waited `write_interval` seconds; flush() or close() writes the
+    rest.
+    """
+
+    def __init__(self, path=None, ttls=None, default_ttl=DEFAULT_TTL, negative_ttl=NEGATIVE_TTL,
+                 max_memory_entries=MAX_MEMORY_ENTRIES, clock=time.time, write_batch=WRITE_BATCH,
+                 write_interval=WRITE_INTERVAL):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.max_memory_entries = max_memory_entries
+        self.clock = clock
+        self.write_batch = write_batch
+        self.write_interval = write_interval
+        self._memory = OrderedDict()
+        # (source, key) -> (JSON value, expires_at) not yet written to SQLite
+        self._pending = {}
+        self._pending_since = 0.0
+        self.counters = dict.fromkeys(('hits', 'misses', 'negative_hits', 'memory_hits', 'disk_hits',
+                                       'evictions', 'expired', 'writes'), 0)
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS lookup_cache (
+                    source TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (source, key)
+                )
+            ''')
+            self._db.commit()
+
+    def ttl_for(self, source, negative=False):
+        return self.negative_ttl if negative else self.ttls.get(source, self.default_ttl)
+
+    def _remember(self, entry_key, expires_at, value):
+        self._memory[entry_key] = (expires_at, value)
+        self._memory.move_to_end(entry_key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def _lookup(self, source, key):
+        """Cached value (None for negative entries) or _MISSING"""
+        entry_key = (source, key)
+        now = self.clock()
+
+        entry = self._memory.get(entry_key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._memory.move_to_end(entry_key)
+                self.counters['memory_hits'] += 1
+                return value
+            del self._memory[entry_key]
+            self.counters['expired'] += 1
+
+        if self._db is not None:
+            row = self._pending.get(entry_key)
+            if row is None:
+                row = self._db.execute('SELECT value, expires_at FROM lookup_cache WHERE source = ? AND key = ?',
+                                       entry_key).fetchone()
+            if row is not None:
+                if row[1] > now:
+                    value = None if row[0] is None else json.loads(row[0])
+                    self._remember(entry_key, row[1], value)
+                    self.counters['disk_hits'] += 1
+                    return value
+                self.counters['expired'] += 1
+        return _MISSING
+
+    def get(self, source, key):
+        """(hit, value) - value is None on a miss or a negative hit"""
+        self._flush_due()
+        value = self._lookup(source, str(key))
+        if value is _MISSING:
+            self.counters['misses'] += 1
+            return False, None
+        self.counters['hits'] += 1
+        if value is None:
+            self.counters['negative_hits'] += 1
+        return True, value
+
+    def set(self, source, key, value):
+        key = str(key)
+        expires_at = self.clock() + self.ttl_for(source, negative=value is None)
+        self._remember((source, key), expires_at, value)
+        if self._db is not None:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending[(source, key)] = (None if value is None else json.dumps(value), expires_at)
+            if len(self._pending) >= self.write_batch:
+                self.flush()
+            else:
+                self._flush_due()
+        self.counters['writes'] += 1
+
+    def _flush_due(self):
+        if self._pending and time.monotonic() - self._pending_since >= self.write_interval:
+            self.flush()
+
+    def flush(self):
+        """Write pending entries to the SQLite tier in one transaction"""
+        if self._db is not None and self._pending:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO lookup_cache (source, key, value, expires_at) VALUES (?, ?, ?, ?)',
+                [(source, key, value, expires_at) for (source, key), (value, expires_at) in self._pending.items()])
+            self._db.commit()
+        self._pending.clear()
+
+    async def get_or_fetch(self, source, key, fetch):
+        """
+        Return the cached value, or await fetch() and cache what it returns.
+        Exceptions are not cached, so timeouts and API errors retry next time.
+        """
+        hit, value = self.get(source, key)
+        if hit:
+            return value
+        value = await fetch()
+        self.set(source, key, value)
+        return value
+
+    def invalidate(self, source, key):
+        key = str(key)
+        self._memory.pop((source, key), None)
+        self._pending.pop((source, key), None)
+        if self._db is not None:
+            self._db.execute('DELETE FROM lookup_cache WHERE source = ? AND key = ?', (source, key))
+            self._db.commit()
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers, returning how many disk rows went"""
+        now = self.clock()
+        for entry_key in [k for k, (expires_at, _) in self._memory.items() if expires_at <= now]:
+            del self._memory[entry_key]
+        if self._db is None:
+            return 0
+        self.flush()
+        removed = self._db.execute('DELETE FROM lookup_cache WHERE expires_at <= ?', (now,)).rowcount
+        self._db.commit()
+        return removed
+
+    def stats(self):
+        lookups = self.counters['hits'] + self.counters['misses']
+        return {
+            **self.counters,
+            'hit_rate': self.counters['hits'] / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory),
+        }
+
+    def close(self):
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+async def cached(cache, source, key, fetch):
+    """cache.get_or_fetch, or a plain fetch() when caching is off"""
+    if cache is None:
+        return await fetch()
+    return await cache.get_or_fetch(source, key, fetch)
@@ -0,0 +1,26 @@
+"""
+Database connections for the validation service
+The Prisma tables live in PostgreSQL in production; a SQLite file with the
+same tables works for local runs.
+"""
+
+import os
+import sqlite3
+import sys
+
+# connect() is shared with the analytics charts rather than kept in two places
+VISUALIZATION_DIR = os.environ.get('ANALYTICS_VISUALIZATION_DIR') or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'visualization'))
+if VISUALIZATION_DIR not in sys.path:
+    sys.path.insert(0, VISUALIZATION_DIR)
+
+from analytics.data_loader import connect  # noqa: E402,F401
+
+
+def is_sqlite(conn):
+    return isinstance(conn, sqlite3.Connection)
+
+
+def placeholders(conn, count):
+    """`count` comma-separated parameter markers in the driver's style"""
+    return ', '.join(['?' if is_sqlite(conn) else '%s'] * count)
@@ -0,0 +1,446 @@
+"""
+Vector duplicate detection
+Embeds each provider's normalized name, address and specialties as hashed
+character n-grams and finds near neighbours through an IVF (inverted file)
+index, so a roster-wide duplicate pass compares each provider with a few
+hundred candidates rather than with every other provider.
+
+LocalVectorClient mirrors the parts of pymilvus.MilvusClient the detector
+uses (create_collection, insert, search, ...), so a real Milvus can take
+its place:
+
+    detector = DuplicateDetector(connect_vector_store())   # Milvus if MILVUS_HOST is set
+    clusters = detector.find_clusters(providers)
+"""
+
+import math
+import os
+import re
+import zlib
+
+import numpy as np
+
+from matching import cluster_duplicates
+
+# Embedding blocks: field -> (dimensions, weight). Each block is unit length
+# times sqrt(weight), so the inner product of two embeddings is the weighted
+# sum of the per-field cosine similarities.
+EMBEDDING_FIELDS = {
+    'name': (128, 0.5),
+    'address': (96, 0.35),
+    'specialty': (32, 0.15),
+}
+DIMENSION = sum(dims for dims, _ in EMBEDDING_FIELDS.values())
+NGRAM = 3
+
+DUPLICATE_THRESHOLD = 0.85
+NEIGHBOURS = 10
+DEFAULT_NPROBE = 8
+# Vectors below this are searched exhaustively; the IVF lists are trained
+# once a collection holds this many, and retrained when it has grown 4x
+TRAIN_MIN = 2048
+KMEANS_ITERATIONS = 10
+# Training vectors per centroid
+KMEANS_SAMPLE = 32
+SEARCH_BLOCK = 2048
+# Queries routed through the inverted lists together; larger blocks mean
+# fewer, bigger scans of each list
+PROBE_BLOCK = 32768
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_ADDRESS_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'road': 'rd', 'boulevard': 'blvd', 'drive': 'dr', 'lane': 'ln',
+    'suite': 'ste', 'building': 'bldg', 'floor': 'fl', 'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+}
+
+
+def normalize_text(value, abbreviations=None):
+    """Lowercase alphanumeric tokens separated by single spaces"""
+    if isinstance(value, (list, tuple)):
+        value = ' '.join(value)
+    tokens = _NON_ALNUM.sub(' ', (value or '').lower()).split()
+    if abbreviations:
+        tokens = [abbreviations.get(t, t) for t in tokens]
+    return ' '.join(tokens)
+
+
+def provider_fields(provider):
+    """{embedding field: normalized text} for a Provider dict"""
+    name = provider.get('name') or ' '.join(filter(None, (provider.get('firstName'), provider.get('lastName'))))
+    address = ' '.join(filter(None, (provider.get(k) for k in ('practiceAddress', 'city', 'state', 'zipCode'))))
+    return {
+        'name': normalize_text(name),
+        'address': normalize_text(address, _ADDRESS_ABBREVIATIONS),
+        'specialty': normalize_text(provider.get('specialties') or provider.get('specialty')),
+    }
+
+
+class NgramEmbedder:
+    """
+    Signed feature hashing of character n-grams. Hashes are CRC32, so the
+    same text embeds the same way in every process (vectors stored in Milvus
+    stay comparable across runs).
+    """
+
+    def __init__(self, fields=EMBEDDING_FIELDS, n=NGRAM):
+        self.fields = fields
+        self.n = n
+        self.dimension = sum(dims for dims, _ in fields.values())
+        self._slots = {}
+
+    def _slot(self, gram, offset, dims):
+        key = (gram, offset)
+        slot = self._slots.get(key)
+        if slot is None:
+            h = zlib.crc32(gram.encode())
+            slot = self._slots[key] = (offset + h % dims, 1.0 if h & 0x80000000 else -1.0)
+        return slot
+
+    def embed_texts(self, records):
+        """(len(records), dimension) float32 embeddings of {field: normalized text} dicts"""
+        rows, cols, values = [], [], []
+        offsets, offset = {}, 0
+        for field, (dims, _) in self.fields.items():
+            offsets[field] = offset
+            offset += dims
+        for i, record in enumerate(records):
+            for field, (dims, _) in self.fields.items():
+                text = record.get(field)
+                if not text:
+                    continue
+                padded = f' {text} '
+                for j in range(len(padded) - self.n + 1):
+                    col, sign = self._slot(padded[j:j + self.n], offsets[field], dims)
+                    rows.append(i)
+                    cols.append(col)
+                    values.append(sign)
+        vectors = np.zeros((len(records), self.dimension), dtype=np.float32)
+        np.add.at(vectors, (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)),
+                  np.array(values, dtype=np.float32))
+        for field, (dims, weight) in self.fields.items():
+            block = vectors[:, offsets[field]:offsets[field] + dims]
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            np.divide(block, norms, out=block, where=norms > 0)
+            block *= math.sqrt(weight)
+        return vectors
+
+    def embed(self, providers):
+        return self.embed_texts([provider_fields(p) for p in providers])
+
+
+# ============================================================================
+# IVF INDEX
+# ============================================================================
+
+def _top_k(scores, k):
+    """Column indices of the k largest scores in each row, best first"""
+    if k < scores.shape[1]:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape).copy()
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1)
+
+
+def spherical_kmeans(vectors, k, iterations=KMEANS_ITERATIONS, seed=0):
+    """k unit-length centroids maximizing inner product with `vectors`"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.concatenate([np.argmax(vectors[i:i + SEARCH_BLOCK] @ centroids.T, axis=1)
+                                 for i in range(0, len(vectors), SEARCH_BLOCK)])
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = np.bincount(assign, minlength=k) == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms > 0, norms, 1.0)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """
+    Inner-product index over float32 vectors with incremental inserts.
+
+    Vectors are bucketed by their nearest of `nlist` k-means centroids
+    (~2 * sqrt(n) by default); a search scans only the `nprobe` buckets
+    closest to each query. Until TRAIN_MIN vectors have been added every
+    search is exhaustive.
+    """
+
+    def __init__(self, dimension, nlist=None, nprobe=DEFAULT_NPROBE, train_min=TRAIN_MIN):
+        self.dimension = dimension
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self.count = 0
+        self._vectors = np.empty((1024, dimension), dtype=np.float32)
+        self._assign = np.empty(1024, dtype=np.int64)
+        self.centroids = None
+        self._trained_at = 0
+        self._lists = None
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def vectors(self):
+        return self._vectors[:self.count]
+
+    def _grow(self, needed):
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        self._vectors = np.resize(self._vectors, (capacity, self.dimension))
+        self._assign = np.resize(self._assign, capacity)
+
+    def _nearest_list(self, vectors):
+        return np.concatenate([np.argmax(vectors[i:i + SEARCH_BLOCK] @ self.centroids.T, axis=1)
+                               for i in range(0, len(vectors), SEARCH_BLOCK)]) if len(vectors) else \
+            np.empty(0, dtype=np.int64)
+
+    def train(self):
+        """(Re)build the centroids from a sample of the stored vectors and reassign every vector"""
+        nlist = self.nlist or max(1, int(2 * math.sqrt(self.count)))
+        nlist = min(nlist, self.count)
+        sample = self.vectors
+        if len(sample) > KMEANS_SAMPLE * nlist:
+            sample = sample[np.random.default_rng(0).choice(len(sample), KMEANS_SAMPLE * nlist, replace=False)]
+        self.centroids = spherical_kmeans(sample, nlist)
+        self._assign[:self.count] = self._nearest_list(self.vectors)
+        self._trained_at = self.count
+        self._lists = None
+
+    def add(self, vectors):
+        """Append vectors; returns their ids (positions in insertion order)"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        start = self.count
+        self._grow(start + len(vectors))
+        self._vectors[start:start + len(vectors)] = vectors
+        self.count += len(vectors)
+        if self.centroids is not None:
+            self._assign[start:self.count] = self._nearest_list(vectors)
+        if self.count >= self.train_min and self.count >= 4 * max(self._trained_at, self.train_min // 4):
+            self.train()
+        self._lists = None
+        return np.arange(start, self.count)
+
+    def _inverted_lists(self):
+        """(ids ordered by list, start offset of each list)"""
+        if self._lists is None:
+            assign = self._assign[:self.count]
+            order = np.argsort(assign, kind='stable')
+            offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=len(self.centroids)))))
+            self._lists = order, offsets
+        return self._lists
+
+    def search(self, queries, limit=NEIGHBOURS, nprobe=None):
+        """(scores, ids), each (len(queries), limit), best first; missing neighbours are (-inf, -1)"""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dimension)
+        scores = np.full((len(queries), limit), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), limit), -1, dtype=np.int64)
+        k = min(limit, self.count)
+        if not k:
+            return scores, ids
+        step = SEARCH_BLOCK if self.centroids is None else PROBE_BLOCK
+        for start in range(0, len(queries), step):
+            block = slice(start, start + step)
+            if self.centroids is None:
+                sims = queries[block] @ self.vectors.T
+                top = _top_k(sims, k)
+                scores[block, :k] = np.take_along_axis(sims, top, axis=1)
+                ids[block, :k] = top
+            else:
+                block_scores, block_ids = self._search_lists(queries[block], k, nprobe or self.nprobe)
+                scores[block, :k] = block_scores
+                ids[block, :k] = block_ids
+        return scores, ids
+
+    def _search_lists(self, queries, k, nprobe):
+        order, offsets = self._inverted_lists()
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.concatenate([_top_k(queries[i:i + SEARCH_BLOCK] @ self.centroids.T, nprobe)
+                                for i in range(0, len(queries), SEARCH_BLOCK)])
+        # Candidate slots: k per probed list per query
+        candidate_scores = np.full((len(queries), nprobe * k), -np.inf, dtype=np.float32)
+        candidate_ids = np.full((len(queries), nprobe * k), -1, dtype=np.int64)
+
+        # Group (query, probe slot) pairs by list so each list is scanned once
+        flat = probe.ravel()
+        by_list = np.argsort(flat, kind='stable')
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(flat, minlength=len(self.centroids)))))
+        for c in np.flatnonzero(np.diff(bounds)):
+            members = order[offsets[c]:offsets[c + 1]]
+            if not len(members):
+                continue
+            pairs = by_list[bounds[c]:bounds[c + 1]]
+            rows, slots = pairs // nprobe, pairs % nprobe
+            sims = queries[rows] @ self._vectors[members].T
+            kk = min(k, len(members))
+            top = _top_k(sims, kk)
+            columns = slots[:, None] * k + np.arange(kk)
+            candidate_scores[rows[:, None], columns] = np.take_along_axis(sims, top, axis=1)
+            candidate_ids[rows[:, None], columns] = members[top]
+
+        best = _top_k(candidate_scores, k)
+        return np.take_along_axis(candidate_scores, best, axis=1), np.take_along_axis(candidate_ids, best, axis=1)
+
+
+# ============================================================================
+# MILVUS-COMPATIBLE CLIENT
+# ============================================================================
+
+class LocalVectorClient:
+    """
+    In-process stand-in for pymilvus.MilvusClient backed by IVFIndex.
+
+    Supports the calls DuplicateDetector makes, with MilvusClient's argument
+    names and result shapes: search returns one list of
+    {'id', 'distance', 'entity'} hits per query. Metrics are IP and COSINE.
+    """
+
+    def __init__(self, nprobe=DEFAULT_NPROBE):
+        self.nprobe = nprobe
+        self._collections = {}
+
+    def create_collection(self, collection_name, dimension, primary_field_name='id', vector_field_name='vector',
+                          metric_type='COSINE', **kwargs):
+        if metric_type not in ('IP', 'COSINE'):
+            raise ValueError(f'Unsupported metric_type {metric_type!r}; use IP or COSINE')
+        self._collections[collection_name] = {
+            'index': IVFIndex(dimension, nprobe=self.nprobe),
+            'primary': primary_field_name,
+            'vector': vector_field_name,
+            'metric': metric_type,
+            'keys': [],
+            'entities': [],
+        }
+
+    def has_collection(self, collection_name, **kwargs):
+        return collection_name in self._collections
+
+    def drop_collection(self, collection_name, **kwargs):
+        self._collections.pop(collection_name, None)
+
+    def get_collection_stats(self, collection_name, **kwargs):
+        return {'row_count': len(self._collections[collection_name]['index'])}
+
+    def _prepare(self, collection, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, collection['index'].dimension)
+        if collection['metric'] == 'COSINE':
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms > 0, norms, 1.0)
+        return vectors
+
+    def insert(self, collection_name, data, **kwargs):
+        collection = self._collections[collection_name]
+        primary, vector = collection['primary'], collection['vector']
+        collection['index'].add(self._prepare(collection, np.array([row[vector] for row in data], dtype=np.float32)))
+        keys = [row[primary] for row in data]
+        collection['keys'].extend(keys)
+        collection['entities'].extend({k: v for k, v in row.items() if k not in (primary, vector)} for row in data)
+        return {'insert_count': len(data), 'ids': keys}
+
+    def search(self, collection_name, data, limit=10, output_fields=None, search_params=None, **kwargs):
+        collection = self._collections[collection_name]
+        nprobe = ((search_params or {}).get('params') or {}).get('nprobe')
+        scores, ids = collection['index'].search(self._prepare(collection, data), limit, nprobe)
+        keys, entities = collection['keys'], collection['entities']
+        results = []
+        for row_scores, row_ids in zip(scores.tolist(), ids.tolist()):
+            hits = []
+            for score, i in zip(row_scores, row_ids):
+                if i < 0:
+                    break
+                entity = {f: entities[i].get(f) for f in output_fields or ()}
+                hits.append({'id': keys[i], 'distance': score, 'entity': entity})
+            results.append(hits)
+        return results
+
+    def close(self):
+        self._collections.clear()
+
+
+def connect_vector_store(uri=None):
+    """
+    pymilvus.MilvusClient for `uri` (or MILVUS_HOST/MILVUS_PORT) when one is
+    configured, otherwise a LocalVectorClient.
+    """
+    if uri is None and os.environ.get('MILVUS_HOST'):
+        uri = f"http://{os.environ['MILVUS_HOST']}:{os.environ.get('MILVUS_PORT', '19530')}"
+    if not uri:
+        return LocalVectorClient()
+    try:
+        from pymilvus import MilvusClient
+    except ImportError:
+        raise ImportError('Milvus support requires pymilvus: pip install pymilvus')
+    return MilvusClient(uri=uri)
+
+
+# ============================================================================
+# DUPLICATE DETECTION
+# ============================================================================
+
+class DuplicateDetector:
+    """
+    Candidate duplicate providers by embedding similarity.
+
+    Providers are embedded with NgramEmbedder and kept in `collection` of
+    `client` (a LocalVectorClient by default, or a pymilvus.MilvusClient);
+    two providers are candidates when their inner product is at least
+    `threshold`, i.e. their weighted name/address/specialty similarity.
+    """
+
+    def __init__(self, client=None, collection='provider_embeddings', threshold=DUPLICATE_THRESHOLD,
+                 neighbours=NEIGHBOURS, nprobe=DEFAULT_NPROBE, embedder=None):
+        self.client = client or LocalVectorClient(nprobe)
+        self.collection = collection
+        self.threshold = threshold
+        self.neighbours = neighbours
+        self.nprobe = nprobe
+        self.embedder = embedder or NgramEmbedder()
+        if not self.client.has_collection(collection):
+            self.client.create_collection(collection, dimension=self.embedder.dimension, metric_type='IP',
+                                          auto_id=False)
+        # Continue after the rows an existing collection already holds
+        self._next_id = self.client.get_collection_stats(collection)['row_count']
+
+    def add(self, providers, vectors=None):
+        """Index providers; returns the ids they were stored under"""
+        vectors = self.embedder.embed(providers) if vectors is None else vectors
+        ids = list(range(self._next_id, self._next_id + len(providers)))
+        self._next_id += len(providers)
+        self.client.insert(self.collection, [
+            {'id': i, 'vector': v, 'npiNumber': p.get('npiNumber') or ''}
+            for i, v, p in zip(ids, vectors, providers)
+        ])
+        return ids
+
+    def neighbours_of(self, vectors):
+        """MilvusClient-style hits for each vector, above the threshold"""
+        hits = self.client.search(self.collection, list(vectors), limit=self.neighbours,
+                                  output_fields=['npiNumber'], search_params={'params': {'nprobe': self.nprobe}})
+        return [[hit for hit in row if hit['distance'] >= self.threshold] for row in hits]
+
+    def find_pairs(self, providers):
+        """
+        (i, j, similarity) for candidate duplicate pairs within `providers`
+        (indices into it), adding them to the index as a side effect.
+        """
+        vectors = self.embedder.embed(providers)
+        ids = self.add(providers, vectors)
+        position = {id_: i for i, id_ in enumerate(ids)}
+        pairs = {}
+        for i, row in enumerate(self.neighbours_of(vectors)):
+            for hit in row:
+                j = position.get(hit['id'])
+                if j is None or j == i:
+                    continue
+                key = (min(i, j), max(i, j))
+                pairs[key] = max(pairs.get(key, 0.0), hit['distance'])
+        return [(i, j, score) for (i, j), score in sorted(pairs.items())]
+
+    def find_clusters(self, providers):
+        """Candidate duplicate clusters (lists of indices into `providers`, size >= 2)"""
+        return cluster_duplicates(len(providers), self.find_pairs(providers))
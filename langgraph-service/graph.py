@@ -0,0 +1,386 @@
+"""
+Multi-source validation orchestrator
+Fans each provider out to every data source at once with asyncio, so a
+validation takes as long as the slowest source rather than the sum of all
+of them. Sources that fail or time out are left out of the score instead of
+failing the whole validation.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from cache import cached
+from ingestion import valid_npis
+from singleflight import CoalescedLookups, SingleFlight
+from telemetry import SOURCE_STAGES, Telemetry
+
+NPI_REGISTRY_URL = os.environ.get('NPI_REGISTRY_API_URL', 'https://npiregistry.cms.hhs.gov/api/')
+GOOGLE_GEOCODING_URL = os.environ.get('GOOGLE_GEOCODING_API_URL', 'https://maps.googleapis.com/maps/api/geocode/json')
+GOOGLE_PLACES_URL = os.environ.get('GOOGLE_PLACES_API_URL', 'https://maps.googleapis.com/maps/api/place')
+GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY') or os.environ.get('GOOGLE_PLACES_API_KEY', '')
+
+# Field weights from confidenceScoring.service.ts
+FIELD_WEIGHTS = {
+    'name': 0.35,
+    'specialty': 0.25,
+    'license': 0.20,
+    'address': 0.15,
+    'phone': 0.05,
+}
+
+# Source weights from MultiSourceValidationService.calculateOverallConfidence
+SOURCE_WEIGHTS = {
+    'npi_registry': 0.70,
+    'google_maps': 0.30,
+}
+DEFAULT_SOURCE_WEIGHT = 0.1
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_CONCURRENCY = 32
+
+# Statuses that carry evidence about the provider and count towards the score
+SCORED_STATUSES = ('success', 'failed')
+
+
+def validation_status(confidence):
+    """Same buckets as ConfidenceScoringService.getValidationStatus"""
+    if confidence >= 0.85:
+        return 'high'
+    if confidence >= 0.70:
+        return 'medium'
+    if confidence >= 0.50:
+        return 'low'
+    return 'critical'
+
+
+def _digits(value):
+    return ''.join(ch for ch in (value or '') if ch.isdigit())
+
+
+def _lower(value):
+    return (value or '').lower()
+
+
+def source_result(status, confidence=0.0, data=None, discrepancies=None):
+    return {'status': status, 'confidence': confidence, 'data': data, 'discrepancies': discrepancies or []}
+
+
+# ============================================================================
+# SOURCES - each takes (client, provider, cache) and returns a source_result dict
+# ============================================================================
+
+def compare_npi_record(provider, record):
+    """Port of NPIRegistryService.analyzeDiscrepancies, returning matched fields"""
+    basic = record.get('basic', {})
+    addresses = record.get('addresses', [])
+    taxonomies = record.get('taxonomies', [])
+    matched = dict.fromkeys(FIELD_WEIGHTS, False)
+    discrepancies = []
+
+    if (_lower(basic.get('first_name')) == _lower(provider.get('firstName'))
+            and _lower(basic.get('last_name')) == _lower(provider.get('lastName'))):
+        matched['name'] = True
+    else:
+        discrepancies.append(f"Name mismatch: Provider has \"{provider.get('firstName')} {provider.get('lastName')}\", "
+                             f"NPI Registry has \"{basic.get('first_name')} {basic.get('last_name')}\"")
+
+    location = next((a for a in addresses if a.get('address_purpose') == 'LOCATION'), addresses[0] if addresses else None)
+    if location:
+        if (_lower(location.get('city')) == _lower(provider.get('city'))
+                and _lower(location.get('state')) == _lower(provider.get('state'))
+                and (location.get('postal_code') or '')[:5] == (provider.get('zipCode') or '')[:5]):
+            matched['address'] = True
+        else:
+            discrepancies.append(f"Address mismatch: Provider has \"{provider.get('city')}, {provider.get('state')} "
+                                 f"{provider.get('zipCode')}\", NPI Registry has \"{location.get('city')}, "
+                                 f"{location.get('state')} {location.get('postal_code')}\"")
+        provider_phone = _digits(provider.get('primaryPhone'))
+        if _digits(location.get('telephone_number')) == provider_phone:
+            matched['phone'] = True
+        elif provider_phone:
+            discrepancies.append(f"Phone mismatch: Provider has \"{provider.get('primaryPhone')}\", "
+                                 f"NPI Registry has \"{location.get('telephone_number')}\"")
+
+    specialties = [s.lower() for s in provider.get('specialties') or []]
+    if taxonomies and specialties:
+        npi_specialties = [_lower(t.get('desc')) for t in taxonomies]
+        if any(ns in ps or ps in ns for ps in specialties for ns in npi_specialties):
+            matched['specialty'] = True
+        else:
+            discrepancies.append(f"Specialty mismatch: Provider has \"{', '.join(provider['specialties'])}\", "
+                                 f"NPI Registry has \"{taxonomies[0].get('desc')}\"")
+
+    primary = next((t for t in taxonomies if t.get('primary')), None)
+    if primary and primary.get('license'):
+        matched['license'] = True
+
+    return matched, discrepancies
+
+
+async def lookup_npi(client, npi):
+    """Raw NPI Registry record, or None if the registry doesn't know the number"""
+    response = await client.get(NPI_REGISTRY_URL, params={'number': npi, 'version': '2.1'})
+    response.raise_for_status()
+    payload = response.json()
+    results = payload.get('results') or []
+    if not payload.get('result_count') or not results:
+        return None
+    return results[0]
+
+
+async def fetch_npi_registry(client, provider, cache=None):
+    npi = provider['npiNumber']
+    record = await cached(cache, 'npi_registry', npi, lambda: lookup_npi(client, npi))
+    if record is None:
+        return source_result('failed', discrepancies=['NPI number not found in registry'])
+
+    matched, discrepancies = compare_npi_record(provider, record)
+    is_valid = sum(matched.values()) / len(matched) > 0.5
+    confidence = sum(FIELD_WEIGHTS[f] for f, ok in matched.items() if ok)
+    return source_result('success' if is_valid else 'failed', confidence,
+                         {'record': record, 'matchedFields': matched}, discrepancies)
+
+
+async def _google_get(client, url, params):
+    """First result of a Google Maps call, None for ZERO_RESULTS"""
+    response = await client.get(url, params={**params, 'key': GOOGLE_MAPS_API_KEY})
+    response.raise_for_status()
+    payload = response.json()
+    status = payload.get('status')
+    if status == 'ZERO_RESULTS':
+        return None
+    if status != 'OK':
+        # Quota and key problems say nothing about the provider; don't cache them
+        raise RuntimeError(f"Google Maps returned {status}: {payload.get('error_message', '')}".strip())
+    results = payload.get('candidates') or payload.get('results') or []
+    return results[0] if results else None
+
+
+async def find_place(client, query):
+    return await _google_get(client, f'{GOOGLE_PLACES_URL}/findplacefromtext/json', {
+        'input': query, 'inputtype': 'textquery', 'fields': 'place_id,name,formatted_address',
+    })
+
+
+async def geocode(client, address):
+    return await _google_get(client, GOOGLE_GEOCODING_URL, {'address': address})
+
+
+async def fetch_google_maps(client, provider, cache=None):
+    if not GOOGLE_MAPS_API_KEY:
+        # No key means no evidence either way, so don't let it drag the score
+        return source_result('skipped', discrepancies=['Google Maps API key not configured'])
+
+    query = f"{provider.get('firstName')} {provider.get('lastName')} {provider.get('city')}, {provider.get('state')}"
+    candidate = await cached(cache, 'google_maps', f'place:{query.lower()}', lambda: find_place(client, query))
+    if candidate:
+        return source_result('success', 1.0, {'placeId': candidate.get('place_id'),
+                                              'businessName': candidate.get('name'),
+                                              'formattedAddress': candidate.get('formatted_address')})
+
+    if not provider.get('practiceAddress'):
+        return source_result('failed', discrepancies=['Business not found in Google Places'])
+
+    # Fall back to geocoding the practice address, as validateWithGoogleMaps does
+    address = ', '.join(p for p in (provider.get('practiceAddress'), provider.get('city'),
+                                    provider.get('state'), provider.get('zipCode')) if p)
+    result = await cached(cache, 'google_maps', f'geocode:{address.lower()}', lambda: geocode(client, address))
+    if result is None:
+        return source_result('failed', discrepancies=['Address not found in Google Maps'])
+
+    components = {}
+    for component in result.get('address_components', []):
+        types = component.get('types', [])
+        if 'locality' in types:
+            components['city'] = component.get('long_name')
+        elif 'administrative_area_level_1' in types:
+            components['state'] = component.get('short_name')
+        elif 'postal_code' in types:
+            components['zipCode'] = component.get('long_name')
+
+    checks = [
+        (_lower(provider.get('city')), _lower(components.get('city'))),
+        (_lower(provider.get('state')), _lower(components.get('state'))),
+        ((provider.get('zipCode') or '')[:5], (components.get('zipCode') or '')[:5]),
+    ]
+    checks = [(ours, theirs) for ours, theirs in checks if ours and theirs]
+    confidence = sum(ours == theirs for ours, theirs in checks) / len(checks) if checks else 0.0
+    return source_result('success' if confidence > 0.7 else 'failed', confidence,
+                         {'formattedAddress': result.get('formatted_address'), 'addressComponents': components})
+
+
+SOURCES = {
+    'npi_registry': fetch_npi_registry,
+    'google_maps': fetch_google_maps,
+}
+
+
+# ============================================================================
+# ORCHESTRATOR
+# ============================================================================
+
+class ValidationOrchestrator:
+    """
+    Concurrent multi-source validation.
+
+    With `preflight`, providers whose NPI cannot exist (not 10 digits, or a
+    wrong Luhn check digit) are flagged without calling any source.
+    Concurrent validations of the same provider, and concurrent lookups of
+    the same source query, run once and share their result; outcomes handed
+    to the callers that joined in are marked 'coalesced'.
+    `timeouts` maps source name to seconds (DEFAULT_TIMEOUT otherwise) and
+    `max_concurrency` caps in-flight source calls across all providers
+    being validated by this orchestrator. Pass a cache.LookupCache as
+    `cache` to reuse recent registry and Maps lookups. Stage and source
+    latencies are recorded in `telemetry` (a telemetry.Telemetry).
+    """
+
+    def __init__(self, sources=None, timeouts=None, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 source_weights=None, client=None, cache=None, preflight=True, telemetry=None):
+        self.sources = dict(SOURCES if sources is None else sources)
+        self.timeouts = dict(timeouts or {})
+        self.source_weights = {**SOURCE_WEIGHTS, **(source_weights or {})}
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = cache
+        # Shared lookups outlive the caller's wait_for, so they need their own limit
+        self.request_timeout = max([DEFAULT_TIMEOUT, *self.timeouts.values()])
+        self.lookups = CoalescedLookups(cache, timeout=self.request_timeout)
+        self.validations = SingleFlight()
+        self._client = client
+        self._owns_client = client is None
+        self.preflight = preflight
+        self.telemetry = telemetry or Telemetry()
+        self.flagged = 0
+
+    async def __aenter__(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.request_timeout, limits=httpx.Limits(max_connections=self.max_concurrency))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch_source(self, name, provider):
+        """Call one source under the global concurrency limit and its own timeout"""
+        fetch = self.sources[name]
+        timeout = self.timeouts.get(name, DEFAULT_TIMEOUT)
+        queued = time.perf_counter()
+        async with self._semaphore:
+            self.telemetry.record('wait', name, time.perf_counter() - queued)
+            with self.telemetry.span('source', name) as span:
+                try:
+                    result = await asyncio.wait_for(fetch(self._client, provider, self.lookups), timeout)
+                except asyncio.TimeoutError:
+                    result = source_result('timeout', discrepancies=[f'No response within {timeout:g}s'])
+                except Exception as e:
+                    result = source_result('error', discrepancies=[f'API error: {e}'])
+                span.attributes['status'] = result['status']
+        self.telemetry.record('stage', SOURCE_STAGES.get(name, 'enrichment'), span.duration)
+        return {'source': name, **result, 'elapsed_ms': round(span.duration * 1000, 1)}
+
+    def check_npis(self, providers):
+        """Boolean mask of the providers worth sending to the sources"""
+        if not self.preflight:
+            return [True] * len(providers)
+        with self.telemetry.span('stage', 'parser', providers=len(providers)):
+            return valid_npis([p.get('npiNumber') or '' for p in providers]).tolist()
+
+    def flag(self, provider):
+        """Outcome for a provider whose NPI failed the pre-flight check"""
+        self.flagged += 1
+        reason = f"Invalid NPI number: {provider.get('npiNumber') or 'missing'}"
+        results = [{'source': name, **source_result('skipped', discrepancies=[reason]), 'elapsed_ms': 0.0}
+                   for name in self.sources]
+        outcome = self.score(provider, results)
+        outcome['flagged'] = True
+        outcome['recommendations'] = [reason, 'Correct the NPI before re-validating']
+        outcome['elapsed_ms'] = 0.0
+        return outcome
+
+    async def _validate(self, provider):
+        with self.telemetry.span('validation', 'provider', npi=provider.get('npiNumber')) as span:
+            with self.telemetry.span('stage', 'cross_reference'):
+                results = await asyncio.gather(*(self.fetch_source(name, provider) for name in self.sources))
+            with self.telemetry.span('stage', 'trust_calculator'):
+                outcome = self.score(provider, results)
+        outcome['elapsed_ms'] = round(span.duration * 1000, 1)
+        outcome['traceId'] = span.trace_id
+        return outcome
+
+    async def _validate_once(self, provider):
+        # The same NPI with different details is a different validation
+        key = (provider.get('npiNumber'), json.dumps(provider, sort_keys=True, default=str))
+        outcome, shared = await self.validations.do(key, lambda: self._validate(provider))
+        return {**outcome, 'coalesced': True} if shared else outcome
+
+    async def validate_provider(self, provider, checked=False):
+        """
+        Query every source at once and score whatever came back. Pass
+        `checked` when the provider already passed check_npis, so the
+        pre-flight isn't run (and timed) twice.
+        """
+        if not checked and not self.check_npis([provider])[0]:
+            return self.flag(provider)
+        return await self._validate_once(provider)
+
+    async def validate_providers(self, providers):
+        """Validate many providers concurrently; results keep input order"""
+        valid = self.check_npis(providers)
+        outcomes = await asyncio.gather(*(self._validate_once(p) for p, ok in zip(providers, valid) if ok))
+        outcomes = iter(outcomes)
+        return [next(outcomes) if ok else self.flag(p) for p, ok in zip(providers, valid)]
+
+    def score(self, provider, results):
+        """
+        Weighted confidence over the sources that returned evidence.
+
+        Timeouts, errors and skipped sources are excluded from both the
+        numerator and the weights, so a partial result is scored on what is
+        known rather than counted as a failure.
+        """
+        weighted, total_weight = 0.0, 0.0
+        for r in results:
+            if r['status'] in SCORED_STATUSES:
+                weight = self.source_weights.get(r['source'], DEFAULT_SOURCE_WEIGHT)
+                weighted += r['confidence'] * weight
+                total_weight += weight
+        confidence = weighted / total_weight if total_weight else 0.0
+
+        by_source = {r['source']: r for r in results}
+        recommendations = []
+        if confidence < 0.85:
+            recommendations.append('Provider data needs review')
+        if by_source.get('npi_registry', {}).get('status') == 'failed':
+            recommendations.append('NPI Registry validation failed - verify NPI number')
+        if by_source.get('google_maps', {}).get('status') == 'failed':
+            recommendations.append('Address not found on Google Maps - verify practice location')
+        unavailable = [r['source'] for r in results if r['status'] not in SCORED_STATUSES + ('skipped',)]
+        if unavailable:
+            recommendations.append(f"Re-run when available: {', '.join(unavailable)}")
+
+        return {
+            'providerId': provider.get('id'),
+            'npiNumber': provider.get('npiNumber'),
+            'overallConfidence': confidence,
+            'status': validation_status(confidence),
+            'partial': bool(unavailable),
+            'sources': results,
+            'recommendations': recommendations,
+            'autoCorrect': confidence >= 0.90 and by_source.get('npi_registry', {}).get('status') == 'success',
+            'flagged': False,
+            'coalesced': False,
+        }
+
+    def coalescing_stats(self):
+        """Single-flight counters for whole validations and for source lookups"""
+        return {'validations': self.validations.stats(), 'lookups': self.lookups.stats()}
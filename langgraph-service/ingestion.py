@@ -0,0 +1,325 @@
+"""
+Roster ingestion
+Streams a provider roster CSV in chunks, maps its columns onto the Provider
+model and normalizes NPIs, names, phones, ZIPs and
+states a whole column at a time with numpy. Chunks are normalized in a
+process pool and yielded in file order as soon as each is ready, with at
+most a few chunks in memory at once, so rosters of any size can feed the
+validation scheduler as they are read.
+
+Rows that can't be ingested (missing or malformed NPI, no name, duplicate
+NPI) are reported per row instead of failing the file; fields that can't be
+normalized are dropped with a warning. NPIs with a wrong check digit are
+kept with a warning: the validation orchestrator's pre-flight check owns
+flagging them.
+"""
+
+import csv
+import itertools
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+CHUNK_ROWS = 20_000
+
+# Provider field -> CSV headers it may appear under (as in upload.controller.ts)
+COLUMN_ALIASES = {
+    'npiNumber': ('npiNumber', 'npi', 'NPI', 'npi_number'),
+    'firstName': ('firstName', 'first_name', 'FirstName'),
+    'lastName': ('lastName', 'last_name', 'LastName'),
+    'middleName': ('middleName', 'middle_name'),
+    'name': ('name', 'Name', 'fullName', 'full_name'),
+    'credentials': ('credentials', 'credential'),
+    'primaryPhone': ('primaryPhone', 'phone', 'Phone', 'phone_number'),
+    'secondaryPhone': ('secondaryPhone',),
+    'faxNumber': ('faxNumber', 'fax'),
+    'email': ('email', 'Email'),
+    'practiceAddress': ('practiceAddress', 'address', 'Address'),
+    'city': ('city', 'City'),
+    'state': ('state', 'State'),
+    'zipCode': ('zipCode', 'zip_code', 'zip', 'ZIP'),
+    'taxonomyCode': ('taxonomyCode', 'taxonomy_code', 'taxonomy'),
+    'specialties': ('specialties', 'specialty', 'Specialty'),
+    'licenseNumbers': ('licenseNumbers', 'licenseNumber', 'license', 'license_number'),
+    'insuranceNetworks': ('insuranceNetworks', 'insurance_networks'),
+    'hospitalAffiliations': ('hospitalAffiliations', 'hospital_affiliations'),
+}
+# List fields in the Provider model, separated by ';' in the CSV
+LIST_FIELDS = ('specialties', 'licenseNumbers', 'insuranceNetworks', 'hospitalAffiliations')
+NAME_FIELDS = ('firstName', 'lastName', 'middleName', 'city')
+PHONE_FIELDS = ('primaryPhone', 'secondaryPhone', 'faxNumber')
+
+# Luhn sum of the '80840' prefix NPIs are checked with (ISO 7812 card issuer
+# prefix for US health), folded in as a constant
+NPI_PREFIX_SUM = 24
+
+
+def resolve_columns(header):
+    """{Provider field: column index} for the first alias of each field present in `header`"""
+    positions = {name.strip(): i for i, name in enumerate(header)}
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in positions:
+                columns[field] = positions[alias]
+                break
+    return columns
+
+
+def _ascii(values, width):
+    """(n, width) uint8 matrix of the ASCII bytes of `values`, NUL padded"""
+    encoded = np.char.encode(np.asarray(values, dtype=str), 'ascii', 'ignore').astype(f'S{width}')
+    return encoded.view(np.uint8).reshape(len(encoded), width)
+
+
+def extract_digits(values, width=20):
+    """
+    The digits of each string, left-aligned in an (n, width) uint8 matrix
+    (0-9, padded with 0), and how many each had.
+    """
+    chars = _ascii(values, width)
+    is_digit = (chars >= 48) & (chars <= 57)
+    # Stable sort puts each row's digits first, in their original order
+    order = np.argsort(~is_digit, axis=1, kind='stable')
+    digits = np.take_along_axis(np.where(is_digit, chars - 48, 0), order, axis=1).astype(np.uint8)
+    count = is_digit.sum(axis=1)
+    digits[np.arange(width) >= count[:, None]] = 0
+    return digits, count
+
+
+def _format_digits(digits, layout):
+    """Render rows of digits into `layout`, where '#' takes the next digit"""
+    slots = [i for i, c in enumerate(layout) if c == '#']
+    out = np.tile(np.frombuffer(layout.encode(), dtype=np.uint8), (len(digits), 1))
+    out[:, slots] = digits[:, :len(slots)] + 48
+    return out.view(f'S{len(layout)}').ravel().astype(str)
+
+
+def valid_npis(npis):
+    """Boolean mask of 10-digit NPIs whose check digit is right (Luhn over '80840' + NPI)"""
+    npis = np.char.strip(np.asarray(npis, dtype=str))
+    digits, count = extract_digits(npis, 12)
+    ok = (count == 10) & (np.char.str_len(npis) == 10)
+    digits = digits[:, :10].astype(np.int64)
+    doubled = digits[:, 0::2] * 2
+    doubled -= 9 * (doubled > 9)
+    total = NPI_PREFIX_SUM + doubled.sum(axis=1) + digits[:, 1::2].sum(axis=1)
+    return ok & (total % 10 == 0)
+
+
+def normalize_phones(values):
+    """('XXX-XXX-XXXX' or '', ok) for US numbers, dropping a leading country code 1"""
+    digits, count = extract_digits(values)
+    country = (count == 11) & (digits[:, 0] == 1)
+    digits[country] = np.roll(digits[country], -1, axis=1)
+    ok = (count == 10) | country
+    return np.where(ok, _format_digits(digits, '###-###-####'), ''), ok
+
+
+def normalize_zips(values):
+    """('XXXXX' or 'XXXXX-XXXX', ok); ZIPs that lost their leading zero to a spreadsheet get it back"""
+    digits, count = extract_digits(values)
+    lost_zero = (count == 4) | (count == 8)
+    digits[lost_zero] = np.roll(digits[lost_zero], 1, axis=1)
+    count = count + lost_zero
+    zip5 = _format_digits(digits, '#####')
+    zip9 = _format_digits(digits, '#####-####')
+    ok = (count == 5) | (count == 9)
+    return np.where(count == 9, zip9, np.where(ok, zip5, '')), ok
+
+
+def normalize_names(values):
+    """Whitespace collapsed; ALL CAPS or all lowercase names title-cased, mixed case left alone"""
+    names = np.array([' '.join(v.split()) for v in values], dtype=str)
+    shouting = np.char.isupper(names) | np.char.islower(names)
+    return np.where(shouting, np.char.title(names), names)
+
+
+def normalize_chunk(rows, columns, line_numbers):
+    """
+    Normalize one chunk of CSV rows (lists of strings, rows[i] starting on
+    CSV line line_numbers[i]) into Provider dicts. Returns (providers, rows,
+    errors, warnings) where rows[i] is the CSV line providers[i] came from.
+    """
+    n = len(rows)
+    # Column-major once, short rows padded with ''
+    transposed = list(itertools.zip_longest(*rows, fillvalue=''))
+
+    def column(field):
+        i = columns.get(field)
+        if i is None or i >= len(transposed):
+            return None
+        return np.char.strip(np.array(transposed[i], dtype=str))
+
+    fields = {}
+    problems = defaultdict(list)
+    notes = defaultdict(list)
+
+    npi = column('npiNumber')
+    if npi is None:
+        npi = np.full(n, '', dtype=str)
+    npis = npi.tolist()
+    well_formed = (np.char.str_len(npi) == 10) & np.char.isdigit(npi)
+    for i in np.flatnonzero(~well_formed).tolist():
+        problems[i].append(f'invalid NPI {npis[i]!r}' if npis[i] else 'missing NPI')
+    for i in np.flatnonzero(well_formed & ~valid_npis(npi)).tolist():
+        notes[i].append(f'NPI {npis[i]!r} fails the check digit')
+    fields['npiNumber'] = npi
+
+    first, last = column('firstName'), column('lastName')
+    full = column('name')
+    if full is not None:
+        # "First Last" rosters; explicit first/last columns win where filled
+        split = [v.split(None, 1) for v in full]
+        split_first = np.array([p[0] if p else '' for p in split], dtype=str)
+        split_last = np.array([p[1] if len(p) > 1 else '' for p in split], dtype=str)
+        first = split_first if first is None else np.where(first != '', first, split_first)
+        last = split_last if last is None else np.where(last != '', last, split_last)
+    fields['firstName'], fields['lastName'] = first, last
+    for name in NAME_FIELDS:
+        if name in ('firstName', 'lastName'):
+            values = fields[name]
+        else:
+            values = column(name)
+        if values is not None:
+            fields[name] = normalize_names(values)
+    if first is None or last is None:
+        for i in range(n):
+            problems[i].append('missing provider name')
+        fields.pop('firstName'), fields.pop('lastName')
+    else:
+        for i in np.flatnonzero((fields['firstName'] == '') | (fields['lastName'] == '')).tolist():
+            problems[i].append('missing provider name')
+
+    for name in PHONE_FIELDS:
+        values = column(name)
+        if values is not None:
+            fields[name], ok = normalize_phones(values)
+            for i in np.flatnonzero(~ok & (values != '')).tolist():
+                notes[i].append(f'{name} {str(values[i])!r} is not a US phone number')
+
+    zips = column('zipCode')
+    if zips is not None:
+        fields['zipCode'], ok = normalize_zips(zips)
+        for i in np.flatnonzero(~ok & (zips != '')).tolist():
+            notes[i].append(f'zipCode {str(zips[i])!r} is not a ZIP code')
+
+    state = column('state')
+    if state is not None:
+        state = np.char.upper(state)
+        ok = (np.char.str_len(state) == 2) & np.char.isalpha(state)
+        fields['state'] = np.where(ok, state, '')
+        for i in np.flatnonzero(~ok & (state != '')).tolist():
+            notes[i].append(f'state {str(state[i])!r} is not a two-letter code')
+
+    email = column('email')
+    if email is not None:
+        fields['email'] = np.char.lower(email)
+    for name in ('credentials', 'practiceAddress', 'taxonomyCode', *LIST_FIELDS):
+        values = column(name)
+        if values is not None:
+            fields[name] = values
+
+    names = [f for f in fields if f not in LIST_FIELDS]
+    table = [fields[f].tolist() for f in names]
+    for f in LIST_FIELDS:
+        if f in fields:
+            # Rosters repeat the same few specialty/network lists; split each once
+            unique, inverse = np.unique(fields[f], return_inverse=True)
+            split = [[item.strip() for item in value.split(';') if item.strip()] for value in unique.tolist()]
+            names.append(f)
+            table.append([split[j] for j in inverse.tolist()])
+
+    providers, lines, errors, warnings = [], [], [], []
+    for i, values in enumerate(zip(*table)):
+        row = line_numbers[i]
+        if i in problems:
+            errors.append({'row': row, 'npiNumber': npis[i] or None, 'errors': problems[i]})
+            continue
+        providers.append({f: v for f, v in zip(names, values) if v})
+        lines.append(row)
+        if i in notes:
+            warnings.append({'row': row, 'npiNumber': npis[i], 'warnings': notes[i]})
+    return providers, lines, errors, warnings
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    (columns, rows, line numbers) per chunk of a roster CSV; a row's line
+    number is the line its record starts on, so blank lines and quoted
+    fields spanning lines don't shift the ones after them.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = resolve_columns(header)
+        chunk, lines = [], []
+        end = reader.line_num
+        for row in reader:
+            start, end = end + 1, reader.line_num
+            if not any(row):
+                continue
+            chunk.append(row)
+            lines.append(start)
+            if len(chunk) >= chunk_rows:
+                yield columns, chunk, lines
+                chunk, lines = [], []
+        if chunk:
+            yield columns, chunk, lines
+
+
+def default_workers():
+    """Every CPU but the one parsing the CSV; none (normalize in-process) on a single CPU"""
+    return max((os.cpu_count() or 1) - 1, 0)
+
+
+def ingest_roster(path, chunk_rows=CHUNK_ROWS, workers=None, dedupe=True):
+    """
+    Yield {'start_row', 'providers', 'rows', 'errors', 'warnings'} for each
+    chunk of the roster at `path`, in file order, normalized in a pool of
+    `workers` processes (default_workers() by default; 0 normalizes in this
+    process). rows[i] is the CSV line providers[i] came from.
+
+    At most two chunks per worker are read ahead. With `dedupe`, rows that
+    repeat an NPI seen earlier in the file are reported as errors.
+    """
+    workers = default_workers() if workers is None else workers
+    seen = set()
+
+    def finish(start, result):
+        providers, lines, errors, warnings = result
+        if dedupe:
+            unique, unique_lines = [], []
+            for provider, line in zip(providers, lines):
+                # NPIs are validated 10-digit numbers by now; ints keep the set small
+                key = int(provider['npiNumber'])
+                if key in seen:
+                    errors.append({'row': line, 'npiNumber': provider['npiNumber'], 'errors': ['duplicate NPI']})
+                    continue
+                seen.add(key)
+                unique.append(provider)
+                unique_lines.append(line)
+            providers, lines = unique, unique_lines
+            errors.sort(key=lambda e: e['row'])
+        return {'start_row': start, 'providers': providers, 'rows': lines, 'errors': errors, 'warnings': warnings}
+
+    chunks = iter_chunks(path, chunk_rows)
+    if not workers:
+        for columns, rows, lines in chunks:
+            yield finish(lines[0], normalize_chunk(rows, columns, lines))
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for columns, rows, lines in chunks:
+            pending.append((lines[0], pool.submit(normalize_chunk, rows, columns, lines)))
+            if len(pending) >= 2 * workers:
+                start, future = pending.popleft()
+                yield finish(start, future.result())
+        while pending:
+            start, future = pending.popleft()
+            yield finish(start, future.result())
@@ -0,0 +1,73 @@
+"""
+LampStack validation service - batch entry point
+
+    python main.py roster.csv --checkpoint roster.jsonl --cache lookup_cache.db
+
+Re-running the same command after a crash resumes from the checkpoint.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+import db
+import ingestion
+import scheduler
+from cache import LookupCache
+from telemetry import Telemetry
+from trust_learning import TrustLearner
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Validate a CSV roster of providers against all sources')
+    parser.add_argument('roster', help='CSV with an npiNumber (or npi) column and optional Provider fields')
+    parser.add_argument('--checkpoint', help='JSONL results/checkpoint file (default: <roster>.results.jsonl)')
+    parser.add_argument('--cache', help='SQLite lookup cache path (default: memory only)')
+    parser.add_argument('--workers', type=int, default=50, help='providers validated concurrently')
+    parser.add_argument('--npi-rate', type=float, default=scheduler.RATE_LIMITS['npi_registry'][0],
+                        help='NPI Registry requests per second')
+    parser.add_argument('--google-rate', type=float, default=scheduler.RATE_LIMITS['google_maps'][0],
+                        help='Google Maps requests per second')
+    parser.add_argument('--retry-partial', action='store_true',
+                        help='re-validate checkpointed providers whose sources timed out or errored')
+    parser.add_argument('--chunk-rows', type=int, default=ingestion.CHUNK_ROWS,
+                        help='roster rows read and normalized at a time')
+    parser.add_argument('--ingest-workers', type=int, default=None,
+                        help='processes normalizing roster chunks (default: one per CPU but one; 0 for none)')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='write stage and source latency percentiles to PATH '
+                             '(Prometheus text for .prom, JSON otherwise)')
+    parser.add_argument('--database-url', nargs='?', const='', default=None,
+                        help='learn TrustScore rows from the outcomes in this database (defaults to $DATABASE_URL)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    checkpoint = args.checkpoint or args.roster.rsplit('.', 1)[0] + '.results.jsonl'
+    rate_limits = {
+        'npi_registry': (args.npi_rate, scheduler.RATE_LIMITS['npi_registry'][1]),
+        'google_maps': (args.google_rate, scheduler.RATE_LIMITS['google_maps'][1]),
+    }
+    cache = LookupCache(args.cache)
+    conn = db.connect(args.database_url or None) if args.database_url is not None else None
+    learner = TrustLearner(conn) if conn is not None else None
+    telemetry = Telemetry()
+    try:
+        summary = asyncio.run(scheduler.run_job(args.roster, checkpoint, cache, rate_limits,
+                                                args.workers, args.retry_partial, learner=learner,
+                                                chunk_rows=args.chunk_rows, ingest_workers=args.ingest_workers,
+                                                telemetry=telemetry))
+    finally:
+        cache.close()
+        if conn is not None:
+            conn.close()
+        if args.metrics:
+            telemetry.write(args.metrics)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
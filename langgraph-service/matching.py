@@ -0,0 +1,182 @@
+"""
+Bulk fuzzy name matching
+Python port of fuzzyNameMatch (confidenceScoring.service.ts) built for roster-wide
+duplicate detection: a bit-parallel edit distance that stops as soon as the
+0.7 similarity cutoff is out of reach, plus phonetic blocking so only
+plausible pairs are ever compared.
+"""
+
+import math
+import re
+from collections import defaultdict
+from itertools import combinations
+
+SIMILARITY_CUTOFF = 0.7
+
+_NON_LETTERS = re.compile(r'[^a-z]')
+_TOKEN_SPLIT = re.compile(r'[^a-z]+')
+_SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(('aeiouyhw', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r'))
+                  for c in letters}
+
+
+def normalize_name(name):
+    """Lowercase letters only, as the TypeScript normalize()"""
+    return _NON_LETTERS.sub('', name.lower())
+
+
+def bounded_edit_distance(a, b, max_distance):
+    """
+    Levenshtein distance between a and b, or max_distance + 1 once it is
+    certain to exceed max_distance.
+
+    Uses Myers/Hyyrö bit-parallel rows (one Python int per row instead of an
+    O(n*m) matrix), so each character of `b` costs a handful of integer ops.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    m, n = len(a), len(b)
+    if m - n > max_distance:
+        return max_distance + 1
+    if n == 0:
+        return m
+
+    peq = defaultdict(int)
+    for i, ch in enumerate(a):
+        peq[ch] |= 1 << i
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+
+    # Walk the shorter string against the bit-vector of the longer one
+    for j, ch in enumerate(b):
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh = mh << 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+        # The score can drop by at most one per remaining column
+        if score - (n - j - 1) > max_distance:
+            return max_distance + 1
+    return score
+
+
+def similarity(n1, n2, cutoff=SIMILARITY_CUTOFF):
+    """
+    fuzzyNameMatch on already-normalised names: 1.0 for equal names, 0.8 for
+    short names sharing an initial, else 1 - distance / max length if that
+    beats the cutoff, otherwise 0.
+    """
+    if n1 == n2:
+        return 1.0
+    if n1[:1] == n2[:1] and (len(n1) < 3 or len(n2) < 3):
+        return 0.8
+    longest = max(len(n1), len(n2))
+    # Largest distance that can still score above the cutoff
+    max_distance = max(0, math.ceil((1 - cutoff) * longest) - 1)
+    distance = bounded_edit_distance(n1, n2, max_distance)
+    if distance > max_distance:
+        return 0.0
+    score = 1 - distance / longest
+    return score if score > cutoff else 0.0
+
+
+def fuzzy_name_match(name1, name2, cutoff=SIMILARITY_CUTOFF):
+    return similarity(normalize_name(name1), normalize_name(name2), cutoff)
+
+
+def soundex(word):
+    """American Soundex code, e.g. Smith/Smyth -> S530"""
+    if not word:
+        return ''
+    first, result = word[0], []
+    previous = _SOUNDEX_CODES.get(first, '')
+    for ch in word[1:]:
+        code = _SOUNDEX_CODES.get(ch, '')
+        if code and code != '0' and code != previous:
+            result.append(code)
+        if ch not in 'hw':
+            previous = code
+    return (first.upper() + ''.join(result) + '000')[:4]
+
+
+def blocking_keys(name):
+    """
+    Candidate blocks for a full name. A pair is compared only if it shares a
+    key: phonetic last name + first initial, or phonetic first name + last
+    initial, so a typo in one half of the name still finds its twin.
+    """
+    tokens = [t for t in _TOKEN_SPLIT.split(name.lower()) if t]
+    if not tokens:
+        return set()
+    first, last = tokens[0], tokens[-1]
+    return {f'L:{soundex(last)}:{first[0]}', f'F:{soundex(first)}:{last[0]}'}
+
+
+def find_duplicate_pairs(names, cutoff=SIMILARITY_CUTOFF, max_block_size=100, window=20):
+    """
+    All (i, j, similarity) pairs of names scoring above the cutoff.
+
+    Blocks larger than `max_block_size` (very common names) fall back to a
+    sorted-neighbourhood pass, comparing each name with the next `window`
+    names in sorted order, which keeps the worst case near-linear.
+    """
+    normalized = [normalize_name(n) for n in names]
+    blocks = defaultdict(list)
+    for i, name in enumerate(names):
+        for key in blocking_keys(name):
+            blocks[key].append(i)
+
+    seen = set()
+    pairs = []
+
+    def compare(i, j):
+        if i > j:
+            i, j = j, i
+        if (i, j) in seen:
+            return
+        seen.add((i, j))
+        score = similarity(normalized[i], normalized[j], cutoff)
+        if score:
+            pairs.append((i, j, score))
+
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) <= max_block_size:
+            for i, j in combinations(members, 2):
+                compare(i, j)
+        else:
+            ordered = sorted(members, key=normalized.__getitem__)
+            for pos, i in enumerate(ordered):
+                for j in ordered[pos + 1:pos + 1 + window]:
+                    compare(i, j)
+    return pairs
+
+
+def cluster_duplicates(count, pairs):
+    """Group matched pairs into duplicate clusters (lists of indices, size >= 2)"""
+    parent = list(range(count))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j, _ in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[rj] = ri
+
+    clusters = defaultdict(list)
+    for i in range(count):
+        clusters[find(i)].append(i)
+    return [members for members in clusters.values() if len(members) > 1]
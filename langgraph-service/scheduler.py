@@ -0,0 +1,298 @@
+"""
+Batch validation scheduler
+Runs a roster of providers through the ValidationOrchestrator with a token
+bucket per source API, jittered exponential backoff on throttling and
+transient errors, and a JSONL checkpoint so a crashed job resumes where it
+stopped.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from urllib.parse import urlparse
+
+import httpx
+
+import graph
+import ingestion
+
+logger = logging.getLogger(__name__)
+
+# Requests per second and burst size per source. NPPES publishes no limit,
+# so stay polite; Google Maps web services allow 50 QPS per project.
+RATE_LIMITS = {
+    'npi_registry': (10.0, 20),
+    'google_maps': (40.0, 50),
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+# Per HTTP request; the orchestrator's per-source timeout in batch mode also
+# has to cover waiting for tokens and backing off between retries
+REQUEST_TIMEOUT = 10.0
+BATCH_SOURCE_TIMEOUT = 300.0
+
+
+def source_hosts():
+    return {
+        urlparse(graph.NPI_REGISTRY_URL).hostname: 'npi_registry',
+        urlparse(graph.GOOGLE_PLACES_URL).hostname: 'google_maps',
+        urlparse(graph.GOOGLE_GEOCODING_URL).hostname: 'google_maps',
+    }
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `capacity`; waiters are served in order"""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than a server's Retry-After"""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after:
+        try:
+            delay = max(delay, min(cap, float(retry_after)))
+        except ValueError:
+            pass
+    return delay
+
+
+class ThrottledTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that takes a token from the bucket of the request's
+    source before every attempt and retries 429/5xx and connection errors.
+
+    Throttling at the transport means cache hits never spend a token, and
+    a provider that needs two Maps calls spends two.
+    """
+
+    def __init__(self, rate_limits=None, transport=None, max_retries=MAX_RETRIES):
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.max_retries = max_retries
+        limits = {**RATE_LIMITS, **(rate_limits or {})}
+        self.buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in limits.items()}
+        self.hosts = source_hosts()
+        self.retries = dict.fromkeys(self.buckets, 0)
+
+    async def handle_async_request(self, request):
+        source = self.hosts.get(request.url.host)
+        bucket = self.buckets.get(source)
+        for attempt in range(self.max_retries + 1):
+            if bucket is not None:
+                await bucket.acquire()
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                retry_after = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                retry_after = response.headers.get('Retry-After')
+                await response.aclose()
+            if source in self.retries:
+                self.retries[source] += 1
+            await asyncio.sleep(backoff_delay(attempt, retry_after=retry_after))
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+# ============================================================================
+# ROSTER AND CHECKPOINT
+# ============================================================================
+
+def rejected_path(checkpoint_path):
+    return checkpoint_path.rsplit('.', 1)[0] + '.rejected.jsonl'
+
+
+def load_checkpoint(path, retry_partial=False):
+    """NPIs already done in a previous run of the job (a torn last line is ignored)"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if retry_partial and record.get('partial'):
+                continue
+            done.add(record['npiNumber'])
+    return done
+
+
+def checkpoint_record(outcome):
+    """Validation outcome without the raw source payloads"""
+    return {
+        **{k: v for k, v in outcome.items() if k != 'sources'},
+        'sources': [{k: v for k, v in s.items() if k != 'data'} for s in outcome['sources']],
+    }
+
+
+async def run_batch(providers, checkpoint_path, orchestrator, workers=50, retry_partial=False, progress_every=500,
+                    learner=None, done=None):
+    """
+    Validate `providers` with `workers` in flight, appending each outcome to
+    the checkpoint as it completes. Providers already in the checkpoint (or
+    in `done`, when given) are skipped. Source outcomes are fed to `learner`
+    (a TrustLearner) if given. Providers failing the orchestrator's NPI
+    pre-flight check are checkpointed as flagged without any source call.
+    Returns a summary dict.
+    """
+    if done is None:
+        done = load_checkpoint(checkpoint_path, retry_partial)
+    pending = [p for p in providers if p['npiNumber'] not in done]
+    logger.info('%d providers, %d already checkpointed, %d to validate',
+                len(providers), len(providers) - len(pending), len(pending))
+
+    start = time.perf_counter()
+    valid = orchestrator.check_npis(pending)
+    queue = asyncio.Queue()
+    for provider, ok in zip(pending, valid):
+        if ok:
+            queue.put_nowait(provider)
+    flagged = [orchestrator.flag(p) for p, ok in zip(pending, valid) if not ok]
+    counts = {'validated': 0, 'partial': 0, 'failed': 0, 'flagged': len(flagged)}
+    statuses = {}
+    for outcome in flagged:
+        statuses[outcome['status']] = statuses.get(outcome['status'], 0) + 1
+
+    with open(checkpoint_path, 'a') as checkpoint:
+        checkpoint.writelines(json.dumps(checkpoint_record(outcome)) + '\n' for outcome in flagged)
+
+        async def worker():
+            while True:
+                try:
+                    provider = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    outcome = await orchestrator.validate_provider(provider, checked=True)
+                except Exception as e:
+                    logger.error('Validation failed for %s: %s', provider['npiNumber'], e)
+                    counts['failed'] += 1
+                    continue
+                checkpoint.write(json.dumps(checkpoint_record(outcome)) + '\n')
+                checkpoint.flush()
+                # A coalesced outcome was already learned from by the caller that ran it
+                if learner is not None and not outcome.get('coalesced'):
+                    learner.observe(outcome['sources'])
+                counts['validated'] += 1
+                counts['partial'] += outcome['partial']
+                statuses[outcome['status']] = statuses.get(outcome['status'], 0) + 1
+                if counts['validated'] % progress_every == 0:
+                    elapsed = time.perf_counter() - start
+                    logger.info('%d/%d validated (%.1f/s)', counts['validated'], len(pending),
+                                counts['validated'] / elapsed)
+
+        await asyncio.gather(*(worker() for _ in range(min(workers, queue.qsize()) or 1)))
+        os.fsync(checkpoint.fileno())
+    if learner is not None:
+        learner.flush()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'total': len(providers),
+        'skipped': len(providers) - len(pending),
+        **counts,
+        'status_counts': statuses,
+        'seconds': round(elapsed, 2),
+        'per_second': round(counts['validated'] / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def merge_summaries(total, summary):
+    """Add one run_batch summary into a running total"""
+    if total is None:
+        return dict(summary, status_counts=dict(summary['status_counts']))
+    for key in ('total', 'skipped', 'validated', 'partial', 'failed', 'flagged', 'seconds'):
+        total[key] += summary[key]
+    for status, count in summary['status_counts'].items():
+        total['status_counts'][status] = total['status_counts'].get(status, 0) + count
+    total['seconds'] = round(total['seconds'], 2)
+    total['per_second'] = round(total['validated'] / total['seconds'], 2) if total['seconds'] else 0.0
+    return total
+
+
+async def run_roster(roster_path, checkpoint_path, orchestrator, workers=50, retry_partial=False, learner=None,
+                     chunk_rows=ingestion.CHUNK_ROWS, ingest_workers=None):
+    """
+    Validate a CSV roster chunk by chunk: the next chunk is read and
+    normalized in the background while the current one is validated, so
+    memory stays bounded by a few chunks whatever the roster size. Rows
+    ingestion rejects are written to <checkpoint>.rejected.jsonl.
+    """
+    done = load_checkpoint(checkpoint_path, retry_partial)
+    batches = ingestion.ingest_roster(roster_path, chunk_rows, ingest_workers)
+    summary, rejected, warnings = None, 0, 0
+    with open(rejected_path(checkpoint_path), 'w') as rejects:
+        upcoming = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+        try:
+            while (batch := await upcoming) is not None:
+                upcoming = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+                for error in batch['errors']:
+                    rejects.write(json.dumps(error) + '\n')
+                rejected += len(batch['errors'])
+                warnings += len(batch['warnings'])
+                for warning in batch['warnings']:
+                    logger.debug('Row %d (%s): %s', warning['row'], warning['npiNumber'],
+                                 '; '.join(warning['warnings']))
+                summary = merge_summaries(summary, await run_batch(
+                    batch['providers'], checkpoint_path, orchestrator, workers, learner=learner, done=done))
+        finally:
+            # The generator can only be closed once the read in flight is done with it
+            await asyncio.gather(upcoming, return_exceptions=True)
+            batches.close()
+    summary = summary or merge_summaries(None, await run_batch([], checkpoint_path, orchestrator, done=done))
+    summary['rejected'] = rejected
+    summary['warnings'] = warnings
+    if rejected:
+        logger.warning('%d roster rows rejected, see %s', rejected, rejected_path(checkpoint_path))
+    return summary
+
+
+async def run_job(roster_path, checkpoint_path, cache=None, rate_limits=None, workers=50, retry_partial=False,
+                  transport=None, learner=None, chunk_rows=ingestion.CHUNK_ROWS, ingest_workers=None, telemetry=None):
+    """Validate a CSV roster end to end with throttled, retried source calls"""
+    throttled = ThrottledTransport(rate_limits, transport)
+    client = httpx.AsyncClient(transport=throttled, timeout=REQUEST_TIMEOUT)
+    timeouts = dict.fromkeys(graph.SOURCES, BATCH_SOURCE_TIMEOUT)
+    async with client, graph.ValidationOrchestrator(timeouts=timeouts, max_concurrency=workers * len(graph.SOURCES),
+                                                    client=client, cache=cache, telemetry=telemetry) as orchestrator:
+        summary = await run_roster(roster_path, checkpoint_path, orchestrator, workers, retry_partial, learner,
+                                   chunk_rows, ingest_workers)
+    summary['retries'] = throttled.retries
+    summary['coalescing'] = orchestrator.coalescing_stats()
+    summary['latency'] = orchestrator.telemetry.snapshot()
+    if cache is not None:
+        summary['cache'] = cache.stats()
+    if learner is not None:
+        summary['trust_outcomes'] = learner.written
+    return summary
@@ -0,0 +1,81 @@
+"""
+Single-flight request coalescing
+Concurrent calls that share a key run once: the first caller starts the
+work and everyone who asks for the same key while it is in flight awaits
+the same task. Nothing is remembered once the task finishes; that is the
+lookup cache's job.
+"""
+
+import asyncio
+
+from cache import cached
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent async calls by key.
+
+    The shared task is shielded from its callers, so one caller being
+    cancelled doesn't cancel the work for the others. Exceptions reach
+    every caller waiting on the key. With `timeout`, the shared task itself
+    is cancelled after that many seconds (callers get TimeoutError), so a
+    stalled call can't hold its key forever.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self._inflight = {}
+        self.counters = dict.fromkeys(('calls', 'executions', 'coalesced', 'errors'), 0)
+
+    def __len__(self):
+        return len(self._inflight)
+
+    def _finished(self, key, task):
+        self._inflight.pop(key, None)
+        # Mark the exception retrieved even if every caller has gone away
+        if not task.cancelled() and task.exception() is not None:
+            self.counters['errors'] += 1
+
+    async def do(self, key, fn):
+        """
+        Await fn() for `key`, or the call already in flight for it. Returns
+        (result, shared) where shared says whether another caller started it.
+        """
+        self.counters['calls'] += 1
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.counters['coalesced'] += 1
+        else:
+            self.counters['executions'] += 1
+            work = fn() if self.timeout is None else asyncio.wait_for(fn(), self.timeout)
+            task = asyncio.ensure_future(work)
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task), shared
+
+    def stats(self):
+        return {
+            **self.counters,
+            'coalesced_rate': self.counters['coalesced'] / self.counters['calls'] if self.counters['calls'] else 0.0,
+            'in_flight': len(self._inflight),
+        }
+
+
+class CoalescedLookups:
+    """
+    Stands in for a LookupCache (or no cache) in source fetches: concurrent
+    lookups of the same (source, key) share one cache check and, on a miss,
+    one API call, given up on after `timeout` seconds.
+    """
+
+    def __init__(self, cache=None, timeout=None):
+        self.cache = cache
+        self.flights = SingleFlight(timeout)
+
+    async def get_or_fetch(self, source, key, fetch):
+        value, _ = await self.flights.do((source, str(key)), lambda: cached(self.cache, source, key, fetch))
+        return value
+
+    def stats(self):
+        return self.flights.stats()
@@ -0,0 +1,241 @@
+"""
+Latency telemetry for the validation pipeline
+Timing spans for each agent stage and each external source call, folded
+into HDR-style log-linear histograms: constant memory per metric, ~1%
+relative error at any percentile from microseconds to an hour. Exported as
+Prometheus text or as JSON for the analytics charts.
+
+    telemetry = Telemetry()
+    with telemetry.span('stage', 'validator'):
+        ...
+    telemetry.snapshot()['stage']['validator']['p99_ms']
+"""
+
+import contextvars
+import itertools
+import json
+import time
+from collections import deque
+
+# Agent stages as drawn in plot_agent_architecture
+STAGES = ('parser', 'validator', 'enrichment', 'cross_reference', 'trust_calculator')
+# Which stage each source call belongs to
+SOURCE_STAGES = {
+    'npi_registry': 'validator',
+    'google_maps': 'enrichment',
+}
+PERCENTILES = (50, 95, 99)
+
+# 2^7 linear sub-buckets per power of two: values are kept to within 1/64
+SUB_BUCKET_BITS = 7
+# Spans kept for tracing; histograms keep everything regardless
+MAX_SPANS = 10000
+
+METRIC_NAMES = {
+    'stage': ('lampstack_stage_latency_seconds', 'stage', 'Time spent in each validation agent stage'),
+    'source': ('lampstack_source_latency_seconds', 'source', 'External source call latency'),
+    'wait': ('lampstack_source_wait_seconds', 'source', 'Time source calls waited for a concurrency slot'),
+    'validation': ('lampstack_validation_latency_seconds', 'name', 'End-to-end provider validation time'),
+}
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_ids = itertools.count(1)
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of durations in integer microseconds.
+
+    Values below 2^SUB_BUCKET_BITS are counted exactly; above that each
+    power of two is split into 2^(SUB_BUCKET_BITS - 1) equal buckets, so a
+    bucket is never wider than 1/64 of the values in it.
+    """
+
+    def __init__(self, sub_bucket_bits=SUB_BUCKET_BITS):
+        self.bits = sub_bucket_bits
+        self.sub_count = 1 << sub_bucket_bits
+        self.half = self.sub_count >> 1
+        self.counts = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def _index(self, us):
+        if us < self.sub_count:
+            return us
+        shift = us.bit_length() - self.bits
+        return self.sub_count + (shift - 1) * self.half + (us >> shift) - self.half
+
+    def _bounds(self, index):
+        """[low, high) microseconds covered by a bucket"""
+        if index < self.sub_count:
+            return index, index + 1
+        shift, offset = divmod(index - self.sub_count, self.half)
+        shift += 1
+        low = (offset + self.half) << shift
+        return low, low + (1 << shift)
+
+    def record_us(self, us):
+        us = max(0, int(us))
+        index = self._index(us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_us += us
+        self.min_us = us if self.min_us is None else min(self.min_us, us)
+        self.max_us = max(self.max_us, us)
+
+    def record(self, seconds):
+        self.record_us(seconds * 1e6)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total_us += other.total_us
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    def percentile_us(self, q):
+        """Value at percentile `q` (0-100): the midpoint of its bucket, clamped to the observed range"""
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = self._bounds(index)
+                return min(max((low + high - 1) / 2, self.min_us), self.max_us)
+        return float(self.max_us)
+
+    def summary(self, percentiles=PERCENTILES):
+        """{count, mean_ms, min_ms, max_ms, pNN_ms...}"""
+        summary = {
+            'count': self.count,
+            'mean_ms': round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            'min_ms': round((self.min_us or 0) / 1000, 3),
+            'max_ms': round(self.max_us / 1000, 3),
+        }
+        for q in percentiles:
+            summary[f'p{q:g}_ms'] = round(self.percentile_us(q) / 1000, 3)
+        return summary
+
+
+class Span:
+    """One timed operation; use through Telemetry.span()"""
+
+    def __init__(self, telemetry, kind, name, attributes):
+        self.telemetry = telemetry
+        self.kind = kind
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(_ids)
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.duration = None
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self.started = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.telemetry.finish(self)
+
+    def record(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'kind': self.kind,
+            'name': self.name,
+            'start': round(self.started, 6),
+            'duration_ms': round(self.duration * 1000, 3),
+            **({'attributes': self.attributes} if self.attributes else {}),
+        }
+
+
+class Telemetry:
+    """
+    Latency histograms keyed by (kind, name), plus the last `max_spans`
+    spans for tracing. Spans nest through a context variable, so the spans
+    opened inside one provider's validation share its trace_id even with
+    many validations interleaved on the event loop.
+    """
+
+    def __init__(self, max_spans=MAX_SPANS, span_sink=None):
+        self.histograms = {}
+        self.spans = deque(maxlen=max_spans)
+        self.span_sink = span_sink
+
+    def histogram(self, kind, name):
+        key = (kind, name)
+        if key not in self.histograms:
+            self.histograms[key] = LatencyHistogram()
+        return self.histograms[key]
+
+    def record(self, kind, name, seconds):
+        self.histogram(kind, name).record(seconds)
+
+    def span(self, kind, name, **attributes):
+        """Context manager timing a block into the (kind, name) histogram"""
+        return Span(self, kind, name, attributes)
+
+    def finish(self, span):
+        self.record(span.kind, span.name, span.duration)
+        record = span.record()
+        self.spans.append(record)
+        if self.span_sink is not None:
+            self.span_sink(record)
+
+    def trace(self, trace_id):
+        """Spans of one trace, in the order they finished"""
+        return [s for s in self.spans if s['trace_id'] == trace_id]
+
+    def merge(self, other):
+        for (kind, name), histogram in other.histograms.items():
+            self.histogram(kind, name).merge(histogram)
+        return self
+
+    def snapshot(self):
+        """{kind: {name: histogram summary}} - the JSON the analytics charts read"""
+        snapshot = {}
+        for (kind, name), histogram in sorted(self.histograms.items()):
+            snapshot.setdefault(kind, {})[name] = histogram.summary()
+        return snapshot
+
+    def prometheus(self, percentiles=PERCENTILES):
+        """Prometheus text exposition format, one summary metric per kind"""
+        lines = []
+        by_kind = {}
+        for (kind, name), histogram in sorted(self.histograms.items()):
+            by_kind.setdefault(kind, []).append((name, histogram))
+        for kind, entries in by_kind.items():
+            metric, label, help_text = METRIC_NAMES.get(kind, (f'lampstack_{kind}_latency_seconds', 'name',
+                                                               f'{kind} latency'))
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} summary')
+            for name, histogram in entries:
+                for q in percentiles:
+                    value = histogram.percentile_us(q) / 1e6
+                    lines.append(f'{metric}{{{label}="{name}",quantile="{q / 100:g}"}} {value:.6g}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {histogram.total_us / 1e6:.6g}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Prometheus text for *.prom/*.txt paths, JSON otherwise"""
+        with open(path, 'w') as f:
+            if path.endswith(('.prom', '.txt')):
+                f.write(self.prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
@@ -0,0 +1,136 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from cache import LookupCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'lookups.db')
+
+
+def on_disk(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM lookup_cache').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_entries_expire_after_their_source_ttl(clock):
+    cache = LookupCache(ttls={'npi_registry': 60}, clock=clock)
+    cache.set('npi_registry', '1234567893', {'name': 'Ann'})
+    clock.now += 59
+    assert cache.get('npi_registry', '1234567893') == (True, {'name': 'Ann'})
+    clock.now += 2
+    assert cache.get('npi_registry', '1234567893') == (False, None)
+    assert cache.counters['expired'] == 1
+
+
+def test_negative_entries_use_the_negative_ttl(clock):
+    cache = LookupCache(ttls={'npi_registry': 3600}, negative_ttl=10, clock=clock)
+    cache.set('npi_registry', 1, None)
+    assert cache.get('npi_registry', 1) == (True, None)
+    assert cache.counters['negative_hits'] == 1
+    clock.now += 11
+    assert cache.get('npi_registry', 1) == (False, None)
+
+
+def test_evicted_entries_come_back_from_disk(path, clock):
+    cache = LookupCache(path, max_memory_entries=2, clock=clock)
+    for i in range(5):
+        cache.set('google_maps', i, {'i': i})
+    cache.flush()
+    assert cache.counters['evictions'] == 3
+    assert cache.get('google_maps', 0) == (True, {'i': 0})
+    assert cache.counters['disk_hits'] == 1
+    cache.close()
+
+
+def test_writes_are_batched(path, clock):
+    cache = LookupCache(path, clock=clock, write_batch=3, write_interval=3600)
+    cache.set('npi_registry', 1, {'i': 1})
+    cache.set('npi_registry', 2, {'i': 2})
+    assert on_disk(path) == 0
+    cache.set('npi_registry', 3, {'i': 3})
+    assert on_disk(path) == 3
+    cache.set('npi_registry', 4, {'i': 4})
+    cache.close()
+    assert on_disk(path) == 4
+
+
+def test_pending_entries_are_served_after_memory_eviction(path, clock):
+    cache = LookupCache(path, max_memory_entries=1, clock=clock, write_interval=3600)
+    cache.set('npi_registry', 1, {'i': 1})
+    cache.set('npi_registry', 2, {'i': 2})
+    assert on_disk(path) == 0
+    assert cache.get('npi_registry', 1) == (True, {'i': 1})
+    cache.close()
+
+
+def test_lookups_flush_once_the_interval_has_passed(path, clock):
+    cache = LookupCache(path, clock=clock, write_interval=3600)
+    cache.set('npi_registry', 1, {'i': 1})
+    cache.get('npi_registry', 2)
+    assert on_disk(path) == 0
+    # No further set() is needed once the oldest pending entry is due
+    cache.write_interval = 0
+    cache.get('npi_registry', 2)
+    assert on_disk(path) == 1
+    cache.close()
+
+
+def test_invalidate_drops_pending_and_stored_entries(path, clock):
+    cache = LookupCache(path, clock=clock, write_interval=3600)
+    cache.set('npi_registry', 1, {'i': 1})
+    cache.set('npi_registry', 2, {'i': 2})
+    cache.flush()
+    cache.set('npi_registry', 3, {'i': 3})
+    cache.invalidate('npi_registry', 1)
+    cache.invalidate('npi_registry', 3)
+    cache.close()
+    assert on_disk(path) == 1
+
+
+def test_purge_expired_covers_pending_entries(path, clock):
+    cache = LookupCache(path, ttls={'npi_registry': 10}, clock=clock, write_interval=3600)
+    cache.set('npi_registry', 1, {'i': 1})
+    clock.now += 11
+    assert cache.purge_expired() == 1
+    cache.close()
+    assert on_disk(path) == 0
+
+
+def test_get_or_fetch_caches_results_but_not_errors(clock):
+    cache = LookupCache(clock=clock)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            raise TimeoutError
+        return {'ok': True}
+
+    async def run():
+        with pytest.raises(TimeoutError):
+            await cache.get_or_fetch('npi_registry', 1, fetch)
+        assert await cache.get_or_fetch('npi_registry', 1, fetch) == {'ok': True}
+        assert await cache.get_or_fetch('npi_registry', 1, fetch) == {'ok': True}
+
+    asyncio.run(run())
+    assert len(calls) == 2
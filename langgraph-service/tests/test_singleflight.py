@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from cache import LookupCache
+from singleflight import CoalescedLookups, SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'value'
+
+    async def run():
+        return await asyncio.gather(*(flights.do('key', fetch) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert [value for value, _ in results] == ['value'] * 5
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert len(calls) == 1
+    assert flights.stats()['coalesced'] == 4
+    assert len(flights) == 0
+
+
+def test_errors_reach_every_caller_and_clear_the_key():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('upstream')
+
+    async def ok():
+        return 'ok'
+
+    async def run():
+        results = await asyncio.gather(*(flights.do('key', fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(flights) == 0
+        assert await flights.do('key', ok) == ('ok', False)
+
+    asyncio.run(run())
+    assert flights.counters['errors'] == 1
+
+
+def test_a_cancelled_caller_leaves_the_work_running():
+    flights = SingleFlight()
+    release = None
+
+    async def fetch():
+        await release.wait()
+        return 'value'
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        first = asyncio.ensure_future(flights.do('key', fetch))
+        second = asyncio.ensure_future(flights.do('key', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == ('value', True)
+    assert flights.counters['executions'] == 1
+
+
+def test_a_timeout_frees_the_key_for_a_fresh_call():
+    flights = SingleFlight(timeout=0.01)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(10)
+        return 'value'
+
+    async def run():
+        results = await asyncio.gather(flights.do('key', fetch), flights.do('key', fetch), return_exceptions=True)
+        assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+        assert len(flights) == 0
+        return await flights.do('key', fetch)
+
+    assert asyncio.run(run()) == ('value', False)
+    assert len(calls) == 2
+
+
+def test_coalesced_lookups_fetch_once_and_cache():
+    cache = LookupCache()
+    lookups = CoalescedLookups(cache)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'npi': '1234567893'}
+
+    async def run():
+        first = await asyncio.gather(*(lookups.get_or_fetch('npi_registry', 1234567893, fetch) for _ in range(3)))
+        return first, await lookups.get_or_fetch('npi_registry', '1234567893', fetch)
+
+    first, later = asyncio.run(run())
+    assert first == [{'npi': '1234567893'}] * 3
+    assert later == {'npi': '1234567893'}
+    assert len(calls) == 1
@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+
+import pytest
+
+from db import connect
+from trust_learning import (DEFAULT_LEARNING_RATE, INITIAL_FAILURE_SCORE, INITIAL_SUCCESS_SCORE, TrustLearner,
+                            apply_outcomes, learn, outcomes_from_sources)
+
+# db puts the visualization package on the path
+from analytics.data_loader import FIXTURE_SCHEMA  # noqa: E402
+
+
+def sequential(outcomes, current):
+    """updateTrustScores' one-update-per-outcome EMA, as the reference"""
+    rows = {key: list(row) for key, row in current.items()}
+    for kind, field, success in outcomes:
+        row = rows.get((kind, field))
+        if row is None:
+            score = INITIAL_SUCCESS_SCORE if success else INITIAL_FAILURE_SCORE
+            rows[(kind, field)] = [score, int(success), int(not success), 1, DEFAULT_LEARNING_RATE]
+            continue
+        rate = row[4]
+        row[0] = row[0] * (1 - rate) + float(success) * rate
+        row[1] += int(success)
+        row[2] += int(not success)
+        row[3] += 1
+    return rows
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'trust.db')
+    conn = connect(path)
+    conn.executescript(FIXTURE_SCHEMA)
+    conn.close()
+    return path
+
+
+def scores(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {(row[0], row[1]): row[2:] for row in conn.execute(
+            'SELECT "sourceType", "dataField", "score", "successCount", "failureCount", "totalValidations" '
+            'FROM "TrustScore"')}
+    finally:
+        conn.close()
+
+
+def test_learn_matches_the_sequential_ema():
+    outcomes = [('npi_registry', 'name', s) for s in (True, False, True, True, False)]
+    outcomes += [('google_maps', 'address', s) for s in (False, True, True)]
+    outcomes += [('npi_registry', 'phone', s) for s in (True, True)]
+    current = {('npi_registry', 'name'): (0.6, 10, 5, 15, 0.2)}
+
+    expected = sequential(outcomes, current)
+    rows = learn(outcomes, current)
+    assert len(rows) == 3
+    for kind, field, score, successes, failures, total, rate in rows:
+        want = expected[(kind, field)]
+        assert score == pytest.approx(want[0], abs=1e-12)
+        assert (successes, failures, total, rate) == (want[1], want[2], want[3], want[4])
+
+
+def test_a_new_row_starts_from_its_first_outcome():
+    (row,) = learn([('npi_registry', 'name', False)], {})
+    assert row == ('npi_registry', 'name', INITIAL_FAILURE_SCORE, 0, 1, 1, DEFAULT_LEARNING_RATE)
+
+
+def test_apply_outcomes_inserts_then_updates(path):
+    conn = connect(path)
+    assert apply_outcomes(conn, [('npi_registry', 'name', True), ('npi_registry', 'phone', False)]) == 2
+    assert apply_outcomes(conn, [('npi_registry', 'name', False)]) == 1
+    conn.close()
+
+    rows = scores(path)
+    assert len(rows) == 2
+    score, successes, failures, total = rows[('npi_registry', 'name')]
+    assert score == pytest.approx(INITIAL_SUCCESS_SCORE * (1 - DEFAULT_LEARNING_RATE))
+    assert (successes, failures, total) == (1, 1, 2)
+    assert rows[('npi_registry', 'phone')][0] == pytest.approx(INITIAL_FAILURE_SCORE)
+
+
+def test_concurrent_learners_do_not_lose_updates(path):
+    batches, size = 8, 25
+
+    def learner():
+        conn = connect(path)
+        try:
+            for _ in range(batches):
+                apply_outcomes(conn, [('npi_registry', 'name', True)] * size)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=learner) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    _, successes, failures, total = scores(path)[('npi_registry', 'name')]
+    assert (successes, failures, total) == (4 * batches * size, 0, 4 * batches * size)
+
+
+def test_a_failed_flush_keeps_its_outcomes(tmp_path):
+    # No TrustScore table, so the write fails
+    learner = TrustLearner(connect(str(tmp_path / 'empty.db')), batch_size=100)
+    learner.observe([{'source': 'NPI Registry', 'status': 'success', 'confidence': 0.9}])
+    with pytest.raises(sqlite3.OperationalError):
+        learner.flush()
+    assert learner.pending == 4
+    assert learner.written == 0
+
+
+def test_outcomes_skip_timeouts_and_errors():
+    outcomes = outcomes_from_sources([
+        {'source': 'NPI Registry', 'status': 'success', 'confidence': 0.9},
+        {'source': 'Google Maps', 'status': 'success', 'confidence': 0.5},
+        {'name': 'State Board', 'status': 'timeout', 'confidence': 0.0},
+        {'name': 'State Board', 'status': 'error', 'confidence': 0.0},
+    ], fields=('name',))
+    assert outcomes == [('npi_registry', 'name', True), ('google_maps', 'name', False)]
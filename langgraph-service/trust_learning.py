@@ -0,0 +1,189 @@
+"""
+Trust score learning
+Folds a batch of validation outcomes into the TrustScore table in one pass:
+every (sourceType, dataField) row the batch touches is read with a single
+SELECT, advanced through all of its outcomes at once with the closed form of
+the learning-rate EMA, and written back with a single bulk upsert.
+
+Gives the scores MultiSourceValidationService.updateTrustScores would for
+the same outcomes, without a findUnique and update/create round trip per
+source and field.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+import numpy as np
+
+import db
+from graph import SCORED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Fields updateTrustScores maintains for every source
+TRUST_FIELDS = ('name', 'address', 'phone', 'specialty')
+# A source only counts as a success above this confidence
+SUCCESS_CONFIDENCE = 0.7
+# First observation of a (source, field) pair, and its learning rate
+INITIAL_SUCCESS_SCORE = 0.8
+INITIAL_FAILURE_SCORE = 0.3
+DEFAULT_LEARNING_RATE = 0.1
+
+COLUMNS = ('sourceType', 'dataField', 'score', 'successCount', 'failureCount', 'totalValidations',
+           'learningRate')
+_SELECT_COLUMNS = ', '.join(f'"{column}"' for column in COLUMNS)
+
+
+def source_type(name):
+    """'NPI Registry' -> 'npi_registry', the TrustScore.sourceType form"""
+    return '_'.join(name.lower().split())
+
+
+def outcomes_from_sources(sources, fields=TRUST_FIELDS):
+    """
+    (sourceType, dataField, success) for each field of each source result
+    that carries evidence. Takes orchestrator results ('source') or the
+    TypeScript service's ValidationSource objects ('name').
+
+    Timeouts and errors say nothing about the source's data, so unlike
+    updateTrustScores they are not learned as failures.
+    """
+    outcomes = []
+    for result in sources:
+        if result['status'] not in SCORED_STATUSES:
+            continue
+        success = result['status'] == 'success' and result['confidence'] > SUCCESS_CONFIDENCE
+        kind = source_type(result.get('source') or result['name'])
+        outcomes.extend((kind, field, success) for field in fields)
+    return outcomes
+
+
+def learn(outcomes, current):
+    """
+    New TrustScore rows after applying `outcomes` in order.
+
+    `outcomes` is a sequence of (sourceType, dataField, success); `current`
+    maps (sourceType, dataField) to the existing (score, successCount,
+    failureCount, totalValidations, learningRate). Returns one tuple per
+    pair touched, in COLUMNS order.
+
+    n outcomes x_1..x_n on a row with score s and learning rate a give
+        s * (1 - a)^n + a * sum(x_i * (1 - a)^(n - i))
+    which is what applying score = score * (1 - a) + x * a n times yields.
+    A new row starts from its first outcome's initial score instead.
+    """
+    index = {}
+    group = np.fromiter((index.setdefault((kind, field), len(index)) for kind, field, _ in outcomes),
+                        dtype=np.int64, count=len(outcomes))
+    x = np.fromiter((success for _, _, success in outcomes), dtype=np.float64, count=len(outcomes))
+    keys = list(index)
+    groups = len(keys)
+
+    n = np.bincount(group, minlength=groups)
+    # Position of each outcome within its pair, in arrival order
+    order = np.argsort(group, kind='stable')
+    rank = np.empty_like(group)
+    rank[order] = np.arange(len(group)) - np.repeat(np.cumsum(n) - n, n)
+
+    existing = [current.get(key) for key in keys]
+    new = np.array([row is None for row in existing])
+    score = np.array([row[0] if row else 0.0 for row in existing], dtype=np.float64)
+    rate = np.array([row[4] if row else DEFAULT_LEARNING_RATE for row in existing], dtype=np.float64)
+
+    first = order[np.cumsum(n) - n]
+    score[new] = np.where(x[first[new]] > 0, INITIAL_SUCCESS_SCORE, INITIAL_FAILURE_SCORE)
+    steps = n - new  # a new row's first outcome sets its score rather than updating it
+
+    decay = 1.0 - rate
+    terms = rate[group] * x * decay[group] ** (n[group] - 1 - rank)
+    terms[new[group] & (rank == 0)] = 0.0
+    score = score * decay ** steps + np.bincount(group, weights=terms, minlength=groups)
+
+    successes = np.bincount(group, weights=x, minlength=groups).astype(np.int64)
+    rows = []
+    for i, key in enumerate(keys):
+        prior = existing[i] or (0.0, 0, 0, 0, DEFAULT_LEARNING_RATE)
+        rows.append((*key, float(score[i]), int(prior[1] + successes[i]), int(prior[2] + n[i] - successes[i]),
+                     int(prior[3] + n[i]), float(rate[i])))
+    return rows
+
+
+def apply_outcomes(conn, outcomes, now=None):
+    """
+    Fold `outcomes` into the TrustScore table in one transaction and return
+    the number of rows written. The table is write-locked before it is read
+    (BEGIN IMMEDIATE on SQLite, SHARE ROW EXCLUSIVE on PostgreSQL), so
+    concurrent learners serialise instead of losing updates - including to
+    (sourceType, dataField) rows that don't exist yet, which a row lock
+    would not cover.
+    """
+    if not outcomes:
+        return 0
+    kinds = sorted({kind for kind, _, _ in outcomes})
+    now = (now or datetime.now(timezone.utc)).replace(tzinfo=None).isoformat(sep=' ', timespec='milliseconds')
+    cur = conn.cursor()
+    try:
+        # Conflicts with itself and with every other writer, but not with readers
+        cur.execute('BEGIN IMMEDIATE' if db.is_sqlite(conn) else 'LOCK TABLE "TrustScore" IN SHARE ROW EXCLUSIVE MODE')
+        cur.execute(f'SELECT {_SELECT_COLUMNS} FROM "TrustScore" '
+                    f'WHERE "sourceType" IN ({db.placeholders(conn, len(kinds))})', kinds)
+        current = {(row[0], row[1]): row[2:] for row in cur.fetchall()}
+        rows = learn(outcomes, current)
+
+        marks = f'({db.placeholders(conn, len(COLUMNS) + 1)})'
+        cur.execute(f'''
+            INSERT INTO "TrustScore" ("sourceType", "dataField", "score", "successCount", "failureCount",
+                                      "totalValidations", "learningRate", "lastUpdated")
+            VALUES {", ".join([marks] * len(rows))}
+            ON CONFLICT ("sourceType", "dataField") DO UPDATE SET
+                "score" = excluded."score",
+                "successCount" = excluded."successCount",
+                "failureCount" = excluded."failureCount",
+                "totalValidations" = excluded."totalValidations",
+                "lastUpdated" = excluded."lastUpdated"
+        ''', [value for row in rows for value in (*row, now)])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return len(rows)
+
+
+class TrustLearner:
+    """
+    Buffers validation outcomes and writes them to TrustScore every
+    `batch_size` outcomes: one database round trip per batch rather than
+    two per source and field of every validation.
+    """
+
+    def __init__(self, conn, batch_size=5000, fields=TRUST_FIELDS):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.fields = fields
+        self._outcomes = []
+        self.written = 0
+
+    @property
+    def pending(self):
+        return len(self._outcomes)
+
+    def observe(self, sources):
+        """Queue the source results of one validation; flushes once the batch is full"""
+        self._outcomes.extend(outcomes_from_sources(sources, self.fields))
+        if len(self._outcomes) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write every queued outcome; returns the number of TrustScore rows updated"""
+        outcomes, self._outcomes = self._outcomes, []
+        try:
+            updated = apply_outcomes(self.conn, outcomes)
+        except Exception:
+            # Keep them for the next flush rather than dropping what was learned
+            self._outcomes = outcomes + self._outcomes
+            raise
+        self.written += len(outcomes)
+        logger.debug('Learned %d outcomes into %d trust scores', len(outcomes), updated)
+        return updated
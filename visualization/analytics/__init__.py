@@ -0,0 +1,4 @@
+"""
+LampStack analytics helpers
+Shared rendering, caching and data utilities for the visualization scripts
+"""
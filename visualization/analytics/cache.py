@@ -0,0 +1,137 @@
+"""
+Incremental chart build cache
+Skips charts whose input data, style settings and drawing code are unchanged
+since the PNG was last written
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+
+from analytics.lazy import style_context
+
+MANIFEST_NAME = '.chart_manifest.json'
+ANALYTICS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def chart(output_name, inputs=(), style=None):
+    """
+    Declare the file a chart function writes, the data keys it reads and,
+    optionally, the matplotlib style it draws with.
+
+    Without a style the function itself is returned unchanged. With one, it
+    is wrapped so the style only applies while the chart renders (see
+    analytics.lazy.style_context). Either way decorated charts can still be
+    called directly or sent to worker processes.
+    """
+    def decorate(func):
+        if style is not None:
+            inner = func
+
+            @functools.wraps(inner)
+            def func(*args, **kwargs):
+                with style_context(style):
+                    return inner(*args, **kwargs)
+        func.output_name = output_name
+        func.inputs = tuple(inputs)
+        return func
+    return decorate
+
+
+def _json_default(value):
+    # numpy arrays and scalars, datetimes and anything else JSON can't encode
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def fingerprint(*parts):
+    """Stable SHA-256 of JSON-serialisable parts (dict key order ignored)"""
+    payload = json.dumps(parts, sort_keys=True, default=_json_default, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def package_fingerprint(directory=ANALYTICS_DIR):
+    """SHA-256 of the analytics package source every chart renders through"""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            with open(os.path.join(directory, name), 'rb') as f:
+                digest.update(name.encode('utf-8') + b'\0' + f.read())
+    return digest.hexdigest()
+
+
+def _source(func):
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return func.__qualname__
+
+
+def chart_sources(func):
+    """Source of a chart function and of the module-level helpers it calls"""
+    inner = inspect.unwrap(func)
+    helpers = {}
+    for name in inner.__code__.co_names:
+        value = inner.__globals__.get(name)
+        if (inspect.isfunction(value) and value.__module__ == inner.__module__
+                and not hasattr(value, 'output_name')):
+            helpers[name] = _source(value)
+    return _source(func), helpers
+
+
+class BuildCache:
+    """Manifest of chart fingerprints stored next to the rendered PNGs"""
+
+    def __init__(self, output_dir, style=None):
+        self.output_dir = output_dir
+        self.style = style or {}
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.package = package_fingerprint()
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def digest(self, func, data):
+        """
+        Fingerprint of the data slice, style and code a chart depends on: its
+        own source, the helpers it calls and the analytics package
+        """
+        data_slice = {key: data.get(key) for key in func.inputs}
+        return fingerprint(func.output_name, data_slice, self.style, chart_sources(func), self.package)
+
+    def is_fresh(self, func, digest):
+        """True if the chart's output exists and was built from the same inputs"""
+        return (self.entries.get(func.output_name) == digest
+                and os.path.exists(os.path.join(self.output_dir, func.output_name)))
+
+    def record(self, func, digest):
+        self.entries[func.output_name] = digest
+
+    def save(self):
+        """Write the manifest atomically so an interrupted run can't corrupt it"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def plan(self, chart_funcs, data, force=False):
+        """
+        Split charts into those that need rendering and those that are fresh.
+
+        Returns (stale, fresh, digests) where digests maps output name to the
+        fingerprint to record once the chart has rendered successfully.
+        """
+        stale, fresh, digests = [], [], {}
+        for func in chart_funcs:
+            digest = self.digest(func, data)
+            digests[func.output_name] = digest
+            if not force and self.is_fresh(func, digest):
+                fresh.append(func)
+            else:
+                stale.append(func)
+        return stale, fresh, digests
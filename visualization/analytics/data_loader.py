@@ -0,0 +1,339 @@
+"""
+Database-backed chart data
+Builds the REAL_VALIDATION_DATA structure from the Prisma tables
+(Provider, ValidationResult, TrustScore). Every query aggregates on the
+server with GROUP BY, so only summary rows leave the database no matter how
+many ValidationResult rows there are.
+"""
+
+import os
+import sqlite3
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from analytics.rollups import confidence_bucket_sql, rollup_totals
+from analytics.streaming import HIGH_CONFIDENCE, MEDIUM_CONFIDENCE, SCORE_BINS
+
+# Prisma stores snake_case identifiers; the charts use display names
+SOURCE_NAMES = {
+    'npi_registry': 'NPI Registry',
+    'google_maps': 'Google Maps',
+    'state_medical_board': 'State Medical Board',
+    'insurance_networks': 'Insurance Networks',
+    'hospital_affiliations': 'Hospital Affiliations',
+}
+
+FIELD_NAMES = {
+    'name': 'Name',
+    'specialty': 'Specialty',
+    'license': 'License',
+    'license_number': 'License',
+    'address': 'Address',
+    'phone': 'Phone',
+    'phone_number': 'Phone',
+}
+
+# Source success rates cover this many days of ValidationResult rollups
+DEFAULT_WINDOW_DAYS = 90
+
+
+def source_display_name(source_type):
+    return SOURCE_NAMES.get(source_type, source_type.replace('_', ' ').title())
+
+
+def field_display_name(data_field):
+    return FIELD_NAMES.get(data_field, data_field.replace('_', ' ').title())
+
+
+def connect(url=None):
+    """
+    Open a DB-API connection from a DATABASE_URL-style string.
+
+    `sqlite:///path` (or a bare *.db / :memory: path) uses the stdlib sqlite3
+    driver; anything else is treated as a PostgreSQL URL and needs psycopg.
+    """
+    url = url or os.environ.get('DATABASE_URL')
+    if not url:
+        raise ValueError('No database URL given and DATABASE_URL is not set')
+    if url.startswith('sqlite:///'):
+        return sqlite3.connect(url[len('sqlite:///'):])
+    if url == ':memory:' or url.endswith(('.db', '.sqlite', '.sqlite3')):
+        return sqlite3.connect(url)
+    try:
+        import psycopg
+    except ImportError:
+        raise ImportError('PostgreSQL support requires psycopg: pip install "psycopg[binary]"')
+    return psycopg.connect(url)
+
+
+def _placeholder(conn):
+    return '?' if isinstance(conn, sqlite3.Connection) else '%s'
+
+
+def _fetch(conn, sql, params=()):
+    cur = conn.cursor()
+    try:
+        cur.execute(sql.replace('?', _placeholder(conn)), params)
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+def _status_for(confidence):
+    if confidence >= HIGH_CONFIDENCE:
+        return 'HIGH_CONFIDENCE'
+    if confidence >= MEDIUM_CONFIDENCE:
+        return 'MEDIUM_CONFIDENCE'
+    return 'FLAGGED'
+
+
+def _ordered(names, preferred):
+    """Known names in their usual chart order, then anything new alphabetically"""
+    known = [n for n in preferred if n in names]
+    return known + sorted(n for n in names if n not in known)
+
+
+def load_validation_data(conn, defaults, provider_limit=10, window_days=DEFAULT_WINDOW_DAYS):
+    """
+    Fill the REAL_VALIDATION_DATA structure from the database.
+
+    `defaults` supplies what the schema doesn't record (field weights and
+    average response times). `validation_results` holds the
+    `provider_limit` most recently validated providers for the per-provider
+    charts; `provider_summary` carries status and histogram counts over all
+    of them. Source success rates come from the ValidationRollup rows of the
+    last `window_days` days (all of them when None); call
+    analytics.rollups.refresh_rollups() first to fold in new results. Each
+    source's 'results' is how many results the rate is over; sources with
+    none (or no TrustScore rows) report 0.0 rather than the sample figures.
+    """
+    # Field-level trust (TrustScore is unique per source/field already, the
+    # GROUP BY folds aliases like phone/phone_number together)
+    field_rows = _fetch(conn, '''
+        SELECT "sourceType", "dataField", AVG("score")
+        FROM "TrustScore"
+        GROUP BY "sourceType", "dataField"
+    ''')
+    source_trust_rows = _fetch(conn, '''
+        SELECT "sourceType", AVG("score")
+        FROM "TrustScore"
+        GROUP BY "sourceType"
+    ''')
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=window_days) if window_days is not None else None
+    result_rows = rollup_totals(conn, ('sourceType', 'status'), since=since)
+    status_rows = _fetch(conn, '''
+        SELECT CASE WHEN "overallConfidence" >= ? THEN 'HIGH_CONFIDENCE'
+                    WHEN "overallConfidence" >= ? THEN 'MEDIUM_CONFIDENCE'
+                    ELSE 'FLAGGED' END AS status,
+               COUNT(*), SUM("overallConfidence")
+        FROM "Provider"
+        WHERE "lastValidated" IS NOT NULL
+        GROUP BY 1
+    ''', (HIGH_CONFIDENCE, MEDIUM_CONFIDENCE))
+    # Histogram categories bucketed in the database, edges as in SCORE_BINS
+    bucket, bucket_params = confidence_bucket_sql('"overallConfidence"')
+    bin_rows = _fetch(conn, f'''
+        SELECT {bucket} AS bucket, COUNT(*)
+        FROM "Provider"
+        WHERE "lastValidated" IS NOT NULL
+        GROUP BY 1
+    ''', bucket_params)
+    provider_rows = _fetch(conn, '''
+        SELECT p."npiNumber", p."firstName", p."lastName", p."overallConfidence",
+               COUNT(DISTINCT CASE WHEN v."status" = 'success' THEN v."sourceType" END)
+        FROM (
+            SELECT "id", "npiNumber", "firstName", "lastName", "overallConfidence"
+            FROM "Provider"
+            WHERE "lastValidated" IS NOT NULL
+            ORDER BY "lastValidated" DESC
+            LIMIT ?
+        ) p
+        LEFT JOIN "ValidationResult" v ON v."providerId" = p."id"
+        GROUP BY p."id", p."npiNumber", p."firstName", p."lastName", p."overallConfidence"
+    ''', (provider_limit,))
+
+    default_sources = defaults['sources']
+    default_fields = list(defaults['field_weights'])
+
+    field_confidence = {}
+    for source_type, data_field, score in field_rows:
+        source = source_display_name(source_type)
+        field_confidence.setdefault(source, {})[field_display_name(data_field)] = float(score)
+
+    trust = {source_display_name(s): float(score) for s, score in source_trust_rows}
+    success = {}
+    for source_type, status, count, _ in result_rows:
+        total, ok = success.get(source_display_name(source_type), (0, 0))
+        success[source_display_name(source_type)] = (total + int(count), ok + int(count) * (status == 'success'))
+
+    source_names = _ordered(set(trust) | set(success), list(default_sources))
+    sources = {}
+    for source in source_names:
+        total, ok = success.get(source, (0, 0))
+        sources[source] = {
+            'trust_score': trust.get(source, 0.0),
+            'success_rate': ok / total if total else 0.0,
+            'results': total,
+            # Response times aren't persisted by the backend yet
+            'avg_response_ms': default_sources.get(source, {}).get('avg_response_ms', 0),
+        }
+
+    # Every source row needs every field for the heatmap and radar charts
+    fields = _ordered({f for row in field_confidence.values() for f in row}, default_fields)
+    field_confidence_by_source = {
+        source: {f: field_confidence.get(source, {}).get(f, 0.0) for f in fields}
+        for source in _ordered(set(field_confidence), list(default_sources))
+    }
+
+    validation_results = [
+        {
+            'npi': npi,
+            'name': f'{first} {last}',
+            'score': round(float(confidence) * 100, 1),
+            'status': _status_for(float(confidence)),
+            'sources_success': int(sources_success),
+        }
+        for npi, first, last, confidence, sources_success in provider_rows
+    ]
+
+    bin_counts = [0] * (len(SCORE_BINS) - 1)
+    for bucket, count in bin_rows:
+        bin_counts[int(bucket)] = int(count)
+
+    status_counts = {status: int(count) for status, count, _ in status_rows}
+    total = sum(status_counts.values())
+    score_sum = sum(float(s or 0) for _, _, s in status_rows)
+
+    return {
+        'sources': sources,
+        'field_weights': dict(defaults['field_weights']),
+        'field_confidence_by_source': field_confidence_by_source,
+        'validation_results': validation_results,
+        'provider_summary': {
+            'total': total,
+            'status_counts': status_counts,
+            'avg_score': score_sum / total * 100 if total else 0.0,
+            'bins': list(SCORE_BINS),
+            'bin_counts': bin_counts,
+        },
+    }
+
+
+def apply_latency(data, latency):
+    """
+    Copy of `data` with measured response times from a telemetry snapshot
+    (langgraph-service/telemetry.py) in place of the static avg_response_ms.
+    Sources the snapshot doesn't cover keep their existing numbers, and
+    sources the charts don't list are ignored.
+    """
+    sources = {name: dict(values) for name, values in data['sources'].items()}
+    for source_type, summary in latency.get('source', {}).items():
+        source = sources.get(source_display_name(source_type))
+        if source is None or not summary['count']:
+            continue
+        source['avg_response_ms'] = round(summary['mean_ms'])
+        for q in ('p50', 'p95', 'p99'):
+            source[f'{q}_response_ms'] = round(summary[f'{q}_ms'])
+    return {**data, 'sources': sources, 'stage_latency': latency.get('stage', {})}
+
+
+# ============================================================================
+# SQLite fixture - same tables/columns as the Prisma migrations
+# ============================================================================
+
+FIXTURE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS "Provider" (
+    "id" TEXT PRIMARY KEY,
+    "npiNumber" TEXT NOT NULL UNIQUE,
+    "firstName" TEXT NOT NULL,
+    "lastName" TEXT NOT NULL,
+    "lastValidated" TIMESTAMP,
+    "overallConfidence" DOUBLE PRECISION NOT NULL DEFAULT 0.0
+);
+CREATE TABLE IF NOT EXISTS "ValidationResult" (
+    "id" TEXT PRIMARY KEY,
+    "providerId" TEXT NOT NULL REFERENCES "Provider"("id") ON DELETE CASCADE,
+    "agentName" TEXT NOT NULL,
+    "validationType" TEXT NOT NULL,
+    "status" TEXT NOT NULL,
+    "confidence" DOUBLE PRECISION NOT NULL DEFAULT 0.0,
+    "sourceType" TEXT NOT NULL,
+    "validatedAt" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "ValidationResult_providerId_validatedAt_idx"
+    ON "ValidationResult"("providerId", "validatedAt");
+CREATE TABLE IF NOT EXISTS "TrustScore" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "sourceType" TEXT NOT NULL,
+    "dataField" TEXT NOT NULL,
+    "score" DOUBLE PRECISION NOT NULL DEFAULT 0.5,
+    "successCount" INTEGER NOT NULL DEFAULT 0,
+    "failureCount" INTEGER NOT NULL DEFAULT 0,
+    "totalValidations" INTEGER NOT NULL DEFAULT 0,
+    "learningRate" DOUBLE PRECISION NOT NULL DEFAULT 0.1,
+    "lastUpdated" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE ("sourceType", "dataField")
+);
+CREATE INDEX IF NOT EXISTS "ValidationResult_validatedAt_idx" ON "ValidationResult"("validatedAt");
+CREATE TABLE IF NOT EXISTS "ValidationRollup" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "granularity" TEXT NOT NULL,
+    "bucketStart" TIMESTAMP NOT NULL,
+    "sourceType" TEXT NOT NULL,
+    "status" TEXT NOT NULL,
+    "confidenceBucket" INTEGER NOT NULL,
+    "count" INTEGER NOT NULL DEFAULT 0,
+    "confidenceSum" DOUBLE PRECISION NOT NULL DEFAULT 0.0,
+    "updatedAt" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE ("granularity", "bucketStart", "sourceType", "status", "confidenceBucket")
+);
+CREATE INDEX IF NOT EXISTS "ValidationRollup_granularity_bucketStart_idx"
+    ON "ValidationRollup"("granularity", "bucketStart");
+CREATE TABLE IF NOT EXISTS "RollupWatermark" (
+    "name" TEXT PRIMARY KEY,
+    "watermark" TIMESTAMP NOT NULL,
+    "updatedAt" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+'''
+
+
+def create_fixture_database(data, path=':memory:'):
+    """
+    Create a SQLite stand-in for the production tables seeded from `data`
+    (a REAL_VALIDATION_DATA-shaped dict), for tests and local runs.
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript(FIXTURE_SCHEMA)
+
+    source_types = {v: k for k, v in SOURCE_NAMES.items()}
+    data_fields = {'Name': 'name', 'Specialty': 'specialty', 'License': 'license',
+                   'Address': 'address', 'Phone': 'phone'}
+
+    conn.executemany(
+        'INSERT INTO "TrustScore" ("sourceType", "dataField", "score") VALUES (?, ?, ?)',
+        [(source_types.get(source, source), data_fields.get(field, field.lower()), score)
+         for source, row in data['field_confidence_by_source'].items()
+         for field, score in row.items()])
+
+    now = datetime(2025, 12, 8, 12, 0, 0)
+    ordered_sources = sorted(data['sources'], key=lambda s: -data['sources'][s]['success_rate'])
+    providers, results = [], []
+    for i, r in enumerate(data['validation_results']):
+        provider_id = str(uuid.UUID(int=i + 1))
+        first, _, last = r['name'].partition(' ')
+        providers.append((provider_id, r['npi'], first, last,
+                          (now - timedelta(minutes=i)).isoformat(sep=' '), r['score'] / 100))
+        # The most reliable sources are the ones that succeeded
+        for j, source in enumerate(ordered_sources):
+            results.append((str(uuid.UUID(int=1000 + i * 10 + j)), provider_id, 'validator', 'multi_source',
+                            'success' if j < r['sources_success'] else 'failed',
+                            data['sources'][source]['trust_score'], source_types.get(source, source)))
+
+    conn.executemany(
+        'INSERT INTO "Provider" ("id", "npiNumber", "firstName", "lastName", "lastValidated", '
+        '"overallConfidence") VALUES (?, ?, ?, ?, ?, ?)', providers)
+    conn.executemany(
+        'INSERT INTO "ValidationResult" ("id", "providerId", "agentName", "validationType", '
+        '"status", "confidence", "sourceType") VALUES (?, ?, ?, ?, ?, ?, ?)', results)
+    conn.commit()
+    return conn
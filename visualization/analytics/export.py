@@ -0,0 +1,97 @@
+"""
+In-memory chart export
+Renders any chart function to PNG, SVG, WebP, JPEG or PDF bytes, or streams
+it to a file object, without writing the file the chart normally saves.
+Chart functions save through save_figure(), which writes to disk as before
+unless an export is in progress.
+"""
+
+import contextvars
+import io
+
+from analytics.lazy import plt
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'webp': 'image/webp',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'pdf': 'application/pdf',
+}
+
+# Thumbnails trade resolution for size: roughly 200-300px wide for most charts
+THUMBNAIL_DPI = 20
+
+_sink = contextvars.ContextVar('chart_export_sink', default=None)
+
+
+class _Sink:
+    def __init__(self, target, format, dpi, size):
+        self.target = target
+        self.format = format
+        self.dpi = dpi
+        self.size = size
+        self.saved = 0
+
+    def options(self, fig, savefig):
+        options = {**savefig, 'format': self.format}
+        if self.size is not None:
+            # Largest dpi at which the figure fits in width x height pixels
+            width, height = self.size
+            fig_width, fig_height = fig.get_size_inches()
+            options['dpi'] = min(width / fig_width, height / fig_height)
+        elif self.dpi is not None:
+            options['dpi'] = self.dpi
+        if self.format in ('jpg', 'jpeg'):
+            options.setdefault('pil_kwargs', {}).setdefault('quality', 90)
+        return options
+
+
+def save_figure(path, **savefig):
+    """
+    plt.savefig(path, **savefig) for the current figure, or, while a chart is
+    being exported, write it to the export target in the requested format.
+    """
+    sink = _sink.get()
+    if sink is None:
+        plt.savefig(path, **savefig)
+        return
+    fig = plt.gcf()
+    fig.savefig(sink.target, **sink.options(fig, savefig))
+    sink.saved += 1
+
+
+def stream_chart(func, target, data=None, format='png', dpi=None, size=None, thumbnail=False):
+    """
+    Run chart function `func` and write its figure to the binary file object
+    `target` instead of the chart's own output file.
+
+    `dpi` overrides the chart's resolution; `size=(width, height)` picks the
+    dpi that fits the figure in that many pixels (before the tight crop);
+    `thumbnail` renders at THUMBNAIL_DPI.
+    """
+    format = format.lower()
+    if format not in CONTENT_TYPES:
+        raise ValueError(f"unsupported format {format!r}; expected one of {', '.join(CONTENT_TYPES)}")
+    if thumbnail:
+        dpi, size = THUMBNAIL_DPI, None
+    sink = _Sink(target, format, dpi, size)
+    token = _sink.set(sink)
+    try:
+        if data is None:
+            func()
+        else:
+            func(data)
+    finally:
+        _sink.reset(token)
+    if not sink.saved:
+        raise RuntimeError(f'{func.__name__} did not save a figure through save_figure()')
+    return target
+
+
+def render_chart(func, data=None, format='png', dpi=None, size=None, thumbnail=False):
+    """Chart `func` rendered to bytes in `format` (see stream_chart for the options)"""
+    buffer = io.BytesIO()
+    stream_chart(func, buffer, data, format, dpi, size, thumbnail)
+    return buffer.getvalue()
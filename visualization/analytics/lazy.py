@@ -0,0 +1,63 @@
+"""
+Deferred imports for the plotting stack
+numpy, matplotlib and seaborn are imported on first use rather than when a
+chart module is imported, and pyplot comes up on the headless Agg backend
+"""
+
+import importlib
+import os
+
+
+def use_headless_backend():
+    """Pick Agg before pyplot loads, unless MPLBACKEND asks for something else"""
+    if not os.environ.get('MPLBACKEND'):
+        import matplotlib
+        matplotlib.use('Agg')
+
+
+class LazyModule:
+    """
+    Stand-in for a module that imports it on first attribute access.
+
+    Looked-up attributes are cached on the proxy, so after the first call
+    `np.zeros` costs the same as it would on the real module.
+    """
+
+    def __init__(self, name, before_import=None):
+        self.__dict__['_name'] = name
+        self.__dict__['_before_import'] = before_import
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            if self._before_import is not None:
+                self._before_import()
+            module = importlib.import_module(self._name)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+np = LazyModule('numpy')
+plt = LazyModule('matplotlib.pyplot', before_import=use_headless_backend)
+mpatches = LazyModule('matplotlib.patches', before_import=use_headless_backend)
+sns = LazyModule('seaborn', before_import=use_headless_backend)
+
+
+def style_context(style):
+    """
+    Matplotlib style scoped to a with-block; rcParams are restored on exit.
+    `style` is anything plt.style.context accepts, or a callable returning it.
+    """
+    if callable(style):
+        style = style()
+    return plt.style.context(style)
@@ -0,0 +1,106 @@
+"""
+Parallel chart rendering
+Runs chart functions in separate worker processes with a per-chart timeout
+"""
+
+import multiprocessing as mp
+from multiprocessing.connection import wait
+import os
+import time
+
+
+def _render_worker(func, args, conn):
+    """Render one chart inside a worker process and report back over a pipe"""
+    # Worker processes never need an interactive backend
+    os.environ['MPLBACKEND'] = 'Agg'
+    start = time.perf_counter()
+    try:
+        func(*args)
+        conn.send(('ok', time.perf_counter() - start, None))
+    except Exception as e:
+        conn.send(('error', time.perf_counter() - start, f'{type(e).__name__}: {e}'))
+    finally:
+        conn.close()
+
+
+def render_serial(chart_funcs, args=()):
+    """Render charts one after another in this process, timing each one"""
+    results = []
+    for func in chart_funcs:
+        start = time.perf_counter()
+        try:
+            func(*args)
+            status, error = 'ok', None
+        except Exception as e:
+            status, error = 'error', f'{type(e).__name__}: {e}'
+        results.append({'chart': func.__name__, 'status': status,
+                        'seconds': time.perf_counter() - start, 'error': error})
+    return results
+
+
+def render_parallel(chart_funcs, workers=None, timeout=None, args=()):
+    """
+    Render charts concurrently, at most `workers` at a time.
+
+    Each chart runs in its own process so a chart that exceeds `timeout`
+    seconds can be terminated without affecting the others. Returns one
+    result dict per chart (in input order) with status 'ok', 'error' or
+    'timeout' and the measured wall time.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = list(enumerate(chart_funcs))
+    running = {}  # pipe reader -> (index, func, process, started)
+    results = [None] * len(pending)
+
+    while pending or running:
+        while pending and len(running) < workers:
+            index, func = pending.pop(0)
+            reader, writer = mp.Pipe(duplex=False)
+            proc = mp.Process(target=_render_worker, args=(func, args, writer), daemon=True)
+            proc.start()
+            writer.close()
+            running[reader] = (index, func, proc, time.perf_counter())
+
+        # Sleep until a chart finishes or the earliest deadline passes
+        wait_for = None
+        if timeout is not None:
+            earliest = min(started for _, _, _, started in running.values())
+            wait_for = max(0.0, earliest + timeout - time.perf_counter())
+        ready = wait(list(running), timeout=wait_for)
+
+        now = time.perf_counter()
+        for reader in list(running):
+            index, func, proc, started = running[reader]
+            if reader in ready:
+                try:
+                    status, seconds, error = reader.recv()
+                except EOFError:
+                    status, seconds = 'error', now - started
+                    error = f'worker exited with code {proc.exitcode}'
+            elif timeout is not None and now - started >= timeout:
+                proc.terminate()
+                status, seconds, error = 'timeout', now - started, f'exceeded {timeout:g}s'
+            else:
+                continue
+            proc.join()
+            reader.close()
+            del running[reader]
+            results[index] = {'chart': func.__name__, 'status': status,
+                              'seconds': seconds, 'error': error}
+
+    return results
+
+
+def print_timings(results, total_seconds):
+    """Print a per-chart wall time report"""
+    print()
+    print(f"{'Chart':<40} {'Status':<8} {'Time':>8}")
+    print("-" * 58)
+    for r in results:
+        print(f"{r['chart']:<40} {r['status']:<8} {r['seconds']:>7.2f}s")
+        if r['error']:
+            print(f"    {r['error']}")
+    print("-" * 58)
+    busy = sum(r['seconds'] for r in results)
+    print(f"{'Total wall time':<49} {total_seconds:>7.2f}s")
+    print(f"{'Sum of chart times':<49} {busy:>7.2f}s")
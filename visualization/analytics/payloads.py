@@ -0,0 +1,108 @@
+"""
+Pre-aggregated chart data for browser-side rendering
+Reduces chart data to the handful of numbers each dashboard chart draws
+(source scores, status counts, histogram bins, the trust matrix) as compact
+column-oriented JSON. Each section carries a short content hash, so a client
+that already holds a section is only sent the ones that changed.
+"""
+
+import gzip
+import json
+import math
+
+from analytics.cache import fingerprint
+from analytics.streaming import provider_summary
+from analytics.trust_matrix import TrustMatrix
+
+PAYLOAD_VERSION = 1
+SECTION_HASH_LENGTH = 12
+# Scores are drawn as percentages; three decimals is well below a pixel
+PRECISION = 3
+
+
+def _number(value, digits=PRECISION):
+    # NaN (e.g. the mean of a field no source scored) isn't valid JSON; send null
+    value = float(value)
+    return round(value, digits) if math.isfinite(value) else None
+
+
+def _round(values, digits=PRECISION):
+    return [_number(v, digits) for v in values]
+
+
+def dashboard_sections(data):
+    """The dashboard's chart data as {section: columns}"""
+    summary = provider_summary(data)
+    trust = TrustMatrix.from_nested(data['field_confidence_by_source'], fields=list(data['field_weights']))
+    sources = data['sources']
+    names = list(sources)
+    status_counts = summary['status_counts']
+    return {
+        'sources': {
+            'names': names,
+            'trust': _round(sources[s]['trust_score'] for s in names),
+            'success': _round(sources[s]['success_rate'] for s in names),
+            'response_ms': _round((sources[s]['avg_response_ms'] for s in names), 1),
+        },
+        'fields': {
+            'names': trust.fields,
+            'weights': _round(data['field_weights'][f] for f in trust.fields),
+            'confidence': _round(trust.field_means()),
+        },
+        'trust_matrix': {
+            'sources': trust.sources,
+            'fields': trust.fields,
+            'values': [_round(row) for row in trust.values],
+        },
+        'histogram': {
+            'bins': _round(summary.get('bins', ()), 2),
+            'counts': [int(c) for c in summary.get('bin_counts', ())],
+        },
+        'status': {
+            'labels': list(status_counts),
+            'counts': [int(c) for c in status_counts.values()],
+        },
+        'totals': {
+            'providers': int(summary['total']),
+            'sources': len(names),
+            'avg_score': _number(summary['avg_score'], 2),
+            'avg_trust': round(sum(s['trust_score'] for s in sources.values()) / len(names), 4) if names else 0.0,
+        },
+    }
+
+
+def dashboard_payload(data):
+    """
+    {'v', 'version', 'hashes', 'sections'} for chart data `data`.
+
+    `hashes` maps each section to a hash of its contents; `version` changes
+    whenever any section does.
+    """
+    sections = dashboard_sections(data)
+    hashes = {name: fingerprint(name, section)[:SECTION_HASH_LENGTH] for name, section in sections.items()}
+    return {
+        'v': PAYLOAD_VERSION,
+        'version': fingerprint(hashes)[:SECTION_HASH_LENGTH],
+        'hashes': hashes,
+        'sections': sections,
+    }
+
+
+def delta_payload(payload, since=()):
+    """
+    `payload` with only the sections whose hash is not in `since` (the
+    hashes a client already holds). 'delta' is true when sections were left out.
+    """
+    known = set(since)
+    sections = {name: section for name, section in payload['sections'].items()
+                if payload['hashes'][name] not in known}
+    return {**payload, 'sections': sections, 'delta': len(sections) < len(payload['sections'])}
+
+
+def encode_payload(payload, compress=False):
+    """Compact UTF-8 JSON bytes, gzipped (reproducibly) when `compress` is set"""
+    body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False, allow_nan=False).encode('utf-8')
+    if compress:
+        # mtime=0 so the same payload always gzips to the same bytes
+        body = gzip.compress(body, compresslevel=9, mtime=0)
+    return body
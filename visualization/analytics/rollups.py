@@ -0,0 +1,224 @@
+"""
+Incremental ValidationResult rollups
+Keeps per-hour and per-day counts of ValidationResult by sourceType, status
+and confidence bucket in the ValidationRollup table. Each refresh folds in
+only the results recorded since the last one (tracked in RollupWatermark),
+so charts over a 90-day window read a few thousand rollup rows instead of
+every raw result.
+
+Results that arrive with a validatedAt already behind the watermark
+(backfills, imports, transactions that commit more than SETTLE_SECONDS
+late) are missed by a refresh; rollup_gap() spots them by comparing raw and
+rolled-up counts, and rebuild_rollups(since=...) re-aggregates the window.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from analytics.streaming import SCORE_BINS
+
+GRANULARITIES = ('hour', 'day')
+WATERMARK_NAME = 'ValidationResult'
+EPOCH = datetime(1970, 1, 1)
+# Results committed this long after their validatedAt are still picked up;
+# later ones need rebuild_rollups() (see rollup_gap())
+SETTLE_SECONDS = 60
+# Hourly rows only serve the partial first day of a window
+HOURLY_RETENTION_DAYS = 14
+
+_BUCKET_SQL = {
+    'sqlite': {'hour': "strftime('%Y-%m-%d %H:00:00', \"validatedAt\")",
+               'day': "strftime('%Y-%m-%d 00:00:00', \"validatedAt\")"},
+    'postgres': {'hour': 'date_trunc(\'hour\', "validatedAt")',
+                 'day': 'date_trunc(\'day\', "validatedAt")'},
+}
+
+
+def _dialect(conn):
+    return 'sqlite' if isinstance(conn, sqlite3.Connection) else 'postgres'
+
+
+def _sql(conn, sql):
+    return sql if _dialect(conn) == 'sqlite' else sql.replace('?', '%s')
+
+
+def _fetch(conn, sql, params=()):
+    cur = conn.cursor()
+    try:
+        cur.execute(_sql(conn, sql), params)
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+def _timestamp(value):
+    return value.isoformat(sep=' ', timespec='seconds')
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def confidence_bucket_sql(column):
+    """SQL CASE giving the SCORE_BINS category of a 0-1 confidence `column`, plus its parameters"""
+    cases = ' '.join(f'WHEN {column} * 100 < ? THEN {i}' for i in range(len(SCORE_BINS) - 2))
+    return f'CASE {cases} ELSE {len(SCORE_BINS) - 2} END', tuple(SCORE_BINS[1:-1])
+
+
+def _fold(cur, conn, start, end, include_start=False):
+    """Add the results validated in (start, end] ([start, end] with include_start) to the rollups"""
+    lower = '>=' if include_start else '>'
+    cur.execute(_sql(conn, f'SELECT COUNT(*) FROM "ValidationResult" '
+                           f'WHERE "validatedAt" {lower} ? AND "validatedAt" <= ?'), (start, end))
+    folded = cur.fetchone()[0]
+    if folded:
+        bucket, bucket_params = confidence_bucket_sql('"confidence"')
+        for granularity in GRANULARITIES:
+            cur.execute(_sql(conn, f'''
+                INSERT INTO "ValidationRollup" ("granularity", "bucketStart", "sourceType", "status",
+                                                "confidenceBucket", "count", "confidenceSum", "updatedAt")
+                SELECT '{granularity}', {_BUCKET_SQL[_dialect(conn)][granularity]}, "sourceType", "status",
+                       {bucket}, COUNT(*), SUM("confidence"), CURRENT_TIMESTAMP
+                FROM "ValidationResult"
+                WHERE "validatedAt" {lower} ? AND "validatedAt" <= ?
+                GROUP BY 2, 3, 4, 5
+                ON CONFLICT ("granularity", "bucketStart", "sourceType", "status", "confidenceBucket")
+                DO UPDATE SET
+                    "count" = "ValidationRollup"."count" + excluded."count",
+                    "confidenceSum" = "ValidationRollup"."confidenceSum" + excluded."confidenceSum",
+                    "updatedAt" = excluded."updatedAt"
+            '''), (*bucket_params, start, end))
+    return folded
+
+
+def _expire_hourly(cur, conn, now):
+    cutoff = _timestamp((now - timedelta(days=HOURLY_RETENTION_DAYS)).replace(minute=0, second=0, microsecond=0))
+    cur.execute(_sql(conn, 'DELETE FROM "ValidationRollup" WHERE "granularity" = ? AND "bucketStart" < ?'),
+                ('hour', cutoff))
+
+
+def _lock_watermark(cur, conn):
+    """Begin the transaction with the watermark row locked; returns the watermark"""
+    sqlite = _dialect(conn) == 'sqlite'
+    if sqlite:
+        cur.execute('BEGIN IMMEDIATE')
+    cur.execute(_sql(conn, 'INSERT INTO "RollupWatermark" ("name", "watermark") VALUES (?, ?) '
+                           'ON CONFLICT ("name") DO NOTHING'), (WATERMARK_NAME, _timestamp(EPOCH)))
+    cur.execute(_sql(conn, 'SELECT "watermark" FROM "RollupWatermark" WHERE "name" = ?'
+                           + ('' if sqlite else ' FOR UPDATE')), (WATERMARK_NAME,))
+    watermark = cur.fetchone()[0]
+    return _timestamp(watermark) if isinstance(watermark, datetime) else watermark
+
+
+def refresh_rollups(conn, now=None, settle_seconds=SETTLE_SECONDS):
+    """
+    Fold ValidationResult rows recorded since the last refresh into the
+    hourly and daily rollups. Returns the number of results folded in.
+
+    Runs in one transaction with the watermark row locked, so concurrent
+    refreshes never count a result twice.
+    """
+    now = now or _utcnow()
+    upto = _timestamp(now - timedelta(seconds=settle_seconds))
+    cur = conn.cursor()
+    try:
+        since = _lock_watermark(cur, conn)
+        folded = _fold(cur, conn, since, upto)
+        cur.execute(_sql(conn, 'UPDATE "RollupWatermark" SET "watermark" = ?, "updatedAt" = CURRENT_TIMESTAMP '
+                               'WHERE "name" = ?'), (upto, WATERMARK_NAME))
+        _expire_hourly(cur, conn, now)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return folded
+
+
+def rebuild_rollups(conn, now=None, since=None):
+    """
+    Re-aggregate ValidationResult into the rollups: all of it, or with
+    `since` only the days from since's up to the watermark, which repairs
+    a window that missed late-arriving results. Returns the number of
+    results aggregated.
+    """
+    if since is None:
+        cur = conn.cursor()
+        try:
+            cur.execute('DELETE FROM "ValidationRollup"')
+            cur.execute(_sql(conn, 'DELETE FROM "RollupWatermark" WHERE "name" = ?'), (WATERMARK_NAME,))
+            conn.commit()
+        finally:
+            cur.close()
+        return refresh_rollups(conn, now)
+
+    start = _timestamp(since.replace(hour=0, minute=0, second=0, microsecond=0))
+    cur = conn.cursor()
+    try:
+        watermark = _lock_watermark(cur, conn)
+        cur.execute(_sql(conn, 'DELETE FROM "ValidationRollup" WHERE "bucketStart" >= ?'), (start,))
+        rebuilt = _fold(cur, conn, start, watermark, include_start=True)
+        _expire_hourly(cur, conn, now or _utcnow())
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return rebuilt
+
+
+def rollup_gap(conn, since, pending=False, now=None):
+    """
+    (raw, rolled_up) ValidationResult counts from since's day up to the
+    watermark. They differ when results arrived after the watermark had
+    passed their validatedAt; rebuild_rollups(conn, since=since) fixes it.
+    With `pending`, raw also counts the results a refresh now would fold
+    in, so any difference means the rollups are behind.
+    """
+    start = _timestamp(since.replace(hour=0, minute=0, second=0, microsecond=0))
+    if pending:
+        upto = _timestamp((now or _utcnow()) - timedelta(seconds=SETTLE_SECONDS))
+        raw = _fetch(conn, 'SELECT COUNT(*) FROM "ValidationResult" WHERE "validatedAt" >= ? AND "validatedAt" <= ?',
+                     (start, upto))[0][0]
+    else:
+        watermark = _fetch(conn, 'SELECT "watermark" FROM "RollupWatermark" WHERE "name" = ?', (WATERMARK_NAME,))
+        if not watermark:
+            return 0, 0
+        watermark = watermark[0][0]
+        watermark = _timestamp(watermark) if isinstance(watermark, datetime) else watermark
+        raw = _fetch(conn, 'SELECT COUNT(*) FROM "ValidationResult" WHERE "validatedAt" >= ? AND "validatedAt" <= ?',
+                     (start, watermark))[0][0]
+    rolled = _fetch(conn, 'SELECT SUM("count") FROM "ValidationRollup" WHERE "granularity" = ? AND "bucketStart" >= ?',
+                    ('day', start))[0][0]
+    return int(raw), int(rolled or 0)
+
+
+def rollup_totals(conn, group_by=('sourceType',), since=None, now=None):
+    """
+    (*group_by values, count, confidenceSum) rows summed over the rollups for
+    results validated after `since` (all of them when None).
+
+    Whole days come from the daily rollups and the partial first day from
+    the hourly ones, so a 90-day window reads ~90 buckets per group.
+    """
+    columns = ', '.join(f'"{column}"' for column in group_by)
+    select = f'SELECT {columns}, SUM("count"), SUM("confidenceSum") FROM "ValidationRollup"'
+    group = f'GROUP BY {columns}'
+    if since is None:
+        return _fetch(conn, f'{select} WHERE "granularity" = ? {group}', ('day',))
+
+    now = now or _utcnow()
+    hour = since.replace(minute=0, second=0, microsecond=0)
+    day = hour.replace(hour=0)
+    if hour != day and since >= now - timedelta(days=HOURLY_RETENTION_DAYS):
+        first_full_day = day + timedelta(days=1)
+        return _fetch(conn, f'''
+            {select}
+            WHERE ("granularity" = ? AND "bucketStart" >= ?)
+               OR ("granularity" = ? AND "bucketStart" >= ? AND "bucketStart" < ?)
+            {group}
+        ''', ('day', _timestamp(first_full_day), 'hour', _timestamp(hour), _timestamp(first_full_day)))
+    # Day-aligned, or older than the hourly rows: whole days
+    return _fetch(conn, f'{select} WHERE "granularity" = ? AND "bucketStart" >= ? {group}', ('day', _timestamp(day)))
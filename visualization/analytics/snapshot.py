@@ -0,0 +1,253 @@
+"""
+Columnar validation history snapshots
+A snapshot is a directory of raw column files plus a meta.json describing
+them. Columns are plain fixed-width arrays (NPI as 10-byte strings, scores as
+float32, status and source as uint8 codes, validatedAt as int64 milliseconds
+since the epoch), so opening one is a numpy.memmap per column: no parsing, no
+copying, and the OS pages in only what a computation touches.
+
+    with SnapshotWriter('history.snapshot') as writer:
+        writer.append_records(rows)
+    snap = open_snapshot('history.snapshot')
+    snap.status_counts()
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+from datetime import datetime, timezone
+
+from analytics.lazy import np
+from analytics.streaming import SCORE_BINS, LatestResults, ValidationAggregator
+
+FORMAT = 'lampstack-validation-snapshot'
+FORMAT_VERSION = 1
+META_NAME = 'meta.json'
+
+COLUMNS = {
+    'npi': 'S10',
+    'score': '<f4',
+    'status': 'u1',
+    'source': 'u1',
+    'validated_at': '<i8',
+}
+# Columns stored as codes into meta.json's label lists
+CODED_COLUMNS = ('status', 'source')
+MAX_CODES = 256
+# Rows processed per step when computing over a snapshot
+CHUNK_ROWS = 4_000_000
+
+
+def is_snapshot(path):
+    return os.path.isfile(os.path.join(path, META_NAME))
+
+
+def _epoch_ms(value):
+    """Milliseconds since the epoch for a datetime (naive = UTC), ISO string or number"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+class SnapshotWriter:
+    """
+    Appends validation results to a new snapshot column by column.
+
+    Files are written into `<path>.tmp` and moved into place on close(), so
+    readers never see a half-written snapshot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._tmp = f'{os.path.normpath(path)}.tmp'
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        os.makedirs(self._tmp)
+        self._files = {name: open(os.path.join(self._tmp, f'{name}.bin'), 'wb') for name in COLUMNS}
+        self._codes = {name: {} for name in CODED_COLUMNS}
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _encode(self, column, labels):
+        codes = self._codes[column]
+        labels = np.asarray(labels)
+        if labels.dtype.kind not in 'US':
+            labels = labels.astype(str)
+        unique, inverse = np.unique(labels, return_inverse=True)
+        for label in unique.tolist():
+            if label not in codes:
+                if len(codes) >= MAX_CODES:
+                    raise ValueError(f'more than {MAX_CODES} distinct {column} values')
+                codes[label] = len(codes)
+        lookup = np.array([codes[label] for label in unique.tolist()], dtype=np.uint8)
+        return lookup[inverse]
+
+    def append(self, npi, score, status, source, validated_at):
+        """Append one chunk of columns (equal-length sequences or arrays)"""
+        score = np.asarray(score, dtype=COLUMNS['score'])
+        n = len(score)
+        columns = {
+            'npi': np.asarray(npi, dtype=COLUMNS['npi']),
+            'score': score,
+            'status': self._encode('status', status),
+            'source': self._encode('source', source),
+            'validated_at': (np.asarray(validated_at, dtype=COLUMNS['validated_at'])
+                             if isinstance(validated_at, np.ndarray) and validated_at.dtype.kind in 'iu'
+                             else np.fromiter((_epoch_ms(v) for v in validated_at), dtype=COLUMNS['validated_at'],
+                                              count=n)),
+        }
+        for name, values in columns.items():
+            if len(values) != n:
+                raise ValueError(f'column {name} has {len(values)} rows, expected {n}')
+            self._files[name].write(np.ascontiguousarray(values, dtype=COLUMNS[name]).tobytes())
+        self.rows += n
+        return self
+
+    def append_records(self, records, score_field='score', status_field='status', source_field='source',
+                       npi_field='npi', time_field='validatedAt'):
+        """Append a chunk of result dicts"""
+        return self.append([r[npi_field] for r in records], [float(r[score_field]) for r in records],
+                           [r[status_field] for r in records], [r.get(source_field, '') for r in records],
+                           [r.get(time_field) for r in records])
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        meta = {
+            'format': FORMAT,
+            'version': FORMAT_VERSION,
+            'rows': self.rows,
+            'columns': COLUMNS,
+            'codes': {name: list(codes) for name, codes in self._codes.items()},
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        with open(os.path.join(self._tmp, META_NAME), 'w') as f:
+            json.dump(meta, f, indent=2)
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+class Snapshot:
+    """Read-only view of a snapshot; every column is a numpy.memmap"""
+
+    def __init__(self, path):
+        with open(os.path.join(path, META_NAME)) as f:
+            meta = json.load(f)
+        if meta.get('format') != FORMAT or meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f'{path} is not a version {FORMAT_VERSION} validation snapshot')
+        self.path = path
+        self.meta = meta
+        self.rows = meta['rows']
+        self.codes = meta['codes']
+        self.columns = {}
+        for name, dtype in meta['columns'].items():
+            file = os.path.join(path, f'{name}.bin')
+            # np.memmap refuses empty files
+            self.columns[name] = (np.memmap(file, dtype=dtype, mode='r', shape=(self.rows,)) if self.rows
+                                  else np.empty(0, dtype=dtype))
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def code(self, column, label):
+        """The uint8 code of `label` in a coded column, or None if it never occurs"""
+        labels = self.codes[column]
+        return labels.index(label) if label in labels else None
+
+    def decode(self, column, codes):
+        return np.asarray(self.codes[column], dtype=object)[np.asarray(codes)]
+
+    def between(self, start=None, end=None):
+        """Row slice validated in [start, end), assuming the snapshot is in time order"""
+        times = self.columns['validated_at']
+        lo = 0 if start is None else int(np.searchsorted(times, _epoch_ms(start), side='left'))
+        hi = self.rows if end is None else int(np.searchsorted(times, _epoch_ms(end), side='left'))
+        return slice(lo, hi)
+
+    def _chunks(self, rows=None):
+        rows = rows or slice(0, self.rows)
+        for start in range(rows.start, rows.stop, CHUNK_ROWS):
+            yield slice(start, min(start + CHUNK_ROWS, rows.stop))
+
+    def counts(self, column, rows=None):
+        """{label: count} for a coded column"""
+        counts = np.zeros(len(self.codes[column]), dtype=np.int64)
+        for chunk in self._chunks(rows):
+            counts += np.bincount(self.columns[column][chunk], minlength=len(counts))
+        return dict(zip(self.codes[column], counts.tolist()))
+
+    def status_counts(self, rows=None):
+        return self.counts('status', rows)
+
+    def aggregator(self, rows=None, bins=SCORE_BINS):
+        """ValidationAggregator over the individual results in `rows` (all by default)"""
+        aggregator = ValidationAggregator(bins=bins)
+        for chunk in self._chunks(rows):
+            aggregator.update(self.columns['score'][chunk])
+        aggregator.status_counts = {label: count for label, count in self.status_counts(rows).items() if count}
+        return aggregator
+
+    def latest(self, rows=None):
+        """LatestResults over `rows`: each provider's most recent result per source"""
+        latest = LatestResults()
+        for chunk in self._chunks(rows):
+            latest.update(self.columns['npi'][chunk], self.columns['source'][chunk], self.columns['score'][chunk],
+                          self.columns['validated_at'][chunk])
+        return latest
+
+    def summary(self, rows=None, bins=SCORE_BINS):
+        """data['provider_summary'] for the histogram and status charts, one entry per provider"""
+        return self.latest(rows).aggregator(bins).summary()
+
+
+def open_snapshot(path):
+    return Snapshot(path)
+
+
+def export_validation_results(conn, path, chunk_rows=100_000):
+    """
+    Write every ValidationResult (with its provider's NPI) to a snapshot at
+    `path`, in validatedAt order, streaming `chunk_rows` rows at a time.
+    Returns the number of rows written.
+    """
+    # A named (server-side) cursor keeps PostgreSQL from sending every row at once
+    cur = conn.cursor() if isinstance(conn, sqlite3.Connection) else conn.cursor(name='snapshot_export')
+    try:
+        cur.execute('''
+            SELECT p."npiNumber", v."confidence" * 100, v."status", v."sourceType", v."validatedAt"
+            FROM "ValidationResult" v
+            JOIN "Provider" p ON p."id" = v."providerId"
+            ORDER BY v."validatedAt"
+        ''')
+        with SnapshotWriter(path) as writer:
+            while True:
+                rows = cur.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                npi, score, status, source, validated_at = zip(*rows)
+                writer.append(npi, score, status, source, validated_at)
+    finally:
+        cur.close()
+    return writer.rows
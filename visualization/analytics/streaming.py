@@ -0,0 +1,233 @@
+"""
+Streaming aggregation of validation results
+Keeps fixed-bin histograms, status counts and running score statistics in
+constant memory, so charts can be drawn from millions of results without
+materialising them as Python lists
+"""
+
+import csv
+import json
+
+from analytics.lazy import np
+
+# Same category edges as the trust score histogram charts
+SCORE_BINS = (0, 30, 50, 70, 85, 100)
+# Provider status cut-offs on the backend's 0-1 confidence scale
+HIGH_CONFIDENCE = 0.85
+MEDIUM_CONFIDENCE = 0.50
+
+
+def status_for_scores(scores):
+    """HIGH_CONFIDENCE / MEDIUM_CONFIDENCE / FLAGGED for each 0-100 provider score"""
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.where(scores >= HIGH_CONFIDENCE * 100, 'HIGH_CONFIDENCE',
+                    np.where(scores >= MEDIUM_CONFIDENCE * 100, 'MEDIUM_CONFIDENCE', 'FLAGGED'))
+
+
+class ValidationAggregator:
+    """
+    Mergeable summary of validation scores (0-100) and statuses.
+
+    Quantiles come from a fine fixed-width histogram (`resolution` points
+    wide), so they are exact to within one fine bin and memory never grows
+    with the number of results.
+    """
+
+    def __init__(self, bins=SCORE_BINS, resolution=0.1, score_range=(0.0, 100.0)):
+        self.bins = np.asarray(bins, dtype=np.float64)
+        self.bin_counts = np.zeros(len(self.bins) - 1, dtype=np.int64)
+        self.low, self.high = score_range
+        self.resolution = resolution
+        self.fine_counts = np.zeros(int(round((self.high - self.low) / resolution)), dtype=np.int64)
+        self.status_counts = {}
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, scores, statuses=None):
+        """Fold one chunk of scores (and optionally their statuses) into the summary"""
+        scores = np.asarray(scores, dtype=np.float64)
+        if scores.size:
+            self.bin_counts += np.histogram(scores, bins=self.bins)[0]
+
+            fine = np.floor((scores - self.low) / self.resolution).astype(np.int64)
+            np.clip(fine, 0, len(self.fine_counts) - 1, out=fine)
+            self.fine_counts += np.bincount(fine, minlength=len(self.fine_counts))
+
+            # Chan et al. parallel update of the running mean and variance
+            n, chunk_mean = scores.size, scores.mean()
+            chunk_m2 = ((scores - chunk_mean) ** 2).sum()
+            total = self.count + n
+            delta = chunk_mean - self.mean
+            self.mean += delta * n / total
+            self._m2 += chunk_m2 + delta * delta * self.count * n / total
+            self.count = total
+
+        if statuses is not None:
+            # Labels in first-seen order, which the status charts draw their wedges in
+            labels, first, counts = np.unique(np.asarray(statuses), return_index=True, return_counts=True)
+            order = np.argsort(first)
+            for label, count in zip(labels[order].tolist(), counts[order].tolist()):
+                self.status_counts[label] = self.status_counts.get(label, 0) + count
+        return self
+
+    def update_records(self, records, score_field='score', status_field='status'):
+        """Fold a chunk of result dicts (REAL_VALIDATION_DATA['validation_results'] rows)"""
+        scores = np.fromiter((float(r[score_field]) for r in records), dtype=np.float64, count=len(records))
+        return self.update(scores, [r[status_field] for r in records])
+
+    def consume(self, records, chunk_size=100_000, score_field='score', status_field='status'):
+        """Aggregate an iterator of result dicts, holding at most one chunk at a time"""
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                self.update_records(chunk, score_field, status_field)
+                chunk = []
+        if chunk:
+            self.update_records(chunk, score_field, status_field)
+        return self
+
+    def merge(self, other):
+        """Combine with an aggregator built over a different slice of results"""
+        if not np.array_equal(self.bins, other.bins) or len(self.fine_counts) != len(other.fine_counts):
+            raise ValueError('Cannot merge aggregators with different bin layouts')
+        self.bin_counts += other.bin_counts
+        self.fine_counts += other.fine_counts
+        for label, count in other.status_counts.items():
+            self.status_counts[label] = self.status_counts.get(label, 0) + count
+        if other.count:
+            total = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / total
+            self._m2 += other._m2 + delta * delta * self.count * other.count / total
+            self.count = total
+        return self
+
+    @property
+    def std(self):
+        return float(np.sqrt(self._m2 / self.count)) if self.count else 0.0
+
+    def quantile(self, q):
+        """Approximate quantile (0 <= q <= 1) interpolated within the fine histogram"""
+        if not self.count:
+            return float('nan')
+        cumulative = np.cumsum(self.fine_counts)
+        target = q * self.count
+        index = int(np.searchsorted(cumulative, target, side='left'))
+        index = min(index, len(self.fine_counts) - 1)
+        before = cumulative[index - 1] if index else 0
+        in_bin = self.fine_counts[index]
+        fraction = (target - before) / in_bin if in_bin else 0.0
+        return float(self.low + (index + fraction) * self.resolution)
+
+    def summary(self, quantiles=(0.5, 0.9, 0.99)):
+        """Plain-dict form used as data['provider_summary'] by the charts"""
+        return {
+            'total': int(self.count),
+            'status_counts': dict(self.status_counts),
+            'avg_score': float(self.mean),
+            'std_score': self.std,
+            'bins': self.bins.tolist(),
+            'bin_counts': self.bin_counts.tolist(),
+            'quantiles': {f'p{round(q * 100):g}': self.quantile(q) for q in quantiles},
+        }
+
+
+def provider_summary(data):
+    """
+    Aggregate view of all validated providers in chart data.
+
+    Uses the precomputed data['provider_summary'] (from the database or a
+    streamed export) when present, otherwise summarises validation_results.
+    """
+    if 'provider_summary' in data:
+        return data['provider_summary']
+    aggregator = ValidationAggregator().update_records(data['validation_results'])
+    return aggregator.summary()
+
+
+def _latest(npi, source, score, validated_at):
+    """The last row of each (npi, source) pair by validated_at"""
+    order = np.lexsort((validated_at, source, npi))
+    npi, source = npi[order], source[order]
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = (npi[1:] != npi[:-1]) | (source[1:] != source[:-1])
+    keep = order[last]
+    return npi[last], source[last], score[keep], validated_at[keep]
+
+
+class LatestResults:
+    """
+    The most recent ValidationResult per (NPI, source) over a stream of
+    chunks, so per-source rows can be charted as providers: each provider
+    scores the mean confidence of its latest result from every source.
+    Memory grows with the number of distinct pairs, not with rows.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._rows = 0
+        self._compacted = 0
+
+    def update(self, npi, source, score, validated_at):
+        """Fold one chunk of equal-length columns; validated_at only has to sort"""
+        part = _latest(np.asarray(npi), np.asarray(source), np.asarray(score, dtype=np.float64),
+                       np.asarray(validated_at))
+        self._parts.append(part)
+        self._rows += len(part[0])
+        # Re-reduce once the backlog doubles, so each row is sorted O(log n) times
+        if self._rows > 2 * self._compacted + 100_000:
+            self._compact()
+        return self
+
+    def _compact(self):
+        if len(self._parts) > 1:
+            self._parts = [_latest(*(np.concatenate(column) for column in zip(*self._parts)))]
+        self._rows = self._compacted = len(self._parts[0][0]) if self._parts else 0
+
+    def provider_scores(self):
+        """(npis, 0-100 scores), one per provider"""
+        self._compact()
+        if not self._parts:
+            return np.empty(0, dtype=str), np.empty(0)
+        npi, _, score, _ = self._parts[0]
+        npis, inverse = np.unique(npi, return_inverse=True)
+        return npis, np.bincount(inverse, weights=score) / np.bincount(inverse)
+
+    def aggregator(self, bins=SCORE_BINS):
+        """ValidationAggregator over providers, with statuses from the confidence cut-offs"""
+        _, scores = self.provider_scores()
+        return ValidationAggregator(bins=bins).update(scores, status_for_scores(scores))
+
+
+def iter_result_chunks(path, chunk_size=100_000):
+    """Yield lists of result dicts from a .csv or .jsonl export, one chunk at a time"""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = csv.DictReader(f) if path.endswith('.csv') else (json.loads(line) for line in f if line.strip())
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def aggregate_file(path, chunk_size=100_000, score_field='score', status_field='status'):
+    """
+    Stream a validation results export into a ValidationAggregator of
+    providers. Rows with an npi are per-source results, grouped with
+    LatestResults (sourceType and validatedAt pick each source's latest
+    row); rows without one are taken as one provider each, status included.
+    """
+    aggregator = ValidationAggregator()
+    latest = LatestResults()
+    for chunk in iter_result_chunks(path, chunk_size):
+        if 'npi' in chunk[0]:
+            latest.update([r['npi'] for r in chunk], [r.get('sourceType') or r.get('source') or '' for r in chunk],
+                          [float(r[score_field]) for r in chunk], [r.get('validatedAt') or '' for r in chunk])
+        else:
+            aggregator.update_records(chunk, score_field, status_field)
+    return aggregator.merge(latest.aggregator())
@@ -0,0 +1,169 @@
+"""
+Reusable chart templates
+Builds a chart's figure, axes, labels and static artists once and then only
+redraws its data artists for each render, for charts drawn many times over
+with different data (per tenant, per day)
+"""
+
+import contextlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+from analytics.lazy import np, plt, style_context
+
+# Formats that can be encoded straight from the Agg buffer
+RASTER_FORMATS = {'png': 'PNG', 'jpg': 'JPEG', 'jpeg': 'JPEG', 'webp': 'WEBP'}
+# Encoding dominates a blitted render. Opaque charts are written as RGB with
+# zlib's run-length strategy at level 3: about twice as fast as RGBA at PIL's
+# defaults, and no larger than savefig's PNGs (charts are mostly flat colour).
+PNG_OPTIONS = {'compress_level': 3, 'compress_type': zlib.Z_RLE}
+
+
+class _Frame:
+    """One pooled figure: its data artists, a snapshot of everything else, and the crop box"""
+
+    def __init__(self, fig, artists, dynamic, dpi, pad_inches):
+        from matplotlib.axis import Axis
+        from matplotlib.transforms import Bbox
+
+        self.fig = fig
+        self.artists = artists
+        self.dpi = dpi
+        self.opaque = fig.patch.get_facecolor()[3] == 1
+
+        fig.tight_layout()
+        # tight_layout leaves a placeholder layout engine behind, which makes
+        # every savefig do a throwaway draw first; the layout is final now
+        fig.set_layout_engine(None)
+        fig.set_dpi(dpi)
+        canvas = fig.canvas
+        # The box savefig(bbox_inches='tight') would use, measured once and
+        # snapped to whole pixels. Agg truncates the saved size to int(inches
+        # * dpi), so the crop is that many pixels from a pixel-aligned corner
+        # and the savefig box gets half a pixel of slack to truncate the same.
+        tight = fig.get_tightbbox(canvas.get_renderer()).padded(pad_inches)
+        left, bottom = int(np.floor(tight.x0 * dpi)), int(np.floor(tight.y0 * dpi))
+        right, top = left + int(tight.width * dpi), bottom + int(tight.height * dpi)
+        self.bbox = Bbox.from_extents(left / dpi, bottom / dpi, (right + 0.5) / dpi, (top + 0.5) / dpi)
+
+        # Static artists drawn on top of the data (threshold lines, legends,
+        # spines) have to be redrawn after it, so they are left out of the
+        # snapshot too. Axis tick labels sit outside the axes and stay in it.
+        renderer = canvas.get_renderer()
+        lowest = min(artist.get_zorder() for artist in dynamic)
+        overlay = []
+        for ax in fig.axes:
+            inside = ax.get_window_extent(renderer)
+            for child in ax.get_children():
+                if (child is not ax.patch and child not in dynamic and child.get_visible()
+                        and child.get_zorder() > lowest and not isinstance(child, Axis)
+                        and child.get_window_extent(renderer).overlaps(inside)):
+                    overlay.append(child)
+        self.redraw = sorted([*dynamic, *overlay], key=lambda a: a.get_zorder())
+
+        # Snapshot the figure without any of them
+        for artist in self.redraw:
+            artist.set_animated(True)
+        canvas.draw()
+        self.background = canvas.copy_from_bbox(fig.bbox)
+
+        # Pixel crop of the box within the full canvas (rows run top-down)
+        height = int(round(fig.bbox.height))
+        self.crop = (left, height - top, right, height - bottom)
+
+    def image(self):
+        """Restore the snapshot, draw only the data artists, return the cropped RGBA (RGB if opaque) pixels"""
+        canvas = self.fig.canvas
+        canvas.restore_region(self.background)
+        renderer = canvas.get_renderer()
+        for artist in self.redraw:
+            artist.draw(renderer)
+        x0, y0, x1, y1 = self.crop
+        pixels = np.asarray(canvas.buffer_rgba())[y0:y1, x0:x1]
+        return np.ascontiguousarray(pixels[..., :3]) if self.opaque else pixels
+
+
+class ChartTemplate:
+    """
+    A pool of pre-built figures for one chart.
+
+    `build(key)` creates the figure and returns (fig, artists); `update(artists,
+    data)` moves the data artists to `data` and returns the list of artists it
+    changed. `key(data)` picks the layout (e.g. the tuple of source names), so
+    data with a different set of bars gets its own figure.
+
+    Raster output at the template's dpi is blitted: a snapshot of the static
+    parts is restored and only the data artists are drawn before encoding.
+    Other formats, or per-call savefig options, go through fig.savefig with
+    the cached layout and bounding box.
+    """
+
+    def __init__(self, build, update, key, style=None, savefig=None, max_figures=8):
+        self.build = build
+        self.update = update
+        self.key = key
+        self.style = style
+        self.savefig = dict(savefig or {})
+        self.max_figures = max_figures
+        self._frames = OrderedDict()
+        # Figures are shared state; one render at a time per template
+        self._lock = threading.Lock()
+
+    def _style(self):
+        return style_context(self.style) if self.style is not None else contextlib.nullcontext()
+
+    def _frame(self, key, data):
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+            self.update(frame.artists, data)
+            return frame
+
+        fig, artists = self.build(key)
+        dynamic = self.update(artists, data)
+        # Encode straight from the canvas, so it must carry the savefig colours
+        if 'facecolor' in self.savefig:
+            fig.patch.set_facecolor(self.savefig['facecolor'])
+        if 'edgecolor' in self.savefig:
+            fig.patch.set_edgecolor(self.savefig['edgecolor'])
+        frame = _Frame(fig, artists, dynamic, self.savefig.get('dpi', fig.dpi), plt.rcParams['savefig.pad_inches'])
+        self._frames[key] = frame
+        while len(self._frames) > self.max_figures:
+            _, old = self._frames.popitem(last=False)
+            plt.close(old.fig)
+        return frame
+
+    def render(self, data, target, format=None, pil_kwargs=None, **savefig):
+        """
+        Draw `data` and save it to `target` (a path or binary file object).
+        `format` defaults to the path's extension, else PNG.
+        """
+        if format is None:
+            ext = os.path.splitext(target)[1] if isinstance(target, (str, os.PathLike)) else ''
+            format = ext.lstrip('.') or 'png'
+        format = format.lower()
+
+        with self._lock, self._style():
+            frame = self._frame(self.key(data), data)
+            if format in RASTER_FORMATS and not savefig:
+                from PIL import Image
+                pixels = frame.image()
+                image = Image.fromarray(pixels, 'RGB' if pixels.shape[2] == 3 else 'RGBA')
+                if RASTER_FORMATS[format] == 'JPEG':
+                    image = image.convert('RGB')
+                options = {**(PNG_OPTIONS if RASTER_FORMATS[format] == 'PNG' else {}), **(pil_kwargs or {})}
+                image.save(target, format=RASTER_FORMATS[format], dpi=(frame.dpi, frame.dpi), **options)
+            else:
+                options = {**self.savefig, **savefig}
+                if pil_kwargs:
+                    options['pil_kwargs'] = pil_kwargs
+                frame.fig.savefig(target, format=format, bbox_inches=frame.bbox, **options)
+
+    def clear(self):
+        """Close every pooled figure"""
+        with self._lock:
+            for frame in self._frames.values():
+                plt.close(frame.fig)
+            self._frames.clear()
@@ -0,0 +1,102 @@
+"""
+Source x field trust matrix
+A float32 array with source/field index maps, shared by the heatmap and
+radar charts so scoring and plotting stay vectorised as sources and fields
+grow
+"""
+
+from analytics.lazy import np
+
+
+class TrustMatrix:
+    """Trust scores with one row per data source and one column per field"""
+
+    def __init__(self, values, sources, fields):
+        self.values = np.asarray(values, dtype=np.float32)
+        self.sources = list(sources)
+        self.fields = list(fields)
+        if self.values.shape != (len(self.sources), len(self.fields)):
+            raise ValueError(f'values shape {self.values.shape} does not match '
+                             f'{len(self.sources)} sources x {len(self.fields)} fields')
+        self.source_index = {s: i for i, s in enumerate(self.sources)}
+        self.field_index = {f: j for j, f in enumerate(self.fields)}
+
+    @classmethod
+    def from_nested(cls, nested, fields=None):
+        """
+        Build from {source: {field: score}} as in field_confidence_by_source.
+
+        Field order follows `fields`, or the first source's keys; any
+        source/field pair that is missing scores 0.
+        """
+        sources = list(nested)
+        if fields is None:
+            fields = list(next(iter(nested.values()), {}))
+        values = np.zeros((len(sources), len(fields)), dtype=np.float32)
+        for i, source in enumerate(sources):
+            row = nested[source]
+            values[i] = [row.get(f, 0.0) for f in fields]
+        return cls(values, sources, fields)
+
+    def to_nested(self):
+        return {s: dict(zip(self.fields, row.tolist())) for s, row in zip(self.sources, self.values)}
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def __getitem__(self, key):
+        """matrix[source, field] -> score"""
+        source, field = key
+        return float(self.values[self.source_index[source], self.field_index[field]])
+
+    def row(self, source):
+        return self.values[self.source_index[source]]
+
+    def column(self, field):
+        return self.values[:, self.field_index[field]]
+
+    def select(self, sources=None, fields=None):
+        """Sub-matrix for the given source and/or field names, in that order"""
+        sources = self.sources if sources is None else list(sources)
+        fields = self.fields if fields is None else list(fields)
+        rows = [self.source_index[s] for s in sources]
+        cols = [self.field_index[f] for f in fields]
+        return TrustMatrix(self.values[np.ix_(rows, cols)], sources, fields)
+
+    def weight_vector(self, weights):
+        """Field weights aligned to the matrix columns (unknown fields weigh 0)"""
+        return np.array([weights.get(f, 0.0) for f in self.fields], dtype=np.float32)
+
+    def weighted_scores(self, weights, normalize=True):
+        """
+        Weighted trust per source: one matrix-vector product over all rows.
+
+        With `normalize`, weights are rescaled to sum to 1 over the fields
+        present, so a missing field doesn't drag every source down.
+        """
+        w = self.weight_vector(weights)
+        if normalize and w.sum() > 0:
+            w = w / w.sum()
+        return self.values @ w
+
+    def source_means(self):
+        return self.values.mean(axis=1)
+
+    def field_means(self):
+        """Mean trust per field across sources; NaN with no sources"""
+        if not len(self.sources):
+            return np.full(len(self.fields), np.nan)
+        return self.values.mean(axis=0)
+
+    def best_source_per_field(self):
+        """Name of the most trusted source for each field"""
+        return [self.sources[i] for i in self.values.argmax(axis=0)]
+
+    def closed_rows(self):
+        """Rows with the first column repeated at the end, for closed radar polygons"""
+        return np.concatenate([self.values, self.values[:, :1]], axis=1)
+
+    def radar_angles(self, closed=True):
+        angles = np.linspace(0, 2 * np.pi, len(self.fields), endpoint=False)
+        return np.append(angles, angles[0]) if closed else angles
@@ -4,33 +4,48 @@ Professional visualizations for presentation and documentation
 Uses real validation data from multi-source verification system
 """
 
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import argparse
+import json
 import os
+import time
+
+from analytics.cache import BuildCache, chart
+from analytics.data_loader import DEFAULT_WINDOW_DAYS, apply_latency, connect, load_validation_data
+from analytics.export import save_figure
+from analytics.lazy import mpatches, np, plt
+from analytics.parallel import render_parallel, render_serial, print_timings
+from analytics.rollups import rebuild_rollups, refresh_rollups, rollup_gap
+from analytics.snapshot import export_validation_results, is_snapshot, open_snapshot
+from analytics.payloads import dashboard_payload, encode_payload
+from analytics.streaming import SCORE_BINS, aggregate_file, provider_summary
+from analytics.templates import ChartTemplate
+from analytics.trust_matrix import TrustMatrix
 
 # Set dark professional style - BLACK background, WHITE text
-plt.style.use('dark_background')
-plt.rcParams['figure.facecolor'] = '#0a0a0a'
-plt.rcParams['axes.facecolor'] = '#0a0a0a'
-plt.rcParams['savefig.facecolor'] = '#0a0a0a'
-plt.rcParams['font.family'] = 'sans-serif'
-plt.rcParams['font.sans-serif'] = ['Arial', 'Helvetica', 'DejaVu Sans']
-plt.rcParams['axes.edgecolor'] = '#ffffff'
-plt.rcParams['axes.linewidth'] = 1.2
-plt.rcParams['axes.labelcolor'] = '#ffffff'
-plt.rcParams['axes.labelsize'] = 16
-plt.rcParams['axes.titlesize'] = 18
-plt.rcParams['text.color'] = '#ffffff'
-plt.rcParams['xtick.color'] = '#ffffff'
-plt.rcParams['ytick.color'] = '#ffffff'
-plt.rcParams['xtick.labelsize'] = 14
-plt.rcParams['ytick.labelsize'] = 14
-plt.rcParams['legend.fontsize'] = 14
-plt.rcParams['figure.titlesize'] = 20
-plt.rcParams['grid.color'] = '#333333'
-plt.rcParams['grid.alpha'] = 0.4
+STYLE = {
+    'figure.facecolor': '#0a0a0a',
+    'axes.facecolor': '#0a0a0a',
+    'savefig.facecolor': '#0a0a0a',
+    'font.family': 'sans-serif',
+    'font.sans-serif': ['Arial', 'Helvetica', 'DejaVu Sans'],
+    'axes.edgecolor': '#ffffff',
+    'axes.linewidth': 1.2,
+    'axes.labelcolor': '#ffffff',
+    'axes.labelsize': 16,
+    'axes.titlesize': 18,
+    'text.color': '#ffffff',
+    'xtick.color': '#ffffff',
+    'ytick.color': '#ffffff',
+    'xtick.labelsize': 14,
+    'ytick.labelsize': 14,
+    'legend.fontsize': 14,
+    'figure.titlesize': 20,
+    'grid.color': '#333333',
+    'grid.alpha': 0.4,
+}
+# Applied per chart by @chart, so importing this module leaves rcParams alone
+CHART_STYLE = ['dark_background', STYLE]
 
 # Professional color palette - BRIGHT colors for dark background
 COLORS = {
@@ -53,6 +68,17 @@ SOURCE_COLORS = {
     'Hospital Affiliations': '#14B8A6',
 }
 
+SOURCE_SHORT_NAMES = {
+    'NPI Registry': 'NPI',
+    'Google Maps': 'Maps',
+    'State Medical Board': 'Board',
+    'Insurance Networks': 'Insurance',
+    'Hospital Affiliations': 'Hospital',
+}
+
+def source_color(source):
+    return SOURCE_COLORS.get(source, COLORS['secondary'])
+
 # Real validation data from LangGraph multi-agent system
 REAL_VALIDATION_DATA = {
     'sources': {
@@ -92,15 +118,37 @@ REAL_VALIDATION_DATA = {
 
 output_dir = os.path.dirname(os.path.abspath(__file__))
 
-def create_trust_score_matrix_heatmap():
+def trust_matrix(data):
+    """Source x field TrustMatrix for the heatmap and radar charts"""
+    return TrustMatrix.from_nested(data['field_confidence_by_source'], fields=list(data['field_weights']))
+
+def provider_status_summary(data):
+    """Status counts, provider total and average score for the status charts"""
+    summary = provider_summary(data)
+    return summary['status_counts'], summary['total'], summary['avg_score']
+
+def no_data(ax, fontsize=18):
+    """Placeholder for a chart with nothing to show yet (an empty or fresh database)"""
+    ax.axis('off')
+    ax.text(0.5, 0.5, 'No validation data', transform=ax.transAxes, ha='center', va='center',
+            fontsize=fontsize, fontweight='bold', color='#888888')
+
+def score_histogram(data):
+    """Trust score category edges and provider counts per category"""
+    summary = provider_summary(data)
+    if 'bin_counts' in summary:
+        return list(summary['bins']), list(summary['bin_counts'])
+    scores = [r['score'] for r in data['validation_results']]
+    return list(SCORE_BINS), np.histogram(scores, bins=SCORE_BINS)[0].tolist()
+
+@chart('01_trust_score_matrix_heatmap.png', inputs=('field_confidence_by_source', 'field_weights'), style=CHART_STYLE)
+def create_trust_score_matrix_heatmap(data=None):
     """Create Trust Score Matrix heatmap showing field confidence by source"""
+    data = data or REAL_VALIDATION_DATA
     fig, ax = plt.subplots(figsize=(14, 10))
     
-    sources = list(REAL_VALIDATION_DATA['field_confidence_by_source'].keys())
-    fields = list(REAL_VALIDATION_DATA['field_confidence_by_source']['NPI Registry'].keys())
-    
-    # Create matrix
-    matrix = np.array([[REAL_VALIDATION_DATA['field_confidence_by_source'][s][f] for f in fields] for s in sources])
+    trust = trust_matrix(data)
+    sources, fields, matrix = trust.sources, trust.fields, trust.values
     
     # Create heatmap
     im = ax.imshow(matrix, cmap='RdYlGn', aspect='auto', vmin=0, vmax=1)
@@ -117,12 +165,10 @@ def create_trust_score_matrix_heatmap():
     ax.set_yticklabels(sources, fontsize=16, fontweight='bold', color='white')
     
     # Add value annotations
-    for i in range(len(sources)):
-        for j in range(len(fields)):
-            value = matrix[i, j]
-            text_color = 'white' if value < 0.6 else 'black'
-            ax.text(j, i, f'{value:.0%}', ha='center', va='center', 
-                   fontsize=16, fontweight='bold', color=text_color)
+    text_colors = np.where(matrix < 0.6, 'white', 'black')
+    for (i, j), value in np.ndenumerate(matrix):
+        ax.text(j, i, f'{value:.0%}', ha='center', va='center', 
+               fontsize=16, fontweight='bold', color=text_colors[i, j])
     
     ax.set_title('Trust Score Matrix: Field Confidence by Data Source\n(LangGraph Multi-Agent Validation System)', 
                  fontsize=20, fontweight='bold', pad=20, color='white')
@@ -135,26 +181,26 @@ def create_trust_score_matrix_heatmap():
         spine.set_color('#ffffff')
     
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, '01_trust_score_matrix_heatmap.png'), dpi=150, bbox_inches='tight',
+    save_figure(os.path.join(output_dir, '01_trust_score_matrix_heatmap.png'), dpi=150, bbox_inches='tight',
                 facecolor='#0a0a0a', edgecolor='none')
     plt.close()
     print("Generated: 01_trust_score_matrix_heatmap.png")
 
-def create_source_trust_scores_bar():
-    """Bar chart of source trust scores with error indicators"""
+def source_names(data):
+    return tuple(data['sources'])
+
+def build_source_trust_scores_bar(sources):
+    """Static parts of the source trust chart; bar heights and labels are set by update_source_trust_scores_bar"""
     fig, ax = plt.subplots(figsize=(14, 8))
     
-    sources = list(REAL_VALIDATION_DATA['sources'].keys())
-    trust_scores = [REAL_VALIDATION_DATA['sources'][s]['trust_score'] for s in sources]
-    colors = [SOURCE_COLORS[s] for s in sources]
+    sources = list(sources)
+    colors = [source_color(s) for s in sources]
     
-    bars = ax.bar(sources, trust_scores, color=colors, edgecolor='#ffffff', linewidth=1.5, width=0.7)
+    bars = ax.bar(sources, [0] * len(sources), color=colors, edgecolor='#ffffff', linewidth=1.5, width=0.7)
     
-    # Add value labels on bars
-    for bar, score in zip(bars, trust_scores):
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height + 0.02,
-                f'{score:.0%}', ha='center', va='bottom', fontsize=18, fontweight='bold', color='white')
+    # Value labels on bars, positioned per render
+    labels = [ax.text(bar.get_x() + bar.get_width()/2., 0, '', ha='center', va='bottom',
+                      fontsize=18, fontweight='bold', color='white') for bar in bars]
     
     # Add threshold lines
     ax.axhline(y=0.85, color=COLORS['success'], linestyle='--', linewidth=2.5, alpha=0.8, label='High Trust Threshold (85%)')
@@ -171,24 +217,48 @@ def create_source_trust_scores_bar():
     
     ax.legend(loc='upper right', fontsize=14, framealpha=0.9, facecolor='#1a1a1a', edgecolor='white', labelcolor='white')
     ax.tick_params(axis='x', rotation=15, colors='white')
+    return fig, (sources, bars, labels)
+
+def update_source_trust_scores_bar(artists, data):
+    sources, bars, labels = artists
+    for source, bar, label in zip(sources, bars, labels):
+        score = data['sources'][source]['trust_score']
+        bar.set_height(score)
+        label.set_y(score + 0.02)
+        label.set_text(f'{score:.0%}')
+    return [*bars, *labels]
+
+SOURCE_TRUST_TEMPLATE = ChartTemplate(build_source_trust_scores_bar, update_source_trust_scores_bar,
+                                      key=source_names, style=CHART_STYLE,
+                                      savefig={'dpi': 150, 'facecolor': '#0a0a0a', 'edgecolor': 'none'})
+
+@chart('02_source_trust_scores.png', inputs=('sources',), style=CHART_STYLE)
+def create_source_trust_scores_bar(data=None):
+    """Bar chart of source trust scores with error indicators"""
+    data = data or REAL_VALIDATION_DATA
+    fig, artists = build_source_trust_scores_bar(source_names(data))
+    update_source_trust_scores_bar(artists, data)
     
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, '02_source_trust_scores.png'), dpi=150, bbox_inches='tight',
+    save_figure(os.path.join(output_dir, '02_source_trust_scores.png'), dpi=150, bbox_inches='tight',
                 facecolor='#0a0a0a', edgecolor='none')
     plt.close()
     print("Generated: 02_source_trust_scores.png")
 
-def create_validation_results_histogram():
+# Charts rendered per variant (tenant, day) from a pooled template; see render_variants()
+CHART_TEMPLATES = {create_source_trust_scores_bar: SOURCE_TRUST_TEMPLATE}
+
+@chart('03_validation_histogram.png', inputs=('validation_results', 'provider_summary'), style=CHART_STYLE)
+def create_validation_results_histogram(data=None):
     """Histogram of validation trust scores distribution"""
+    data = data or REAL_VALIDATION_DATA
     fig, ax = plt.subplots(figsize=(14, 8))
     
-    scores = [r['score'] for r in REAL_VALIDATION_DATA['validation_results']]
-    
-    # Create histogram with custom bins
-    bins = [0, 30, 50, 70, 85, 100]
+    # Category counts come pre-binned so this scales to any number of providers
+    bins, counts = score_histogram(data)
     colors_hist = [COLORS['danger'], COLORS['warning'], COLORS['secondary'], COLORS['primary'], COLORS['success']]
     
-    n, bins_out, patches = ax.hist(scores, bins=bins, edgecolor='#ffffff', linewidth=2, rwidth=0.85)
+    n, bins_out, patches = ax.hist(bins[:-1], bins=bins, weights=counts, edgecolor='#ffffff', linewidth=2, rwidth=0.85)
     
     # Color each bar
     for patch, color in zip(patches, colors_hist):
@@ -197,8 +267,8 @@ def create_validation_results_histogram():
     # Add count labels
     for i, (count, patch) in enumerate(zip(n, patches)):
         if count > 0:
-            ax.text(patch.get_x() + patch.get_width()/2., count + 0.15,
-                   f'{int(count)}', ha='center', va='bottom', fontsize=18, fontweight='bold', color='white')
+            ax.text(patch.get_x() + patch.get_width()/2., count + max(n) * 0.04,
+                   f'{int(count):,}', ha='center', va='bottom', fontsize=18, fontweight='bold', color='white')
     
     # Add category labels
     categories = ['FLAGGED\n(0-30%)', 'LOW\n(30-50%)', 'MEDIUM\n(50-70%)', 'HIGH\n(70-85%)', 'VERIFIED\n(85-100%)']
@@ -209,7 +279,7 @@ def create_validation_results_histogram():
     
     ax.set_xlabel('Trust Score Category', fontsize=18, fontweight='bold', color='white')
     ax.set_ylabel('Number of Providers', fontsize=18, fontweight='bold', color='white')
-    ax.set_title('Provider Validation Results Distribution\nTrust Score Histogram (n=10 providers)', fontsize=22, fontweight='bold', pad=20, color='white')
+    ax.set_title(f'Provider Validation Results Distribution\nTrust Score Histogram (n={sum(counts)} providers)', fontsize=22, fontweight='bold', pad=20, color='white')
     
     # Add legend
     legend_patches = [
@@ -222,17 +292,19 @@ def create_validation_results_histogram():
     ax.legend(handles=legend_patches, loc='upper right', fontsize=13, framealpha=0.9, facecolor='#1a1a1a', edgecolor='white', labelcolor='white')
     
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, '03_validation_histogram.png'), dpi=150, bbox_inches='tight',
+    save_figure(os.path.join(output_dir, '03_validation_histogram.png'), dpi=150, bbox_inches='tight',
                 facecolor='#0a0a0a', edgecolor='none')
     plt.close()
     print("Generated: 03_validation_histogram.png")
 
-def create_field_weights_pie():
+@chart('04_field_weights_pie.png', inputs=('field_weights',), style=CHART_STYLE)
+def create_field_weights_pie(data=None):
     """Pie chart showing field importance weights in trust calculation"""
+    data = data or REAL_VALIDATION_DATA
     fig, ax = plt.subplots(figsize=(12, 10))
     
-    fields = list(REAL_VALIDATION_DATA['field_weights'].keys())
-    weights = list(REAL_VALIDATION_DATA['field_weights'].values())
+    fields = list(data['field_weights'].keys())
+    weights = list(data['field_weights'].values())
     colors = [COLORS['primary'], COLORS['success'], COLORS['warning'], COLORS['purple'], COLORS['teal']]
     
     explode = (0.05, 0.02, 0.02, 0.02, 0.02)  # Highlight Name field
@@ -268,18 +340,20 @@ def create_field_weights_pie():
               facecolor='#1a1a1a', edgecolor='white', labelcolor='white')
     
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, '04_field_weights_pie.png'), dpi=150, bbox_inches='tight',
+    save_figure(os.path.join(output_dir, '04_field_weights_pie.png'), dpi=150, bbox_inches='tight',
                 facecolor='#0a0a0a', edgecolor='none')
     plt.close()
     print("Generated: 04_field_weights_pie.png")
 
-def create_source_success_rates():
+@chart('05_source_performance.png', inputs=('sources',), style=CHART_STYLE)
+def create_source_success_rates(data=None):
     """Grouped bar chart comparing success rate vs trust score by source"""
+    data = data or REAL_VALIDATION_DATA
     fig, ax = plt.subplots(figsize=(14, 8))
     
-    sources = list(REAL_VALIDATION_DATA['sources'].keys())
-    trust_scores = [REAL_VALIDATION_DATA['sources'][s]['trust_score'] for s in sources]
-    success_rates = [REAL_VALIDATION_DATA['sources'][s]['success_rate'] for s in sources]
+    sources = list(data['sources'].keys())
+    trust_scores = [data['sources'][s]['trust_score'] for s in sources]
+    success_rates = [data['sources'][s]['success_rate'] for s in sources]
     
     x = np.arange(len(sources))
     width = 0.35
@@ -307,17 +381,19 @@ def create_source_success_rates():
     ax.tick_params(axis='both', labelsize=14)
     
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, '05_source_performance.png'), dpi=150, bbox_inches='tight',
+    save_figure(os.path.join(output_dir, '05_source_performance.png'), dpi=150, bbox_inches='tight',
                 facecolor='#0a0a0a', edgecolor='none')
     plt.close()
     print("Generated: 05_source_performance.png")
 
-def create_provider_validation_bar():
+@chart('06_provider_results.png', inputs=('validation_results',), style=CHART_STYLE)
+def create_provider_validation_bar(data=None):
     """Horizontal bar chart of individual provider validation scores"""
+    data = data or REAL_VALIDATION_DATA
     fig, ax = plt.subplots(figsize=(14, 10))
     
     # Sort by score
-    results = sorted(REAL_VALIDATION_DATA['validation_results'], key=lambda x: x['score'], reverse=True)
+    results = sorted(data['validation_results'], key=lambda x: x['score'], reverse=True)
     
     names = [f"{r['name']} ({r['npi'][:4]}...)" for r in results]
     scores = [r['score'] for r in results]
@@ -360,18 +436,20 @@ def create_provider_validation_bar():
     
     ax.invert_yaxis()  # Highest at top
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, '06_provider_results.png'), dpi=150, bbox_inches='tight',
+    save_figure(os.path.join(output_dir, '06_provider_results.png'), dpi=150, bbox_inches='tight',
                 facecolor='#0a0a0a', edgecolor='none')
     plt.close()
     print("Generated: 06_provider_results.png")
 
-def create_api_response_times():
+@chart('07_api_response_times.png', inputs=('sources',), style=CHART_STYLE)
+def create_api_response_times(data=None):
     """Bar chart of API response times by source"""
+    data = data or REAL_VALIDATION_DATA
     fig, ax = plt.subplots(figsize=(14, 8))
     
-    sources = list(REAL_VALIDATION_DATA['sources'].keys())
-    response_times = [REAL_VALIDATION_DATA['sources'][s]['avg_response_ms'] for s in sources]
-    colors = [SOURCE_COLORS[s] for s in sources]
+    sources = list(data['sources'].keys())
+    response_times = [data['sources'][s]['avg_response_ms'] for s in sources]
+    colors = [source_color(s) for s in sources]
     
     bars = ax.bar(sources, response_times, color=colors, edgecolor='#ffffff', linewidth=1.5, width=0.7)
     
@@ -380,6 +458,13 @@ def create_api_response_times():
         ax.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 20,
                f'{time}ms', ha='center', va='bottom', fontsize=18, fontweight='bold', color='white')
     
+    # Measured tail latencies (telemetry data only)
+    tails = [s for s in sources if 'p95_response_ms' in data['sources'][s]]
+    if tails:
+        for q, marker in (('p95', 'v'), ('p99', 'X')):
+            ax.scatter(tails, [data['sources'][s][f'{q}_response_ms'] for s in tails], marker=marker, s=160,
+                       color='white', edgecolor='#0a0a0a', zorder=3, label=f'{q} latency')
+    
     # Add SLA threshold line
     ax.axhline(y=500, color=COLORS['warning'], linestyle='--', linewidth=2.5, alpha=0.8, label='SLA Target (500ms)')
     
@@ -391,78 +476,76 @@ def create_api_response_times():
     ax.tick_params(axis='y', labelsize=14)
     
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, '07_api_response_times.png'), dpi=150, bbox_inches='tight',
+    save_figure(os.path.join(output_dir, '07_api_response_times.png'), dpi=150, bbox_inches='tight',
                 facecolor='#0a0a0a', edgecolor='none')
     plt.close()
     print("Generated: 07_api_response_times.png")
 
-def create_validation_status_pie():
+@chart('08_validation_status.png', inputs=('validation_results', 'provider_summary'), style=CHART_STYLE)
+def create_validation_status_pie(data=None):
     """Pie chart of validation status distribution"""
+    data = data or REAL_VALIDATION_DATA
     fig, ax = plt.subplots(figsize=(12, 10))
     
-    results = REAL_VALIDATION_DATA['validation_results']
-    status_counts = {}
-    for r in results:
-        status = r['status']
-        status_counts[status] = status_counts.get(status, 0) + 1
-    
-    labels = list(status_counts.keys())
-    sizes = list(status_counts.values())
-    
-    color_map = {
-        'HIGH_CONFIDENCE': COLORS['success'],
-        'MEDIUM_CONFIDENCE': COLORS['primary'],
-        'FLAGGED': COLORS['danger'],
-    }
-    colors = [color_map.get(l, COLORS['secondary']) for l in labels]
-    
-    explode = [0.05 if l == 'FLAGGED' else 0 for l in labels]
-    
-    wedges, texts, autotexts = ax.pie(sizes, labels=labels, autopct=lambda pct: f'{pct:.0f}%\n({int(pct/100*sum(sizes))})',
-                                       colors=colors, explode=explode,
-                                       shadow=False, startangle=90,
-                                       wedgeprops={'edgecolor': '#ffffff', 'linewidth': 2})
-    
-    for text in texts:
-        text.set_fontsize(16)
-        text.set_fontweight('bold')
-        text.set_color('white')
-    for autotext in autotexts:
-        autotext.set_fontsize(14)
-        autotext.set_fontweight('bold')
-        autotext.set_color('white')
-    
-    ax.set_title('Validation Status Distribution\nProvider Trust Score Classification (n=10)', 
+    status_counts, total, avg_score = provider_status_summary(data)
+    if total:
+        labels = list(status_counts.keys())
+        sizes = list(status_counts.values())
+    
+        color_map = {
+            'HIGH_CONFIDENCE': COLORS['success'],
+            'MEDIUM_CONFIDENCE': COLORS['primary'],
+            'FLAGGED': COLORS['danger'],
+        }
+        colors = [color_map.get(l, COLORS['secondary']) for l in labels]
+    
+        explode = [0.05 if l == 'FLAGGED' else 0 for l in labels]
+    
+        wedges, texts, autotexts = ax.pie(sizes, labels=labels, autopct=lambda pct: f'{pct:.0f}%\n({round(pct/100*sum(sizes)):,})',
+                                           colors=colors, explode=explode,
+                                           shadow=False, startangle=90,
+                                           wedgeprops={'edgecolor': '#ffffff', 'linewidth': 2})
+    
+        for text in texts:
+            text.set_fontsize(16)
+            text.set_fontweight('bold')
+            text.set_color('white')
+        for autotext in autotexts:
+            autotext.set_fontsize(14)
+            autotext.set_fontweight('bold')
+            autotext.set_color('white')
+
+        # Add statistics box
+        stats_text = f'Total Providers: {total:,}\nAverage Score: {avg_score:.1f}%\nPass Rate: {(status_counts.get("HIGH_CONFIDENCE", 0)/total)*100:.0f}%'
+        ax.text(1.3, 0.5, stats_text, transform=ax.transAxes, fontsize=16, verticalalignment='center', color='white',
+                bbox=dict(boxstyle='round', facecolor='#1a1a1a', edgecolor='white', alpha=0.9))
+    else:
+        no_data(ax, fontsize=24)
+    
+    ax.set_title(f'Validation Status Distribution\nProvider Trust Score Classification (n={total})', 
                  fontsize=22, fontweight='bold', pad=25, color='white')
     
-    # Add statistics box
-    total = sum(sizes)
-    avg_score = np.mean([r['score'] for r in results])
-    stats_text = f'Total Providers: {total}\nAverage Score: {avg_score:.1f}%\nPass Rate: {(status_counts.get("HIGH_CONFIDENCE", 0)/total)*100:.0f}%'
-    ax.text(1.3, 0.5, stats_text, transform=ax.transAxes, fontsize=16, verticalalignment='center', color='white',
-            bbox=dict(boxstyle='round', facecolor='#1a1a1a', edgecolor='white', alpha=0.9))
-    
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, '08_validation_status.png'), dpi=150, bbox_inches='tight',
+    save_figure(os.path.join(output_dir, '08_validation_status.png'), dpi=150, bbox_inches='tight',
                 facecolor='#0a0a0a', edgecolor='none')
     plt.close()
     print("Generated: 08_validation_status.png")
 
-def create_multi_source_radar():
+@chart('09_multi_source_radar.png', inputs=('field_confidence_by_source', 'field_weights'), style=CHART_STYLE)
+def create_multi_source_radar(data=None):
     """Radar/Spider chart comparing source capabilities across fields"""
+    data = data or REAL_VALIDATION_DATA
     fig, ax = plt.subplots(figsize=(12, 12), subplot_kw=dict(projection='polar'))
     
-    fields = ['Name', 'Specialty', 'License', 'Address', 'Phone']
-    num_fields = len(fields)
+    trust = trust_matrix(data)
+    fields = trust.fields
     
-    # Compute angle for each field
-    angles = [n / float(num_fields) * 2 * np.pi for n in range(num_fields)]
-    angles += angles[:1]  # Complete the loop
+    # Compute angle for each field, repeating the first to complete the loop
+    angles = trust.radar_angles()
     
     # Plot each source
-    for source, color in SOURCE_COLORS.items():
-        values = [REAL_VALIDATION_DATA['field_confidence_by_source'][source][f] for f in fields]
-        values += values[:1]  # Complete the loop
+    for source, values in zip(trust.sources, trust.closed_rows()):
+        color = source_color(source)
         ax.plot(angles, values, 'o-', linewidth=3, label=source, color=color, markersize=10)
         ax.fill(angles, values, alpha=0.15, color=color)
     
@@ -481,13 +564,16 @@ def create_multi_source_radar():
               facecolor='#1a1a1a', edgecolor='white', labelcolor='white')
     
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, '09_multi_source_radar.png'), dpi=150, bbox_inches='tight',
+    save_figure(os.path.join(output_dir, '09_multi_source_radar.png'), dpi=150, bbox_inches='tight',
                 facecolor='#0a0a0a', edgecolor='none')
     plt.close()
     print("Generated: 09_multi_source_radar.png")
 
-def create_summary_dashboard():
+@chart('10_summary_dashboard.png', inputs=('sources', 'validation_results', 'field_weights', 'provider_summary'),
+       style=CHART_STYLE)
+def create_summary_dashboard(data=None):
     """Create a comprehensive summary dashboard with multiple subplots"""
+    data = data or REAL_VALIDATION_DATA
     fig = plt.figure(figsize=(20, 16), facecolor='#0a0a0a')
     fig.suptitle('LampStack Provider Validation Analytics Dashboard\nMulti-Agent LangGraph System Performance Summary', 
                  fontsize=24, fontweight='bold', y=0.98, color='white')
@@ -498,12 +584,12 @@ def create_summary_dashboard():
     # 1. Trust Score by Source (bar)
     ax1 = fig.add_subplot(gs[0, 0])
     ax1.set_facecolor('#0a0a0a')
-    sources = list(REAL_VALIDATION_DATA['sources'].keys())
-    trust_scores = [REAL_VALIDATION_DATA['sources'][s]['trust_score'] for s in sources]
-    colors = [SOURCE_COLORS[s] for s in sources]
+    sources = list(data['sources'].keys())
+    trust_scores = [data['sources'][s]['trust_score'] for s in sources]
+    colors = [source_color(s) for s in sources]
     ax1.bar(range(len(sources)), trust_scores, color=colors, edgecolor='#ffffff', linewidth=1.5)
     ax1.set_xticks(range(len(sources)))
-    ax1.set_xticklabels(['NPI', 'Maps', 'Board', 'Insurance', 'Hospital'], fontsize=12, rotation=45, color='white')
+    ax1.set_xticklabels([SOURCE_SHORT_NAMES.get(s, s) for s in sources], fontsize=12, rotation=45, color='white')
     ax1.set_ylabel('Trust Score', fontsize=14, fontweight='bold', color='white')
     ax1.set_title('Source Trust Scores', fontsize=16, fontweight='bold', color='white', pad=10)
     ax1.set_ylim(0, 1.1)
@@ -513,33 +599,34 @@ def create_summary_dashboard():
     # 2. Validation Status (pie)
     ax2 = fig.add_subplot(gs[0, 1])
     ax2.set_facecolor('#0a0a0a')
-    results = REAL_VALIDATION_DATA['validation_results']
-    status_counts = {'HIGH': 0, 'MEDIUM': 0, 'FLAGGED': 0}
-    for r in results:
-        if r['status'] == 'HIGH_CONFIDENCE':
-            status_counts['HIGH'] += 1
-        elif r['status'] == 'MEDIUM_CONFIDENCE':
-            status_counts['MEDIUM'] += 1
-        else:
-            status_counts['FLAGGED'] += 1
-    wedges, texts, autotexts = ax2.pie(status_counts.values(), labels=status_counts.keys(), autopct='%1.0f%%',
-            colors=[COLORS['success'], COLORS['primary'], COLORS['danger']],
-            wedgeprops={'edgecolor': '#ffffff', 'linewidth': 1.5})
-    for text in texts:
-        text.set_color('white')
-        text.set_fontsize(14)
-        text.set_fontweight('bold')
-    for autotext in autotexts:
-        autotext.set_color('white')
-        autotext.set_fontsize(12)
-        autotext.set_fontweight('bold')
+    results = data['validation_results']
+    provider_counts = provider_status_summary(data)[0]
+    status_counts = {
+        'HIGH': provider_counts.get('HIGH_CONFIDENCE', 0),
+        'MEDIUM': provider_counts.get('MEDIUM_CONFIDENCE', 0),
+        'FLAGGED': sum(c for s, c in provider_counts.items() if s not in ('HIGH_CONFIDENCE', 'MEDIUM_CONFIDENCE')),
+    }
+    if sum(status_counts.values()):
+        wedges, texts, autotexts = ax2.pie(status_counts.values(), labels=status_counts.keys(), autopct='%1.0f%%',
+                colors=[COLORS['success'], COLORS['primary'], COLORS['danger']],
+                wedgeprops={'edgecolor': '#ffffff', 'linewidth': 1.5})
+        for text in texts:
+            text.set_color('white')
+            text.set_fontsize(14)
+            text.set_fontweight('bold')
+        for autotext in autotexts:
+            autotext.set_color('white')
+            autotext.set_fontsize(12)
+            autotext.set_fontweight('bold')
+    else:
+        no_data(ax2)
     ax2.set_title('Validation Status', fontsize=16, fontweight='bold', color='white', pad=10)
     
     # 3. Field Weights (pie)
     ax3 = fig.add_subplot(gs[0, 2])
     ax3.set_facecolor('#0a0a0a')
-    fields = list(REAL_VALIDATION_DATA['field_weights'].keys())
-    weights = list(REAL_VALIDATION_DATA['field_weights'].values())
+    fields = list(data['field_weights'].keys())
+    weights = list(data['field_weights'].values())
     wedges3, texts3, autotexts3 = ax3.pie(weights, labels=fields, autopct='%1.0f%%',
             colors=[COLORS['primary'], COLORS['success'], COLORS['warning'], COLORS['purple'], COLORS['teal']],
             wedgeprops={'edgecolor': '#ffffff', 'linewidth': 1.5})
@@ -556,9 +643,8 @@ def create_summary_dashboard():
     # 4. Score Distribution (histogram)
     ax4 = fig.add_subplot(gs[1, :2])
     ax4.set_facecolor('#0a0a0a')
-    scores = [r['score'] for r in results]
-    bins = [0, 30, 50, 70, 85, 100]
-    n, bins_out, patches = ax4.hist(scores, bins=bins, edgecolor='#ffffff', rwidth=0.85, linewidth=1.5)
+    bins, counts = score_histogram(data)
+    n, bins_out, patches = ax4.hist(bins[:-1], bins=bins, weights=counts, edgecolor='#ffffff', rwidth=0.85, linewidth=1.5)
     colors_hist = [COLORS['danger'], COLORS['warning'], COLORS['secondary'], COLORS['primary'], COLORS['success']]
     for patch, color in zip(patches, colors_hist):
         patch.set_facecolor(color)
@@ -570,10 +656,10 @@ def create_summary_dashboard():
     # 5. API Response Times
     ax5 = fig.add_subplot(gs[1, 2])
     ax5.set_facecolor('#0a0a0a')
-    response_times = [REAL_VALIDATION_DATA['sources'][s]['avg_response_ms'] for s in sources]
-    ax5.barh(range(len(sources)), response_times, color=[SOURCE_COLORS[s] for s in sources], edgecolor='#ffffff', linewidth=1.5)
+    response_times = [data['sources'][s]['avg_response_ms'] for s in sources]
+    ax5.barh(range(len(sources)), response_times, color=[source_color(s) for s in sources], edgecolor='#ffffff', linewidth=1.5)
     ax5.set_yticks(range(len(sources)))
-    ax5.set_yticklabels(['NPI', 'Maps', 'Board', 'Ins', 'Hosp'], fontsize=12, color='white')
+    ax5.set_yticklabels([SOURCE_SHORT_NAMES.get(s, s)[:4] for s in sources], fontsize=12, color='white')
     ax5.set_xlabel('Response Time (ms)', fontsize=14, fontweight='bold', color='white')
     ax5.set_title('API Response Times', fontsize=16, fontweight='bold', color='white', pad=10)
     ax5.axvline(x=500, color=COLORS['warning'], linestyle='--', linewidth=2)
@@ -608,33 +694,195 @@ def create_summary_dashboard():
         ax6.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 1,
                 f'{score:.0f}', ha='center', va='bottom', fontsize=14, fontweight='bold', color='white')
     
-    plt.savefig(os.path.join(output_dir, '10_summary_dashboard.png'), dpi=150, bbox_inches='tight',
+    save_figure(os.path.join(output_dir, '10_summary_dashboard.png'), dpi=150, bbox_inches='tight',
                 facecolor='#0a0a0a', edgecolor='none')
     plt.close()
     print("Generated: 10_summary_dashboard.png")
 
-def main():
+CHARTS = [
+    create_trust_score_matrix_heatmap,
+    create_source_trust_scores_bar,
+    create_validation_results_histogram,
+    create_field_weights_pie,
+    create_source_success_rates,
+    create_provider_validation_bar,
+    create_api_response_times,
+    create_validation_status_pie,
+    create_multi_source_radar,
+    create_summary_dashboard,
+]
+
+def load_data(database_url=None, provider_limit=10):
+    """
+    Chart data aggregated from the Provider/ValidationResult/TrustScore
+    tables. Read-only: source success rates come from the rollups as they
+    stand, so run update_rollups() (--refresh-rollups) to fold in new results;
+    a warning is printed when the rollups are behind.
+    """
+    conn = connect(database_url)
+    try:
+        since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=DEFAULT_WINDOW_DAYS)
+        raw, rolled = rollup_gap(conn, since, pending=True)
+        if raw != rolled:
+            print(f"Warning: rollups hold {rolled:,} of {raw:,} validation results from the last "
+                  f"{DEFAULT_WINDOW_DAYS} days; run with --refresh-rollups for current success rates")
+        return load_validation_data(conn, REAL_VALIDATION_DATA, provider_limit=provider_limit)
+    finally:
+        conn.close()
+
+def update_rollups(database_url=None, rebuild=False, window_days=DEFAULT_WINDOW_DAYS):
+    """
+    Fold new validation results into the rollups, then re-aggregate the
+    chart window if results landed behind the watermark (backfills, late
+    commits). `rebuild` re-aggregates the whole history instead.
+    """
+    conn = connect(database_url)
+    try:
+        if rebuild:
+            print(f"Rebuilt rollups from {rebuild_rollups(conn):,} validation results")
+            return
+        print(f"Folded {refresh_rollups(conn):,} new validation results into the rollups")
+        since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=window_days)
+        raw, rolled = rollup_gap(conn, since)
+        if raw != rolled:
+            print(f"Rollups hold {rolled:,} of {raw:,} results from the last {window_days} days; re-aggregating")
+            rebuild_rollups(conn, since=since)
+    finally:
+        conn.close()
+
+def style_settings():
+    """Everything besides the data that changes how a chart looks"""
+    return {'base': 'dark_background', 'rc': STYLE, 'colors': COLORS, 'source_colors': SOURCE_COLORS}
+
+def main(workers=None, timeout=None, force=False, data=None):
+    """
+    Generate all charts; pass `workers` to render them in a process pool.
+
+    `data` defaults to REAL_VALIDATION_DATA; use load_data() to chart the
+    production database instead.
+
+    Charts whose data slice, style and code are unchanged since the last run
+    are skipped unless `force` is set.
+    """
     print("=" * 60)
     print("LampStack Professional Analytics Generator")
     print("Generating visualization charts for presentation...")
     print("=" * 60)
     print()
     
-    create_trust_score_matrix_heatmap()
-    create_source_trust_scores_bar()
-    create_validation_results_histogram()
-    create_field_weights_pie()
-    create_source_success_rates()
-    create_provider_validation_bar()
-    create_api_response_times()
-    create_validation_status_pie()
-    create_multi_source_radar()
-    create_summary_dashboard()
-    
+    data = data or REAL_VALIDATION_DATA
+    cache = BuildCache(output_dir, style=style_settings())
+    stale, fresh, digests = cache.plan(CHARTS, data, force=force)
+    for func in fresh:
+        print(f"Unchanged: {func.output_name}")
+    
+    start = time.perf_counter()
+    if workers is None:
+        results = render_serial(stale, args=(data,))
+    else:
+        results = render_parallel(stale, workers=workers, timeout=timeout, args=(data,))
+    print_timings(results, time.perf_counter() - start)
+    
+    for func, result in zip(stale, results):
+        if result['status'] == 'ok':
+            cache.record(func, digests[func.output_name])
+    cache.save()
+    
+    generated = sum(1 for r in results if r['status'] == 'ok')
     print()
     print("=" * 60)
-    print(f"All 10 charts generated in: {output_dir}")
+    print(f"{generated} charts generated, {len(fresh)} unchanged, in: {output_dir}")
     print("=" * 60)
+    return results
+
+def render_variants(variants, base=None, directory=None):
+    """
+    Render each templated chart once per variant. `variants` maps a name (a
+    tenant, a day) to chart data overrides such as 'sources', merged over
+    `base` (REAL_VALIDATION_DATA by default); charts are written to
+    <directory>/<name>/ (output_dir/variants by default).
+    """
+    base = base or REAL_VALIDATION_DATA
+    directory = directory or os.path.join(output_dir, 'variants')
+    for name, overrides in variants.items():
+        target = os.path.join(directory, name)
+        os.makedirs(target, exist_ok=True)
+        for func, template in CHART_TEMPLATES.items():
+            template.render({**base, **overrides}, os.path.join(target, func.output_name))
+    return len(variants)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate LampStack analytics charts')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='render charts in a process pool of this size (0 = one per CPU)')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='per-chart timeout in seconds (parallel mode only)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-render every chart even if its inputs are unchanged')
+    parser.add_argument('--database-url', nargs='?', const='', default=None,
+                        help='chart live data from this database (defaults to $DATABASE_URL)')
+    parser.add_argument('--providers', type=int, default=10,
+                        help='number of recently validated providers to show individually')
+    parser.add_argument('--results-file', default=None,
+                        help='stream a .csv/.jsonl export or a snapshot directory of validation results '
+                             'into the histogram and status charts; per-source rows (with an npi) are '
+                             'grouped into providers by their latest result from each source')
+    parser.add_argument('--latency-file', default=None,
+                        help='chart response times from a validation service telemetry JSON '
+                             '(main.py --metrics) instead of the static averages')
+    parser.add_argument('--refresh-rollups', action='store_true',
+                        help='fold new results from --database-url into the ValidationRollup tables '
+                             '(repairing the chart window if results arrived late) before charting')
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help='re-aggregate the ValidationRollup tables from the whole result history')
+    parser.add_argument('--export-snapshot', metavar='PATH', default=None,
+                        help='write the ValidationResult history from --database-url to a columnar '
+                             'snapshot at PATH instead of rendering charts')
+    parser.add_argument('--variants', metavar='FILE', default=None,
+                        help='render the templated charts (source trust scores) once per variant in FILE, a JSON '
+                             'object mapping a tenant or day name to chart data overrides such as "sources", '
+                             'into variants/<name>/ instead of rendering every chart')
+    parser.add_argument('--json', metavar='PATH', default=None,
+                        help='write the chart data for dashboard.html to PATH as compact JSON '
+                             '(gzipped if PATH ends in .gz) instead of rendering charts')
+    return parser.parse_args(argv)
+
+def write_payload(path, data=None):
+    """Pre-aggregated dashboard JSON for browser-side rendering (see analytics.payloads)"""
+    body = encode_payload(dashboard_payload(data or REAL_VALIDATION_DATA), compress=path.endswith('.gz'))
+    with open(path, 'wb') as f:
+        f.write(body)
+    print(f"Wrote {len(body):,} bytes of chart data to {path}")
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    data = None
+    if args.export_snapshot:
+        conn = connect(args.database_url or None)
+        try:
+            rows = export_validation_results(conn, args.export_snapshot)
+        finally:
+            conn.close()
+        print(f"Wrote {rows:,} validation results to {args.export_snapshot}")
+        raise SystemExit(0)
+    if args.refresh_rollups or args.rebuild_rollups:
+        update_rollups(args.database_url or None, rebuild=args.rebuild_rollups)
+    if args.database_url is not None:
+        data = load_data(args.database_url or None, provider_limit=args.providers)
+    if args.results_file:
+        data = dict(data or REAL_VALIDATION_DATA)
+        if is_snapshot(args.results_file):
+            data['provider_summary'] = open_snapshot(args.results_file).summary()
+        else:
+            data['provider_summary'] = aggregate_file(args.results_file).summary()
+    if args.latency_file:
+        with open(args.latency_file) as f:
+            data = apply_latency(data or REAL_VALIDATION_DATA, json.load(f))
+    if args.variants:
+        with open(args.variants) as f:
+            count = render_variants(json.load(f), base=data)
+        print(f"Rendered {count:,} variants to {os.path.join(output_dir, 'variants')}")
+    elif args.json:
+        write_payload(args.json, data)
+    else:
+        main(workers=args.workers, timeout=args.timeout, force=args.force, data=data)
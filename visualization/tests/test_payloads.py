@@ -0,0 +1,22 @@
+import json
+
+import pytest
+
+from analytics.data_loader import FIXTURE_SCHEMA, connect, load_validation_data
+from analytics.payloads import dashboard_payload, encode_payload
+from professional_analytics import REAL_VALIDATION_DATA
+
+
+def test_empty_database_encodes_as_valid_json():
+    conn = connect(':memory:')
+    conn.executescript(FIXTURE_SCHEMA)
+    data = load_validation_data(conn, REAL_VALIDATION_DATA)
+    payload = json.loads(encode_payload(dashboard_payload(data)), parse_constant=pytest.fail)
+    assert payload['sections']['fields']['confidence'] == [None] * len(data['field_weights'])
+    assert payload['sections']['totals']['providers'] == 0
+
+
+def test_sample_data_round_trips():
+    payload = dashboard_payload(REAL_VALIDATION_DATA)
+    assert json.loads(encode_payload(payload)) == json.loads(json.dumps(payload))
+    assert None not in payload['sections']['fields']['confidence']
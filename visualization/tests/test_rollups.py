@@ -0,0 +1,65 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from analytics.data_loader import FIXTURE_SCHEMA, connect, load_validation_data
+from analytics.rollups import rebuild_rollups, refresh_rollups, rollup_gap, rollup_totals
+from professional_analytics import REAL_VALIDATION_DATA
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def conn():
+    conn = connect(':memory:')
+    conn.executescript(FIXTURE_SCHEMA)
+    conn.execute('INSERT INTO "Provider" ("id", "npiNumber", "firstName", "lastName") VALUES (?, ?, ?, ?)',
+                 ('p1', '1234567893', 'Ann', 'Lee'))
+    yield conn
+    conn.close()
+
+
+def add_results(conn, count, validated_at, status='success', source='npi_registry'):
+    conn.executemany(
+        'INSERT INTO "ValidationResult" ("id", "providerId", "agentName", "validationType", "status", '
+        '"confidence", "sourceType", "validatedAt") VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        [(str(uuid.uuid4()), 'p1', 'agent', 'npi', status, 0.9, source,
+          (validated_at - timedelta(minutes=i)).isoformat(sep=' ')) for i in range(count)])
+    conn.commit()
+
+
+def test_refresh_folds_each_result_once(conn):
+    add_results(conn, 30, NOW - timedelta(days=2))
+    assert refresh_rollups(conn, now=NOW) == 30
+    assert refresh_rollups(conn, now=NOW) == 0
+    assert rollup_totals(conn, since=NOW - timedelta(days=10), now=NOW)[0][:2] == ('npi_registry', 30)
+
+
+def test_late_results_are_detected_and_repaired(conn):
+    add_results(conn, 10, NOW - timedelta(days=2))
+    refresh_rollups(conn, now=NOW)
+    # Backfilled behind the watermark: a refresh never sees them
+    add_results(conn, 5, NOW - timedelta(days=5))
+    assert refresh_rollups(conn, now=NOW) == 0
+    since = NOW - timedelta(days=30)
+    assert rollup_gap(conn, since) == (15, 10)
+
+    assert rebuild_rollups(conn, now=NOW, since=since) == 15
+    assert rollup_gap(conn, since) == (15, 15)
+
+
+def test_pending_gap_counts_unfolded_results(conn):
+    add_results(conn, 4, NOW - timedelta(hours=1))
+    assert rollup_gap(conn, NOW - timedelta(days=1), pending=True, now=NOW) == (4, 0)
+    refresh_rollups(conn, now=NOW)
+    assert rollup_gap(conn, NOW - timedelta(days=1), pending=True, now=NOW) == (4, 4)
+
+
+def test_sources_without_results_report_no_rate(conn):
+    conn.execute('INSERT INTO "TrustScore" ("sourceType", "dataField", "score") VALUES (?, ?, ?)',
+                 ('npi_registry', 'name', 0.9))
+    data = load_validation_data(conn, REAL_VALIDATION_DATA)
+    npi = data['sources']['NPI Registry']
+    assert npi['success_rate'] == 0.0
+    assert npi['results'] == 0